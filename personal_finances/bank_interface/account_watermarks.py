@@ -0,0 +1,83 @@
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional
+import json
+import logging
+import os
+from .bank_client import AccountTransactions
+from .nordigen_adapter import NordigenTransactions, get_datetime
+from ..file_helper import write_json
+
+
+LOGGER = logging.getLogger(__name__)
+ACCOUNT_WATERMARKS_PATH = "data/account_watermarks.json"
+DEFAULT_OVERLAP_DAYS = 7
+
+# last booked date per account id
+AccountWatermarks = Dict[str, date]
+
+
+def load_account_watermarks(path: str = ACCOUNT_WATERMARKS_PATH) -> AccountWatermarks:
+    if not os.path.exists(path):
+        LOGGER.info(f"no account watermarks found in {path}")
+        return {}
+
+    with open(path, "r") as watermarks_file:
+        return {
+            account_id: date.fromisoformat(last_booked_date)
+            for account_id, last_booked_date in json.loads(
+                watermarks_file.read()
+            ).items()
+        }
+
+
+def save_account_watermarks(
+    watermarks: AccountWatermarks, path: str = ACCOUNT_WATERMARKS_PATH
+) -> None:
+    write_json(
+        path,
+        {
+            account_id: last_booked_date.isoformat()
+            for account_id, last_booked_date in sorted(watermarks.items())
+        },
+        atomic=True,
+    )
+
+
+def get_last_booked_date(transactions: NordigenTransactions) -> Optional[date]:
+    return max(
+        (get_datetime(transaction).date() for transaction in transactions["booked"]),
+        default=None,
+    )
+
+
+def update_account_watermarks(
+    watermarks: AccountWatermarks,
+    account_transactions: Iterable[AccountTransactions],
+) -> AccountWatermarks:
+    """
+    Accounts without booked transactions keep their previous watermark,
+    a watermark never moves back.
+    """
+    updated_watermarks = dict(watermarks)
+    for transactions in account_transactions:
+        account_id = transactions["accountId"]
+        last_booked_date = get_last_booked_date(transactions["transactions"])
+        if last_booked_date is None:
+            continue
+        previous = updated_watermarks.get(account_id)
+        if previous is None or previous < last_booked_date:
+            updated_watermarks[account_id] = last_booked_date
+    return updated_watermarks
+
+
+def get_dates_from(
+    watermarks: AccountWatermarks, overlap_days: int = DEFAULT_OVERLAP_DAYS
+) -> Dict[str, date]:
+    """
+    Transactions can be booked with a date earlier than the latest one seen,
+    e.g. pending ones, so the fetch starts overlap_days before the watermark.
+    """
+    return {
+        account_id: last_booked_date - timedelta(days=overlap_days)
+        for account_id, last_booked_date in watermarks.items()
+    }
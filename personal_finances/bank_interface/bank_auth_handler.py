@@ -2,7 +2,6 @@ from __future__ import annotations
 from dataclasses import dataclass
 from functools import partial
 from time import sleep
-from nordigen import NordigenClient
 from typing import List, Iterable
 import logging
 
@@ -19,7 +18,12 @@ from .bank_validation_provider import (
     BankValidationProvider,
 )
 
-from .bank_client import AuthorizationUrl, GocardlessClient, BankDetails
+from .bank_client import (
+    AuthorizationUrl,
+    GocardlessClient,
+    BankDetails,
+    SessionNordigenClient,
+)
 
 from .disk_requisition_store import DiskRequisitionStore
 from .disk_token_store import DiskTokenStore
@@ -39,9 +43,14 @@ LOGGER = logging.getLogger(__name__)
 
 
 class BankAuthorizationHandler:
-    def __init__(self, auth: NordigenAuth, bank_details: List[BankDetails]):
+    def __init__(
+        self,
+        auth: NordigenAuth,
+        bank_details: List[BankDetails],
+        max_workers: int = 1,
+    ):
         self._bank_details = bank_details
-        self._nordigen_client = NordigenClient(
+        self._nordigen_client = SessionNordigenClient(
             secret_id=auth.secret_id,
             secret_key=auth.secret_key,
         )
@@ -50,7 +59,9 @@ class BankAuthorizationHandler:
         self._bank_client = GocardlessClient(self._nordigen_client)
         self._resolve_auth_token(TEMPORARY_FIXED_USER_ID)
 
-        self.gocardless_client = GocardlessClient(self._nordigen_client)
+        self.gocardless_client = GocardlessClient(
+            self._nordigen_client, max_workers=max_workers
+        )
 
         with LocalhostValidationProvider() as validation_provider:
             self.auth_urls = self._resolve_authorization_urls(
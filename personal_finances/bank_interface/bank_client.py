@@ -1,14 +1,15 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Iterable, cast
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Mapping, Optional, TypedDict, cast
 from pydantic import BaseModel
-from functools import reduce
 from copy import deepcopy
 from nordigen import NordigenClient
+from nordigen.types.http_enums import HTTPMethod
+from requests.models import HTTPError
 from .bank_validation_provider import BankValidationProvider
 from ..bank_interface.nordigen_adapter import (
-    EMPTY_NORDIGEN_TRANSACTIONS,
     NordigenTransactions,
-    concat_nordigen_transactions,
+    collect_nordigen_transactions,
 )
 from .token_store import (
     AccessTokenObject,
@@ -17,8 +18,11 @@ from .token_store import (
     gocardless_access_token_adapter,
     gocardless_token_adapter,
 )
-from datetime import datetime
+from datetime import date, datetime
+import json
 import logging
+import requests
+from ..http_session import get_http_session
 from ..utils import log_wrapper
 import uuid
 
@@ -27,6 +31,11 @@ LOGGER = logging.getLogger(__name__)
 NordigenRequisition = Any
 
 
+class AccountTransactions(TypedDict):
+    accountId: str
+    transactions: NordigenTransactions
+
+
 class BankDetails(BaseModel):
     name: str
     country: str
@@ -69,9 +78,61 @@ class BankClient(ABC):
         pass
 
 
+class SessionNordigenClient(NordigenClient):  # type: ignore[misc]
+    """
+    NordigenClient sending its requests through a requests.Session,
+    the shared one by default, so connections are kept alive across calls.
+    """
+
+    def __init__(
+        self,
+        secret_id: str,
+        secret_key: str,
+        session: Optional[requests.Session] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(secret_key=secret_key, secret_id=secret_id, **kwargs)
+        self._session = session or get_http_session()
+
+    def request(
+        self,
+        method: HTTPMethod,
+        endpoint: str,
+        data: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+    ) -> Any:
+        request_meta: Dict[str, Any] = {
+            "url": f"{self.base_url}/{endpoint}",
+            "headers": headers if headers else self._headers,
+            "timeout": self._timeout,
+        }
+        payload = self.data_filter.filter_payload(data)
+
+        if method in (HTTPMethod.GET, HTTPMethod.DELETE):
+            request_meta["params"] = payload
+        elif method in (HTTPMethod.POST, HTTPMethod.PUT):
+            request_meta["data"] = json.dumps(payload)
+        else:
+            raise Exception(f'Method "{method}" is not supported')
+
+        response = self._session.request(method.value, **request_meta)
+        if response.ok:
+            return response.json()
+
+        raise HTTPError(
+            {"response": response.json(), "status": response.status_code},
+            response=response,
+        )
+
+
 class GocardlessClient(BankClient):
-    def __init__(self, nordigen_client: NordigenClient):
+    def __init__(self, nordigen_client: NordigenClient, max_workers: int = 1):
+        """
+        max_workers bounds the threads fetching requisitions and accounts
+        concurrently, with 1 they are fetched sequentially.
+        """
         self._nordigen_client = nordigen_client
+        self._max_workers = max_workers
 
     def set_token(self, token_object: TokenObject) -> None:
         self._nordigen_client.token = token_object.AccessToken
@@ -112,42 +173,69 @@ class GocardlessClient(BankClient):
             payload=requisition.requisition_id,  # that's specific for gocardless
         )
 
-    def _get_transactions_for_requisition(
-        self, requisition_id: str
-    ) -> NordigenTransactions:
+    def _get_account_ids(self, requisition_id: str) -> List[str]:
         LOGGER.info(f"getting transactions for requisition {requisition_id}")
-        accounts = log_wrapper(
+        requisition = log_wrapper(
             self._nordigen_client.requisition.get_requisition_by_id,
             requisition_id=requisition_id,
         )
-
-        if len(accounts["accounts"]) == 0:
-            return EMPTY_NORDIGEN_TRANSACTIONS
-
-        account_ids = accounts["accounts"]
-        accounts = map(
-            lambda account_id: log_wrapper(
-                self._nordigen_client.account_api, id=account_id
-            ),
-            account_ids,
-        )
-        return reduce(
-            concat_nordigen_transactions,
-            map(
-                lambda account: log_wrapper(account.get_transactions)["transactions"],
-                accounts,
-            ),
-            EMPTY_NORDIGEN_TRANSACTIONS,
-        )
-
-    def get_transactions(self, requisition_ids: Iterable[str]) -> NordigenTransactions:
-        return reduce(
-            concat_nordigen_transactions,
-            map(
-                lambda requisition_id: self._get_transactions_for_requisition(
-                    requisition_id
-                ),
-                requisition_ids,
-            ),
-            EMPTY_NORDIGEN_TRANSACTIONS,
+        return cast(List[str], requisition["accounts"])
+
+    def _get_account_transactions(
+        self, account_id: str, date_from: Optional[date] = None
+    ) -> AccountTransactions:
+        account = log_wrapper(self._nordigen_client.account_api, id=account_id)
+        date_range = {} if date_from is None else {"date_from": date_from.isoformat()}
+        return {
+            "accountId": account_id,
+            "transactions": log_wrapper(account.get_transactions, **date_range)[
+                "transactions"
+            ],
+        }
+
+    def get_transactions_per_account(
+        self,
+        requisition_ids: Iterable[str],
+        date_from: Optional[Mapping[str, date]] = None,
+    ) -> List[AccountTransactions]:
+        """
+        Transactions are ordered by requisition and account as given,
+        regardless of which account responds first. Accounts in date_from
+        only get transactions booked from that date on.
+        """
+        dates_from = date_from or {}
+        if self._max_workers == 1:
+            return [
+                self._get_account_transactions(account_id, dates_from.get(account_id))
+                for requisition_id in requisition_ids
+                for account_id in self._get_account_ids(requisition_id)
+            ]
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            requisition_futures = [
+                executor.submit(self._get_account_ids, requisition_id)
+                for requisition_id in requisition_ids
+            ]
+            # accounts are submitted as soon as their requisition resolves
+            account_futures = [
+                executor.submit(
+                    self._get_account_transactions,
+                    account_id,
+                    dates_from.get(account_id),
+                )
+                for requisition_future in requisition_futures
+                for account_id in requisition_future.result()
+            ]
+            return [account_future.result() for account_future in account_futures]
+
+    def get_transactions(
+        self,
+        requisition_ids: Iterable[str],
+        date_from: Optional[Mapping[str, date]] = None,
+    ) -> NordigenTransactions:
+        return collect_nordigen_transactions(
+            account_transactions["transactions"]
+            for account_transactions in self.get_transactions_per_account(
+                requisition_ids, date_from
+            )
         )
@@ -7,6 +7,7 @@ import signal
 import logging
 import requests
 from abc import ABC, abstractmethod
+from ..http_session import get_http_session
 
 LOGGER = logging.getLogger(__name__)
 
@@ -22,6 +23,9 @@ class BankValidationProvider(ABC):
 
 
 class LocalhostValidationProvider(BankValidationProvider):
+    def __init__(self, session: Optional[requests.Session] = None) -> None:
+        self._session = session or get_http_session()
+
     def __enter__(self) -> LocalhostValidationProvider:
         self._web_authorizer_process = subprocess.Popen(
             [
@@ -47,7 +51,7 @@ class LocalhostValidationProvider(BankValidationProvider):
         LOGGER.info("uvicorn server killed")
 
     def is_reference_validated(self, reference_id: str) -> bool:
-        validations = requests.get(
+        validations = self._session.get(
             "http://127.0.0.1:8000/validations/", verify=False
         ).json()
         LOGGER.debug(f"validating reference_id: {reference_id} is in {validations}")
@@ -1,12 +1,91 @@
-from datetime import datetime
+from datetime import date, datetime
+from decimal import Decimal
+from functools import cache
 import dateutil.parser
+import hashlib
+import json
 from dateutil.tz import tzutc
+import sys
 import uuid
-from typing import List, Any, TypedDict, NotRequired
-from ..transaction.definition import SimpleTransaction
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Any,
+    Optional,
+    Tuple,
+    TypedDict,
+    NotRequired,
+    cast,
+)
+from ..transaction.definition import (
+    SimpleTransaction,
+    TransactionRecord,
+    TransactionTable,
+)
 
 
 INVALID_REFERENCES: List[Any] = ["", "-", None, []]
+# (negated number of fields, content hash)
+DedupeKey = Tuple[int, str]
+REFERENCE_TRANSFORMATIONS: Dict[str, Callable[[Any], Any]] = {
+    "creditorName": lambda _: _,
+    "remittanceInformationUnstructured": lambda _: _,
+    "remittanceInformationUnstructuredArray": lambda reference_list: ", ".join(
+        reference_list
+    ),
+    "debtorName": lambda _: _,
+}
+
+# stable fields of transactions without identifiers, hashed into their id
+IDENTITY_FIELDS = [
+    "bookingDate",
+    "bookingDatetime",
+    "valueDate",
+    "valueDateTime",
+    "transactionAmount",
+    "creditorName",
+    "creditorAccount",
+    "debtorName",
+    "debtorAccount",
+    "remittanceInformationUnstructured",
+    "remittanceInformationUnstructuredArray",
+    "remittanceInformationStructured",
+    "remittanceInformationStructuredArray",
+    "bankTransactionCode",
+    "proprietaryBankTransactionCode",
+]
+
+# ISO 4217 minor unit exponents, only currencies not using cents are listed
+DEFAULT_CURRENCY_EXPONENT = 2
+CURRENCY_EXPONENTS: Dict[str, int] = {
+    "BHD": 3,
+    "BIF": 0,
+    "CLP": 0,
+    "DJF": 0,
+    "GNF": 0,
+    "IQD": 3,
+    "ISK": 0,
+    "JOD": 3,
+    "JPY": 0,
+    "KMF": 0,
+    "KRW": 0,
+    "KWD": 3,
+    "LYD": 3,
+    "OMR": 3,
+    "PYG": 0,
+    "RWF": 0,
+    "TND": 3,
+    "UGX": 0,
+    "UYI": 0,
+    "VND": 0,
+    "VUV": 0,
+    "XAF": 0,
+    "XOF": 0,
+    "XPF": 0,
+}
 
 
 class TransactionAmount(TypedDict):
@@ -46,23 +125,113 @@ def concat_nordigen_transactions(
     }
 
 
-def as_simple_transaction(transaction: NordigenTransaction) -> SimpleTransaction:
+def collect_nordigen_transactions(
+    transactions: Iterable[NordigenTransactions],
+) -> NordigenTransactions:
+    """
+    Concatenates transactions into new lists in linear time, unlike folding
+    with concat_nordigen_transactions.
+    """
+    collected_transactions: NordigenTransactions = {"booked": [], "pending": []}
+    for transactions_chunk in transactions:
+        collected_transactions["booked"].extend(transactions_chunk["booked"])
+        collected_transactions["pending"].extend(transactions_chunk["pending"])
+    return collected_transactions
+
+
+def as_simple_transaction(
+    transaction: NordigenTransaction, minor_units: bool = False
+) -> SimpleTransaction:
+    """
+    Adapts a Nordigen transaction, amounts are floats in the currency major unit
+    unless minor_units is set, then they are exact integers (e.g. cents).
+    """
     return {
         "transactionId": get_id(transaction),
         "datetime": get_datetime(transaction),
-        "amount": get_amount(transaction),
+        "amount": (
+            get_amount_in_minor_units(transaction)
+            if minor_units
+            else get_amount(transaction)
+        ),
         "referenceText": get_reference(transaction),
         "bankTransactionCode": get_proprietary_bank_transaction_code(transaction),
     }
 
 
+def as_transaction_record(
+    transaction: NordigenTransaction,
+    minor_units: bool = False,
+    transaction_id: Optional[str] = None,
+) -> TransactionRecord:
+    """
+    Adapts a Nordigen transaction like as_simple_transaction into a compact
+    record, references and bank transaction codes are interned. The id from
+    key_transactions can be given, it defaults to get_id.
+    """
+    return TransactionRecord(
+        transactionId=(
+            get_id(transaction) if transaction_id is None else transaction_id
+        ),
+        datetime=get_datetime(transaction),
+        amount=(
+            get_amount_in_minor_units(transaction)
+            if minor_units
+            else get_amount(transaction)
+        ),
+        referenceText=sys.intern(get_reference(transaction)),
+        bankTransactionCode=sys.intern(
+            get_proprietary_bank_transaction_code(transaction)
+        ),
+    )
+
+
+def as_transaction_table(
+    raw_transactions: Iterable[NordigenTransaction], minor_units: bool = False
+) -> TransactionTable:
+    """
+    Adapts Nordigen transactions in bulk into columns, references and bank
+    transaction codes are interned since they repeat heavily.
+    """
+    table = TransactionTable()
+    get_transaction_amount = get_amount_in_minor_units if minor_units else get_amount
+    for transaction_id, transaction in key_transactions(raw_transactions):
+        table.transaction_ids.append(transaction_id)
+        table.timestamps.append(get_datetime(transaction).timestamp())
+        table.amounts.append(get_transaction_amount(transaction))
+        table.references.append(sys.intern(get_reference(transaction)))
+        table.bank_transaction_codes.append(
+            sys.intern(get_proprietary_bank_transaction_code(transaction))
+        )
+
+    return table
+
+
+def _parse_booking_datetime(booking_datetime: str) -> datetime:
+    try:
+        return datetime.fromisoformat(booking_datetime)
+    except ValueError:
+        return dateutil.parser.isoparse(booking_datetime)
+
+
+@cache  # booking dates repeat heavily across transactions
+def _parse_booking_date(booking_date: str) -> datetime:
+    try:
+        parsed_date = date.fromisoformat(booking_date)
+        return datetime(
+            parsed_date.year, parsed_date.month, parsed_date.day, tzinfo=tzutc()
+        )
+    except ValueError:
+        parsed_datetime = dateutil.parser.parse(booking_date)
+        return parsed_datetime.replace(tzinfo=parsed_datetime.tzinfo or tzutc())
+
+
 def get_datetime(transaction: NordigenTransaction) -> datetime:
     if "bookingDatetime" in transaction:
-        return dateutil.parser.isoparse(transaction["bookingDatetime"])
+        return _parse_booking_datetime(transaction["bookingDatetime"])
 
     if "bookingDate" in transaction:
-        booking_date = dateutil.parser.parse(transaction["bookingDate"])
-        return booking_date.replace(tzinfo=booking_date.tzinfo or tzutc())
+        return _parse_booking_date(transaction["bookingDate"])
 
     raise Exception(f"no sort datetime found! {transaction}")
 
@@ -75,10 +244,62 @@ def get_currency(transaction: NordigenTransaction) -> str:
     return transaction["transactionAmount"]["currency"]
 
 
+def get_currency_exponent(currency: str) -> int:
+    return CURRENCY_EXPONENTS.get(currency.upper(), DEFAULT_CURRENCY_EXPONENT)
+
+
+def get_amount_in_minor_units(transaction: NordigenTransaction) -> int:
+    return to_minor_units(
+        transaction["transactionAmount"]["amount"], get_currency(transaction)
+    )
+
+
+def to_minor_units(amount: Any, currency: str) -> int:
+    # Going through the decimal string keeps "-22.99" from becoming -2298.99...
+    decimal_amount = Decimal(str(amount))
+    minor_units = decimal_amount.scaleb(get_currency_exponent(currency))
+    if minor_units != minor_units.to_integral_value():
+        raise Exception(
+            f"amount has more decimals than its currency! {amount} {currency}"
+        )
+
+    return int(minor_units)
+
+
 def _get_internal_transaction_id(transaction: NordigenTransaction) -> str:
     if "internalTransactionId" in transaction:
         return transaction["internalTransactionId"]
-    return str(uuid.uuid4())
+    return get_identity_hash(transaction)
+
+
+def get_identity_hash(transaction: NordigenTransaction) -> str:
+    """
+    Hashes the fields identifying a booked transaction, fields that may change
+    between fetches of the same transaction, e.g. balanceAfterTransaction or
+    entryReference, are left out.
+    """
+    transaction_fields = cast(Dict[str, Any], transaction)
+    return get_content_hash(
+        cast(
+            NordigenTransaction,
+            {
+                field: transaction_fields[field]
+                for field in IDENTITY_FIELDS
+                if field in transaction_fields
+            },
+        )
+    )
+
+
+def get_content_hash(transaction: NordigenTransaction) -> str:
+    """
+    Hashes the canonical JSON of the raw transaction, so the same booked
+    transaction always hashes the same across fetches and loads.
+    """
+    canonical_transaction = json.dumps(
+        transaction, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(canonical_transaction.encode("utf-8")).hexdigest()
 
 
 def get_id(transaction: NordigenTransaction) -> str:
@@ -95,18 +316,41 @@ def get_id(transaction: NordigenTransaction) -> str:
     return transaction["transactionId"]
 
 
-def get_reference(transaction: NordigenTransaction) -> str:
-    reference_keys = {
-        "creditorName": lambda _: _,
-        "remittanceInformationUnstructured": lambda _: _,
-        "remittanceInformationUnstructuredArray": lambda reference_list: ", ".join(
-            reference_list
-        ),
-        "debtorName": lambda _: _,
-    }
+def key_transactions(
+    transactions: Iterable[NordigenTransaction],
+) -> Iterator[Tuple[str, NordigenTransaction]]:
+    """
+    Pairs transactions with their id. Transactions without identifiers share
+    their id with identical ones, so each repetition within transactions, e.g.
+    two identical payments of one fetch, gets its occurrence number in the id
+    and only copies from different fetches share an id.
+    """
+    occurrences: Dict[str, int] = {}
+    for transaction in transactions:
+        transaction_id = get_id(transaction)
+        if "transactionId" in transaction or "internalTransactionId" in transaction:
+            yield transaction_id, transaction
+            continue
+
+        occurrence = occurrences.get(transaction_id, 0)
+        occurrences[transaction_id] = occurrence + 1
+        if occurrence > 0:
+            transaction_id = str(uuid.uuid5(uuid.UUID(transaction_id), str(occurrence)))
+        yield transaction_id, transaction
+
+
+def get_dedupe_key(transaction: NordigenTransaction) -> DedupeKey:
+    """
+    Ranks transactions sharing an id, the smallest key is kept when deduping:
+    transactions with more fields first, then by content hash, which does not
+    depend on the order of the fields.
+    """
+    return -len(transaction), get_content_hash(transaction)
+
 
+def get_reference(transaction: NordigenTransaction) -> str:
     transaction_references = set()
-    for reference_key, transformation in reference_keys.items():
+    for reference_key, transformation in REFERENCE_TRANSFORMATIONS.items():
         if reference_key in transaction:
             reference_value = transformation(transaction[reference_key])  # type: ignore
             if reference_value not in INVALID_REFERENCES:
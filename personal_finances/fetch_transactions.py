@@ -2,7 +2,24 @@ from personal_finances.bank_interface.bank_auth_handler import (
     BankAuthorizationHandler,
     NordigenAuth,
 )
+from personal_finances.bank_interface.account_watermarks import (
+    DEFAULT_OVERLAP_DAYS,
+    get_dates_from,
+    load_account_watermarks,
+    save_account_watermarks,
+    update_account_watermarks,
+)
 from personal_finances.bank_interface.bank_client import BankDetails
+from personal_finances.bank_interface.nordigen_adapter import (
+    collect_nordigen_transactions,
+)
+from personal_finances.http_session import configure_http_session
+from personal_finances.file_helper import (
+    COMPRESSION_CHOICES,
+    CompressionProfile,
+    get_compression_suffix,
+    open_text,
+)
 import logging
 from typing import Tuple
 from datetime import datetime
@@ -24,13 +41,49 @@ def _ensure_data_path_exist() -> None:
 
 
 @click.command()
-def fetch_transactions() -> None:
+@click.option(
+    "-c",
+    "--compression",
+    type=click.Choice(COMPRESSION_CHOICES),
+    default="none",
+    help="Compression of the transactions file written.",
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of threads fetching requisitions and accounts concurrently, "
+    + "as well as HTTP connections kept alive per host.",
+)
+@click.option(
+    "-i",
+    "--incremental",
+    is_flag=True,
+    default=False,
+    help="Only fetches transactions booked since the last booked date "
+    + "of each account, minus the overlap days.",
+)
+@click.option(
+    "-od",
+    "--overlap-days",
+    type=click.IntRange(min=0),
+    default=DEFAULT_OVERLAP_DAYS,
+    help="Days before the last booked date of each account fetched again "
+    + "with --incremental.",
+)
+def fetch_transactions(
+    compression: str, workers: int, incremental: bool, overlap_days: int
+) -> None:
     """
     Authenticates Nordigen API to pre-configured banks,
     gets transactions and saves into 'data' folder.
+    The last booked date of each account is kept in
+    'data/account_watermarks.json'.
     """
     _ensure_data_path_exist()
     secret_id, secret_key = _read_secrets()
+    configure_http_session(pool_size=workers)
     auth_handler = BankAuthorizationHandler(
         auth=NordigenAuth(secret_id, secret_key),
         bank_details=[
@@ -38,13 +91,24 @@ def fetch_transactions() -> None:
             BankDetails(name="N26", country="DE"),
             BankDetails(name="Allied Irish Banks", country="IE"),
         ],
+        max_workers=workers,
     )
+    watermarks = load_account_watermarks()
 
-    with open(
-        f"data/transactions-{datetime.now().isoformat()}.json", "w"
+    with open_text(
+        f"data/transactions-{datetime.now().isoformat()}.json"
+        + get_compression_suffix(compression),
+        "w",
+        CompressionProfile.Archive,
     ) as output_file:
-        transactions = auth_handler.gocardless_client.get_transactions(
-            map(lambda url: url.payload, auth_handler.auth_urls)
+        account_transactions = (
+            auth_handler.gocardless_client.get_transactions_per_account(
+                map(lambda url: url.payload, auth_handler.auth_urls),
+                get_dates_from(watermarks, overlap_days) if incremental else None,
+            )
+        )
+        transactions = collect_nordigen_transactions(
+            transactions["transactions"] for transactions in account_transactions
         )
         output_file.write(json.dumps(transactions, indent=4))
         LOGGER.info(
@@ -53,6 +117,7 @@ def fetch_transactions() -> None:
             transactions were written
             """
         )
+    save_account_watermarks(update_account_watermarks(watermarks, account_transactions))
 
 
 if __name__ == "__main__":
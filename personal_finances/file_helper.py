@@ -1,6 +1,35 @@
 import os
+import gzip
+import io
 import json
-from typing import Any, Callable, Optional
+import lzma
+from enum import Enum
+from typing import Any, Callable, Dict, Iterator, Optional, TextIO, cast
+
+try:
+    import orjson
+except ImportError:  # optional, only speeds up compact serialization
+    orjson = None  # type: ignore
+
+
+JSON_READ_CHUNK_SIZE = 64 * 1024
+JSON_WHITESPACE = " \t\n\r"
+JSON_VALUE_DELIMITERS = JSON_WHITESPACE + ",:]}"
+COMPRESSION_CHOICES = ["none", "gz", "xz"]
+
+
+class CompressionProfile(Enum):
+    # written once and kept, e.g. raw fetch dumps
+    Archive = "Archive"
+    # produced again on every run, e.g. merged transactions, favouring speed
+    Working = "Working"
+
+
+# gzip compresslevel and xz preset per profile
+COMPRESSION_LEVELS: Dict[CompressionProfile, Dict[str, int]] = {
+    CompressionProfile.Archive: {".gz": 9, ".xz": 6},
+    CompressionProfile.Working: {".gz": 1, ".xz": 0},
+}
 
 
 def create_dirs(path: str) -> None:
@@ -12,12 +41,127 @@ def create_dirs(path: str) -> None:
             pass
 
 
+class JsonFormat(Enum):
+    # indented, for files read by people
+    Pretty = "Pretty"
+    # without whitespace, for files read by other commands
+    Compact = "Compact"
+
+
+def dump_json(
+    content: Any,
+    json_format: JsonFormat = JsonFormat.Pretty,
+    json_converter: Optional[Callable] = str,
+) -> str:
+    """
+    Serializes content, compact output uses orjson when it is installed.
+    Datetimes are passed to json_converter with both backends, orjson would
+    otherwise serialize them natively and differently from e.g. str.
+    """
+    if json_format == JsonFormat.Pretty:
+        return json.dumps(content, indent=4, default=json_converter)
+
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=json_converter,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        ).decode("utf-8")
+
+    return json.dumps(content, separators=(",", ":"), default=json_converter)
+
+
+def get_compression_suffix(compression: str) -> str:
+    return "" if compression == "none" else f".{compression}"
+
+
+def open_text(
+    path: str,
+    mode: str = "r",
+    compression_profile: CompressionProfile = CompressionProfile.Archive,
+) -> TextIO:
+    """
+    Opens a text file, transparently (de)compressing paths ending with .gz
+    or .xz, reads decompress as a stream.
+    """
+    if path.endswith(".gz"):
+        return cast(
+            TextIO,
+            gzip.open(
+                path,
+                f"{mode}t",
+                compresslevel=COMPRESSION_LEVELS[compression_profile][".gz"],
+                encoding="utf-8",
+            ),
+        )
+    if path.endswith(".xz"):
+        return cast(
+            TextIO,
+            lzma.open(
+                path,
+                f"{mode}t",
+                preset=(
+                    COMPRESSION_LEVELS[compression_profile][".xz"]
+                    if "w" in mode
+                    else None
+                ),
+                encoding="utf-8",
+            ),
+        )
+    return cast(TextIO, io.open(path, mode))
+
+
 def write_json(
-    path: str, content: Any, json_converter: Optional[Callable] = str
+    path: str,
+    content: Any,
+    json_converter: Optional[Callable] = str,
+    compression_profile: CompressionProfile = CompressionProfile.Archive,
+    json_format: JsonFormat = JsonFormat.Pretty,
+    atomic: bool = False,
 ) -> None:
+    """
+    When atomic, the content is written to a temporary file next to path
+    and moved into place, so readers never see a partially written file.
+    """
     create_dirs(path)
-    with open(path, "w") as o_file:
-        o_file.write(json.dumps(content, indent=4, default=json_converter))
+    if not atomic:
+        with open_text(path, "w", compression_profile) as o_file:
+            o_file.write(dump_json(content, json_format, json_converter))
+        return
+
+    temporary_path = get_temporary_path(path)
+    try:
+        with open_text(temporary_path, "w", compression_profile) as o_file:
+            o_file.write(dump_json(content, json_format, json_converter))
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+
+def get_temporary_path(path: str) -> str:
+    # keeps the file name as suffix so open_text picks the same compression
+    directory, file_name = os.path.split(path)
+    return os.path.join(directory, f".tmp-{os.getpid()}-{file_name}")
+
+
+def link_file(target_path: str, link_path: str) -> None:
+    """
+    Atomically points link_path at target_path, with a relative symbolic link
+    or a hard link where symbolic links are not supported.
+    """
+    temporary_path = get_temporary_path(link_path)
+    if os.path.lexists(temporary_path):
+        os.remove(temporary_path)
+    try:
+        os.symlink(
+            os.path.relpath(target_path, os.path.dirname(link_path) or "."),
+            temporary_path,
+        )
+    except OSError:
+        os.link(target_path, temporary_path)
+    os.replace(temporary_path, link_path)
 
 
 def write_string(
@@ -28,3 +172,113 @@ def write_string(
         previous_content = o_file.read()
         o_file.write(content)
         return previous_content
+
+
+class _JsonStream:
+    """
+    Sliding window over a JSON text file, values are decoded one at a time
+    and only the undecoded remainder of the file is kept in memory.
+    """
+
+    def __init__(self, file: TextIO, chunk_size: int) -> None:
+        self._file = file
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._position = 0
+        self._eof = False
+
+    def _read_chunk(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        if chunk == "":
+            self._eof = True
+            return False
+        remainder_start = self._position
+        self._buffer = self._buffer[remainder_start:] + chunk
+        self._position = 0
+        return True
+
+    def error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buffer, self._position)
+
+    def peek(self) -> str:
+        """Returns the next non whitespace character, empty at the end."""
+        while True:
+            while (
+                self._position < len(self._buffer)
+                and self._buffer[self._position] in JSON_WHITESPACE
+            ):
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._read_chunk():
+                return ""
+
+    def expect(self, character: str) -> None:
+        if self.peek() != character:
+            raise self.error(f"Expecting '{character}'")
+        self._position += 1
+
+    def decode(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+                # a number cut by the window end, e.g. "1." of "1.5", decodes
+                # as a shorter number, it is complete once a delimiter follows
+                if self._eof or (
+                    end < len(self._buffer)
+                    and self._buffer[end] in JSON_VALUE_DELIMITERS
+                ):
+                    self._position = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._read_chunk()
+
+    def iter_array(self) -> Iterator[Any]:
+        self.expect("[")
+        if self.peek() == "]":
+            self._position += 1
+            return
+        while True:
+            yield self.decode()
+            if self.peek() == "]":
+                self._position += 1
+                return
+            self.expect(",")
+
+
+def iter_json_array(
+    file: TextIO, key: Optional[str] = None, chunk_size: int = JSON_READ_CHUNK_SIZE
+) -> Iterator[Any]:
+    """
+    Streams the items of a JSON array without loading the whole file, either
+    a top level array or, given a key, the array under that key of a top
+    level object. Other values of the object are decoded and discarded.
+    Decoding item by item is slower than json.loads, callers collecting every
+    item in a list only save holding the whole text in memory.
+    """
+    stream = _JsonStream(file, chunk_size)
+    if key is None:
+        yield from stream.iter_array()
+        return
+
+    stream.expect("{")
+    if stream.peek() == "}":
+        raise KeyError(key)
+    while True:
+        if stream.peek() != '"':
+            raise stream.error("Expecting property name enclosed in double quotes")
+        object_key = stream.decode()
+        stream.expect(":")
+        if object_key == key:
+            yield from stream.iter_array()
+            return
+        stream.decode()
+        if stream.peek() == "}":
+            raise KeyError(key)
+        stream.expect(",")
@@ -1,29 +1,57 @@
 import json
 import pytz
-from datetime import datetime
-from personal_finances.bank_interface.nordigen_adapter import as_simple_transaction
+from datetime import datetime, timedelta
+from personal_finances.bank_interface.nordigen_adapter import (
+    NordigenTransaction,
+    as_transaction_record,
+    key_transactions,
+)
 from personal_finances.transaction.grouping import (
     group_transactions,
     TransactionGroupingType,
     GroupedTransaction,
+    GroupMetadata,
+)
+from personal_finances.transaction.cleaning import (
+    get_internal_transfer_window,
+    internal_transfer_window_filter,
+    remove_internal_transfers,
 )
-from personal_finances.transaction.cleaning import remove_internal_transfers
 from personal_finances.transaction.filtering import transaction_datetime_filter
-from personal_finances.transaction.processing import sum_amount_by, sum_amount
-from personal_finances.transaction.type import (
-    get_expense_transactions,
-    get_income_transactions,
-    get_unknown_type_transactions,
+from personal_finances.transaction.processing import (
+    AmountCube,
+    PivotDimension,
+    get_zero_amount,
+    pivot_amount,
+)
+from personal_finances.transaction.rollup import (
+    RollupDimension,
+    RollupVersionMismatch,
+    TransactionRollup,
+    get_day_range,
+)
+from personal_finances.transaction.type import TransactionType, partition_by_type
+from personal_finances.transaction.definition import (
+    SimpleTransaction,
+    TransactionRecord,
+    extend_transaction,
 )
-from personal_finances.transaction.definition import SimpleTransaction
 from personal_finances.transaction.categorizing import get_category
-from personal_finances.file_helper import write_json
-from personal_finances.config import cache_user_configuration
-from typing import List, Tuple, Callable, Any, Union, cast
+from personal_finances.file_helper import (
+    JsonFormat,
+    iter_json_array,
+    open_text,
+    write_json,
+)
+from personal_finances.config import cache_user_configuration, get_user_configuration
+from personal_finances.transaction_snapshot import TransactionSnapshot
+from personal_finances.transaction_store import TransactionStore
+from typing import Dict, Iterable, List, Optional, Tuple, Callable, Any, Union, cast
 from functools import partial
 import dateutil.parser
 import click
 import logging
+import os
 
 
 LOGGER = logging.getLogger(__name__)
@@ -39,79 +67,112 @@ class InvalidDatetimeRange(Exception):
     pass
 
 
+class RollupAmountUnitMismatch(Exception):
+    pass
+
+
+class RollupReportsUnavailable(Exception):
+    pass
+
+
 class CategorizedTransaction(GroupedTransaction):
     customCategory: str
 
 
+CategorizedTransactions = Tuple[List[CategorizedTransaction], List[GroupMetadata]]
+
+
 def _add_group_category_field(
-    transactions: List[SimpleTransaction],
-) -> List[CategorizedTransaction]:
-    grouped_transactions, group_references = group_transactions(
-        transactions, TransactionGroupingType.ReferenceSimilarity
+    transactions: List[SimpleTransaction], zero_amount: float
+) -> CategorizedTransactions:
+    grouped_transactions, group_references, group_table = group_transactions(
+        transactions, TransactionGroupingType.ReferenceSimilarity, zero_amount
     )
-    return list(
+    categorized_transactions = list(
         map(
             lambda transaction: cast(
                 CategorizedTransaction,
-                {
-                    **transaction,
-                    "customCategory": get_category(
+                extend_transaction(
+                    transaction,
+                    customCategory=get_category(
                         transaction["referenceText"],
                         group_references[transaction["groupNumber"]],
                         fallback_reference=transaction["groupName"],
                     ),
-                },
+                ),
             ),
             grouped_transactions,
         )
     )
+    return categorized_transactions, group_table
 
 
 def _split_by_type(transactions: List[SimpleTransaction]) -> Tuple[List, List]:
-    income_transactions = get_income_transactions(transactions)
+    (
+        income_transactions,
+        expense_transactions,
+        unknown_type_transactions,
+    ) = partition_by_type(transactions)
 
     # Treating unknown as expenses
-    expense_transactions = get_expense_transactions(
-        transactions
-    ) + get_unknown_type_transactions(transactions)
+    return income_transactions, expense_transactions + unknown_type_transactions
 
-    return income_transactions, expense_transactions
+
+def _pivot_by_category(
+    transactions: List[CategorizedTransaction], zero_amount: float
+) -> AmountCube:
+    return pivot_amount(
+        cast(List[SimpleTransaction], transactions),
+        [PivotDimension.Category],
+        zero_amount,
+    )
+
+
+def _get_amount_per_group(group_table: List[GroupMetadata]) -> List[Dict]:
+    return sorted(
+        (
+            {
+                "key": group_metadata["groupNumber"],
+                "amount": group_metadata["amount"],
+                "references": group_metadata["references"],
+                "groupName": group_metadata["groupName"],
+            }
+            for group_metadata in group_table
+        ),
+        key=lambda entry: entry["amount"],
+    )
+
+
+def _to_json(content: Any) -> Any:
+    if isinstance(content, TransactionRecord):
+        return content.as_dict()
+    return content.isoformat()
 
 
 def _write_category_amounts(
-    transactions: List[CategorizedTransaction], file_prefix: str
+    categorized_transactions: CategorizedTransactions,
+    amount_cube: AmountCube,
+    file_prefix: str,
+    summary_only: bool = False,
 ) -> None:
-    amount_per_group = sum_amount_by(
-        transactions,
-        key=lambda transaction: cast(CategorizedTransaction, transaction)[
-            "groupNumber"
-        ],
-        extra_key_context=lambda group_number: {
-            "groupName": next(
-                transaction["groupName"]
-                for transaction in transactions
-                if transaction["groupNumber"] == group_number
-            )
-        },
-    )
-    amount_per_category = sum_amount_by(
-        transactions,
-        key=lambda transaction: cast(CategorizedTransaction, transaction)[
-            "customCategory"
-        ],
-    )
-    group_file_path = f"{file_prefix}_per_group.json"
+    amount_per_category = amount_cube.amount_by(PivotDimension.Category)
     category_file_path = f"{file_prefix}_per_category.json"
+    write_json(category_file_path, amount_per_category)
+    LOGGER.info(f"category amounts report written to: {category_file_path}")
+    if summary_only:
+        return
+
+    transactions, group_table = categorized_transactions
+    amount_per_group = _get_amount_per_group(group_table)
+    group_file_path = f"{file_prefix}_per_group.json"
     categorized_transactions_file_path = f"{file_prefix}_categorized_transactions.json"
     write_json(group_file_path, amount_per_group)
-    write_json(category_file_path, amount_per_category)
     write_json(
         categorized_transactions_file_path,
         transactions,
-        json_converter=lambda dt_obj: dt_obj.isoformat(),
+        json_converter=_to_json,
     )
     LOGGER.info(f"group amounts report written to: {group_file_path}")
-    LOGGER.info(f"category amounts report written to: {category_file_path}")
 
 
 def _write_balance(
@@ -144,13 +205,18 @@ def _apply_processor(
 
 
 def _process_transactions(
-    transactions: List[SimpleTransaction], start_time: datetime, end_time: datetime
-) -> Tuple[List[CategorizedTransaction], List[CategorizedTransaction]]:
+    transactions: List[SimpleTransaction],
+    start_time: datetime,
+    end_time: datetime,
+    zero_amount: float,
+) -> Tuple[CategorizedTransactions, CategorizedTransactions]:
     processors: List[Callable] = [
+        # narrows the history before the quadratic internal transfer removal
+        partial(internal_transfer_window_filter, start_time, end_time),
         remove_internal_transfers,
         partial(transaction_datetime_filter, start_time, end_time),
         _split_by_type,
-        _add_group_category_field,
+        partial(_add_group_category_field, zero_amount=zero_amount),
     ]
 
     processed_transactions: ProcessorDataType = transactions
@@ -158,20 +224,26 @@ def _process_transactions(
         processed_transactions = _apply_processor(processor, processed_transactions)
 
     # from _split_by_type return order
-    income_transactions = processed_transactions[0]
-    expense_transactions = processed_transactions[1]
-    return income_transactions, expense_transactions
+    categorized_income = processed_transactions[0]
+    categorized_expense = processed_transactions[1]
+    return categorized_income, categorized_expense
 
 
 def _write_reports(
-    transactions: List[SimpleTransaction], start_time: datetime, end_time: datetime
+    transactions: List[SimpleTransaction],
+    start_time: datetime,
+    end_time: datetime,
+    zero_amount: float,
+    summary_only: bool = False,
 ) -> None:
     (
-        income_transactions,
-        expense_transactions,
-    ) = _process_transactions(transactions, start_time, end_time)
-    total_income = sum_amount(income_transactions)
-    total_expense = sum_amount(expense_transactions)
+        categorized_income,
+        categorized_expense,
+    ) = _process_transactions(transactions, start_time, end_time, zero_amount)
+    income_cube = _pivot_by_category(categorized_income[0], zero_amount)
+    expense_cube = _pivot_by_category(categorized_expense[0], zero_amount)
+    total_income = income_cube.total()
+    total_expense = expense_cube.total()
     time_range = f"{start_time.isoformat()}_{end_time.isoformat()}"
 
     _write_balance(
@@ -181,8 +253,180 @@ def _write_reports(
         end_time=end_time,
         file_prefix=f"reports/{time_range}/",
     )
-    _write_category_amounts(income_transactions, f"reports/{time_range}/income")
-    _write_category_amounts(expense_transactions, f"reports/{time_range}/expense")
+    _write_category_amounts(
+        categorized_income, income_cube, f"reports/{time_range}/income", summary_only
+    )
+    _write_category_amounts(
+        categorized_expense,
+        expense_cube,
+        f"reports/{time_range}/expense",
+        summary_only,
+    )
+
+
+def _load_rollup(rollup_file_path: str, minor_units: bool) -> TransactionRollup:
+    if not os.path.exists(rollup_file_path):
+        LOGGER.info(f"no rollup found at {rollup_file_path}, building a new one")
+        return TransactionRollup(minor_units=minor_units)
+
+    with open(rollup_file_path, "r") as rollup_file:
+        try:
+            rollup = TransactionRollup.from_dict(json.loads(rollup_file.read()))
+        except RollupVersionMismatch as e:
+            LOGGER.info(f"rebuilding rollup {rollup_file_path}: {e}")
+            return TransactionRollup(minor_units=minor_units)
+
+    if rollup.minor_units != minor_units:
+        raise RollupAmountUnitMismatch(
+            f"rollup {rollup_file_path} minor units is {rollup.minor_units}"
+        )
+    return rollup
+
+
+def _update_rollup(
+    rollup: TransactionRollup, transactions: List[SimpleTransaction]
+) -> TransactionRollup:
+    """
+    Folds transactions not processed yet into the rollup. Internal transfers
+    are only paired again within the internal transfer window around the new
+    transactions, transactions of the window rolled up before and now paired
+    are taken out, the ones no longer paired are added back. Groups and
+    categories are assigned among the transactions added by each update and
+    are not revised afterwards.
+    """
+    new_transactions = rollup.get_unprocessed(transactions)
+    if len(new_transactions) == 0:
+        LOGGER.info("rollup is up to date")
+        return rollup
+
+    LOGGER.info(f"adding {len(new_transactions)} transactions to the rollup")
+    datetimes = [transaction["datetime"] for transaction in new_transactions]
+    window_transactions = internal_transfer_window_filter(
+        min(datetimes), max(datetimes), transactions
+    )
+    kept_transactions = remove_internal_transfers(window_transactions)
+    kept_ids = {transaction["transactionId"] for transaction in kept_transactions}
+    rollup.remove(
+        transaction
+        for transaction in window_transactions
+        if transaction["transactionId"] not in kept_ids
+    )
+
+    income_transactions, expense_transactions = _split_by_type(
+        rollup.get_not_rolled_up(kept_transactions)
+    )
+    for type_transactions, transaction_type in [
+        (income_transactions, TransactionType.INCOME),
+        (expense_transactions, TransactionType.EXPENSE),
+    ]:
+        categorized_transactions, _ = _add_group_category_field(
+            type_transactions, rollup.zero_amount
+        )
+        rollup.add(
+            cast(List[SimpleTransaction], categorized_transactions), transaction_type
+        )
+    return rollup
+
+
+def _write_rollup_reports(
+    rollup: TransactionRollup, start_time: datetime, end_time: datetime
+) -> None:
+    time_range = f"{start_time.isoformat()}_{end_time.isoformat()}"
+    _write_balance(
+        total_income=rollup.total(start_time, end_time, TransactionType.INCOME),
+        total_expense=rollup.total(start_time, end_time, TransactionType.EXPENSE),
+        start_time=start_time,
+        end_time=end_time,
+        file_prefix=f"reports/{time_range}/",
+    )
+    for transaction_type, file_prefix in [
+        (TransactionType.INCOME, f"reports/{time_range}/income"),
+        (TransactionType.EXPENSE, f"reports/{time_range}/expense"),
+    ]:
+        category_file_path = f"{file_prefix}_per_category.json"
+        write_json(
+            category_file_path,
+            rollup.amount_by(
+                RollupDimension.Category, start_time, end_time, transaction_type
+            ),
+        )
+        LOGGER.info(f"category amounts report written to: {category_file_path}")
+
+
+def _as_transaction_records(
+    raw_transactions: Iterable[NordigenTransaction], minor_units: bool
+) -> List[SimpleTransaction]:
+    return cast(
+        List[SimpleTransaction],
+        [
+            as_transaction_record(transaction, minor_units, transaction_id)
+            for transaction_id, transaction in key_transactions(raw_transactions)
+        ],
+    )
+
+
+def _load_transactions_in_window(
+    read_between: Callable[[datetime, datetime], List[SimpleTransaction]],
+    start_time: datetime,
+    end_time: datetime,
+) -> List[SimpleTransaction]:
+    """
+    Reads transactions in range, widening the range until it covers the
+    internal transfer window, see get_internal_transfer_window.
+    """
+    processing_time = timedelta(days=get_user_configuration().BankProcessingTimeInDays)
+    load_start, load_end = start_time - processing_time, end_time + processing_time
+    while True:
+        transactions = read_between(load_start, load_end)
+        window_start, window_end = get_internal_transfer_window(
+            transactions, start_time, end_time
+        )
+        # unread transactions are then too far to chain to the window
+        if (
+            window_start - load_start >= processing_time
+            and load_end - window_end >= processing_time
+        ):
+            return transactions
+
+        LOGGER.info(f"widening read range to {window_start} - {window_end}")
+        load_start = min(load_start, window_start - processing_time)
+        load_end = max(load_end, window_end + processing_time)
+
+
+def _load_transactions(
+    transactions_file_path: str,
+    store_path: Optional[str],
+    snapshot_path: Optional[str],
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    minor_units: bool,
+) -> List[SimpleTransaction]:
+    """
+    Loads transactions from the snapshot, the store or the transactions file,
+    snapshots and stores only read the range when start and end are given.
+    """
+    if snapshot_path is not None:
+        snapshot = TransactionSnapshot(snapshot_path)
+        if start_time is None or end_time is None:
+            return snapshot.all(minor_units)
+        return _load_transactions_in_window(
+            partial(snapshot.between, minor_units=minor_units), start_time, end_time
+        )
+
+    if store_path is not None:
+        with TransactionStore(store_path) as store:
+            if start_time is None or end_time is None:
+                return _as_transaction_records(store.iter_all(), minor_units)
+            return _load_transactions_in_window(
+                lambda start, end: _as_transaction_records(
+                    store.iter_between(start, end), minor_units
+                ),
+                start_time,
+                end_time,
+            )
+
+    with open_text(transactions_file_path, "r") as transactions_file:
+        return _as_transaction_records(iter_json_array(transactions_file), minor_units)
 
 
 @click.command()
@@ -202,7 +446,8 @@ def _write_reports(
     "-tfp",
     "--transactions-file-path",
     default="data/merged_transactions_latest.json",
-    help="File path of transactions fetched previously.",
+    help="File path of transactions fetched previously, "
+    + "files ending with .gz or .xz are decompressed.",
 )
 @click.option(
     "-ucfp",
@@ -210,11 +455,54 @@ def _write_reports(
     default="config/user_config.yaml",
     help="File path of user configuration.",
 )
+@click.option(
+    "-mu",
+    "--minor-units",
+    is_flag=True,
+    default=False,
+    help="Processes amounts as exact integer minor units (e.g. cents), "
+    + "report amounts are written in minor units as well.",
+)
+@click.option(
+    "-rfp",
+    "--rollup-file-path",
+    default=None,
+    help="File path of the transactions rollup, new transactions are added to its "
+    + "daily buckets, balance and category reports are then summed from the UTC "
+    + "days in [start time, end time), requires --summary-only.",
+)
+@click.option(
+    "-so",
+    "--summary-only",
+    is_flag=True,
+    default=False,
+    help="Only writes the balance and per category reports.",
+)
+@click.option(
+    "-sp",
+    "--store-path",
+    default=None,
+    help="File path of a SQLite transaction store to read transactions from "
+    + "instead of the transactions file, only the requested range is read.",
+)
+@click.option(
+    "-ssp",
+    "--snapshot-path",
+    default=None,
+    help="Directory of a binary transactions snapshot written by "
+    + "merge_transactions to read transactions from, it takes precedence over "
+    + "the store and the transactions file.",
+)
 def generate_reports(
     start_time: str,
     end_time: str,
     transactions_file_path: str,
     user_config_file_path: str,
+    minor_units: bool,
+    rollup_file_path: Optional[str],
+    summary_only: bool,
+    store_path: Optional[str],
+    snapshot_path: Optional[str],
 ) -> None:
     """Generates reports from transactions according to the time filter specified."""
     try:
@@ -236,20 +524,40 @@ def generate_reports(
             f"invalid input: start time {start_time} greater than end_time {end_time}"
         )
 
-    cache_user_configuration(user_config_file_path)
-    with open(transactions_file_path, "r") as transactions_file:
-        transactions: List[SimpleTransaction] = list(
-            map(
-                as_simple_transaction,
-                json.loads(transactions_file.read()),
-            )
+    if rollup_file_path is not None and not summary_only:
+        raise RollupReportsUnavailable(
+            "rollups only sum amounts, group and categorized transaction reports "
+            + "cannot be generated from them, pass --summary-only"
         )
+    if rollup_file_path is not None:
+        get_day_range(start_datetime, end_datetime)
 
-    _write_reports(
-        transactions,
-        start_datetime,
-        end_datetime,
+    cache_user_configuration(user_config_file_path)
+    # rollups look for new transactions in any range
+    read_range = rollup_file_path is None
+    transactions = _load_transactions(
+        transactions_file_path,
+        store_path,
+        snapshot_path,
+        start_datetime if read_range else None,
+        end_datetime if read_range else None,
+        minor_units,
     )
+
+    if rollup_file_path is None:
+        _write_reports(
+            transactions,
+            start_datetime,
+            end_datetime,
+            get_zero_amount(minor_units),
+            summary_only,
+        )
+    else:
+        rollup = _update_rollup(
+            _load_rollup(rollup_file_path, minor_units), transactions
+        )
+        write_json(rollup_file_path, rollup.as_dict(), json_format=JsonFormat.Compact)
+        _write_rollup_reports(rollup, start_datetime, end_datetime)
     LOGGER.info("finished reports")
 
 
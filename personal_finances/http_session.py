@@ -0,0 +1,48 @@
+from typing import Optional
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+
+
+LOGGER = logging.getLogger(__name__)
+DEFAULT_POOL_SIZE = 10
+
+HTTP_SESSION: Optional[requests.Session] = None
+
+
+def create_http_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """
+    Session keeping up to pool_size connections alive per host,
+    it should match the number of threads sharing the session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def configure_http_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """
+    Replaces the shared session, closing the connections of the previous one.
+    """
+    global HTTP_SESSION
+
+    if HTTP_SESSION is not None:
+        HTTP_SESSION.close()
+    LOGGER.info(f"http session configured with a pool of {pool_size} connections")
+    HTTP_SESSION = create_http_session(pool_size)
+    return HTTP_SESSION
+
+
+def get_http_session() -> requests.Session:
+    """
+    Returns the shared session, configured with the default pool size
+    unless `configure_http_session` was called before.
+    """
+    global HTTP_SESSION
+
+    if HTTP_SESSION is None:
+        HTTP_SESSION = create_http_session()
+
+    return HTTP_SESSION
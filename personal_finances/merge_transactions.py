@@ -1,51 +1,222 @@
 import click
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
 import logging
 import os
 import re
-from typing import List
+from typing import Dict, Iterable, List, Optional, Tuple, TypedDict
 import json
-from collections import defaultdict
-from personal_finances.file_helper import write_json
-from .bank_interface.nordigen_adapter import NordigenTransaction, get_id
+from personal_finances.file_helper import (
+    COMPRESSION_CHOICES,
+    CompressionProfile,
+    JsonFormat,
+    get_compression_suffix,
+    iter_json_array,
+    link_file,
+    open_text,
+    write_json,
+)
+from .transaction_snapshot import write_snapshot
+from .transaction_store import KeyedTransaction, TransactionStore
+from .bank_interface.nordigen_adapter import (
+    DedupeKey,
+    NordigenTransaction,
+    get_dedupe_key,
+    key_transactions,
+)
 from datetime import datetime
 
 LOGGER = logging.getLogger(__name__)
+MERGED_TRANSACTIONS_PATH = "data/merged_transactions_latest.json"
+MANIFEST_PATH = "data/merged_transactions_manifest.json"
 
 
-def _get_deduped_transaction(
-    dupe_transactions: List[NordigenTransaction],
-) -> NordigenTransaction:
-    if len(dupe_transactions) == 1:
-        return dupe_transactions[0]
+class IngestedFile(TypedDict):
+    path: str
+    size: int
+    mtime: float
+    sha256: str
 
-    LOGGER.info(f"deduping: {dupe_transactions}")
-    return sorted(
-        dupe_transactions,
-        key=lambda dupe_transaction: str(dupe_transaction.keys())
-        + str(dupe_transaction.values()),
-    )[0]
+
+class Manifest(TypedDict):
+    # files folded into the merged transactions at that path
+    mergedTransactionsPath: str
+    ingestedFiles: List[IngestedFile]
 
 
 def dedupe_transactions(
-    transactions: List[NordigenTransaction],
+    transactions: Iterable[NordigenTransaction],
 ) -> List[NordigenTransaction]:
-    transactions_by_id = defaultdict(list)
-    for transaction in transactions:
-        transactions_by_id[get_id(transaction)].append(transaction)
+    return dedupe_keyed_transactions(key_transactions(transactions))
+
+
+def dedupe_keyed_transactions(
+    keyed_transactions: Iterable[KeyedTransaction],
+) -> List[NordigenTransaction]:
+    """
+    Keeps one transaction per id in order of first appearance, streaming
+    through the transactions and only holding the current winner of each id.
+    Dedupe keys are computed once per transaction and only for duplicates.
+    """
+    winners: Dict[str, Tuple[Optional[DedupeKey], NordigenTransaction]] = {}
+    for transaction_id, transaction in keyed_transactions:
+        if transaction_id not in winners:
+            winners[transaction_id] = (None, transaction)
+            continue
+
+        winner_key, winner = winners[transaction_id]
+        if winner_key is None:
+            winner_key = get_dedupe_key(winner)
+        transaction_key = get_dedupe_key(transaction)
+        LOGGER.info(f"deduping: {winner} {transaction}")
+        winners[transaction_id] = (
+            (transaction_key, transaction)
+            if transaction_key < winner_key
+            else (winner_key, winner)
+        )
+
+    return [winner for _, winner in winners.values()]
+
 
-    deduped_transactions = []
-    for id, dupe_transactions in transactions_by_id.items():
-        deduped_transactions.append(_get_deduped_transaction(dupe_transactions))
+def _read_keyed_transactions(transaction_file_path: str) -> List[KeyedTransaction]:
+    """
+    Decodes the booked transactions of a file keyed by their id, runs on
+    worker processes when merging in parallel.
+    """
+    LOGGER.info(f"opening {transaction_file_path}")
+    with open_text(transaction_file_path, "r") as t_file:
+        # ignoring "pending", some of them have no way to ID+dedupe
+        return list(key_transactions(iter_json_array(t_file, key="booked")))
+
+
+def _read_all_keyed_transactions(
+    transaction_file_paths: List[str], workers: int
+) -> List[KeyedTransaction]:
+    keyed_transactions: List[KeyedTransaction] = []
+    if workers == 1:
+        for transaction_file_path in transaction_file_paths:
+            keyed_transactions.extend(_read_keyed_transactions(transaction_file_path))
+        return keyed_transactions
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for file_keyed_transactions in executor.map(
+            _read_keyed_transactions,
+            transaction_file_paths,
+            chunksize=max(1, len(transaction_file_paths) // (workers * 4)),
+        ):
+            keyed_transactions.extend(file_keyed_transactions)
+    return keyed_transactions
 
-    return deduped_transactions
+
+def _get_file_hash(path: str) -> str:
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def _get_ingested_file(path: str, previous: Optional[IngestedFile]) -> IngestedFile:
+    """
+    Fingerprints a file, the content is only hashed again when its size or
+    modification time changed since the previous fingerprint.
+    """
+    file_stat = os.stat(path)
+    if (
+        previous is not None
+        and previous["size"] == file_stat.st_size
+        and previous["mtime"] == file_stat.st_mtime
+    ):
+        return previous
+
+    return {
+        "path": path,
+        "size": file_stat.st_size,
+        "mtime": file_stat.st_mtime,
+        "sha256": _get_file_hash(path),
+    }
+
+
+def _load_manifest(merged_transactions_path: str) -> Dict[str, IngestedFile]:
+    if not (os.path.exists(MANIFEST_PATH) and os.path.exists(merged_transactions_path)):
+        LOGGER.info("no manifest or merged transactions found, merging all files")
+        return {}
+
+    with open(MANIFEST_PATH, "r") as manifest_file:
+        manifest: Manifest = json.loads(manifest_file.read())
+    # e.g. written by a run with another compression, its files may be missing
+    if (
+        not isinstance(manifest, dict)
+        or manifest.get("mergedTransactionsPath") != merged_transactions_path
+    ):
+        LOGGER.info(
+            f"manifest does not describe {merged_transactions_path}, merging all files"
+        )
+        return {}
+
+    return {
+        ingested_file["path"]: ingested_file
+        for ingested_file in manifest["ingestedFiles"]
+    }
+
+
+def _load_merged_transactions(
+    merged_transactions_path: str,
+) -> List[NordigenTransaction]:
+    with open_text(merged_transactions_path, "r") as merged_file:
+        return list(iter_json_array(merged_file))
 
 
 @click.command()
-def merge_transactions() -> None:
+@click.option(
+    "-i",
+    "--incremental",
+    is_flag=True,
+    default=False,
+    help="Only parses files not ingested yet according to "
+    + f"'{MANIFEST_PATH}' and folds them into '{MERGED_TRANSACTIONS_PATH}'.",
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of processes decoding transaction files in parallel.",
+)
+@click.option(
+    "-sp",
+    "--store-path",
+    default=None,
+    help="File path of a SQLite transaction store, "
+    + "the decoded transactions are upserted into it.",
+)
+@click.option(
+    "-ssp",
+    "--snapshot-path",
+    default=None,
+    help="Directory to also write the merged transactions to "
+    + "as a memory mappable binary snapshot.",
+)
+@click.option(
+    "-c",
+    "--compression",
+    type=click.Choice(COMPRESSION_CHOICES),
+    default="none",
+    help="Compression of the merged transactions files, "
+    + "compressed transaction files are always read.",
+)
+def merge_transactions(
+    incremental: bool,
+    workers: int,
+    store_path: Optional[str],
+    snapshot_path: Optional[str],
+    compression: str,
+) -> None:
     """
     Merges files with pattern 'data/transactions*.json' into
-    'data/merged_transactions_latest.json' and
-    'data/merged_transactions_<current date and time>.json'.
+    'data/merged_transactions_<current date and time>.json'
+    and links 'data/merged_transactions_latest.json' to it.
+    Files ending with .gz or .xz are decompressed.
 
     Since 'pending' transactions have different schema,
     this command ignores them.
@@ -59,26 +230,65 @@ def merge_transactions() -> None:
         for transaction_file in os.listdir("data/")
         if re.match(r"transactions.*\.json", transaction_file) is not None
     )
-    transactions = []
+    compression_suffix = get_compression_suffix(compression)
+    merged_transactions_path = f"{MERGED_TRANSACTIONS_PATH}{compression_suffix}"
+    manifest = _load_manifest(merged_transactions_path) if incremental else {}
+    transactions = (
+        _load_merged_transactions(merged_transactions_path) if len(manifest) > 0 else []
+    )
+    ingested_files: List[IngestedFile] = []
+    transaction_file_paths: List[str] = []
     for transaction_file in transaction_files:
-        LOGGER.info(f"opening {transaction_file}")
-        with open(f"data/{transaction_file}", "r") as t_file:
-            file_transactions = json.loads(t_file.read())
-            transactions += file_transactions["booked"]
-            # ignoring "pending", some of them have no way to ID+dedupe
-            # transactions += file_transactions["pending"]
-
-    deduped_transactions = dedupe_transactions(transactions)
+        transaction_file_path = f"data/{transaction_file}"
+        if incremental:
+            previous = manifest.get(transaction_file_path)
+            ingested_file = _get_ingested_file(transaction_file_path, previous)
+            ingested_files.append(ingested_file)
+            if previous is not None and previous["sha256"] == ingested_file["sha256"]:
+                LOGGER.info(f"skipping already ingested {transaction_file}")
+                continue
+        transaction_file_paths.append(transaction_file_path)
 
-    write_json(
-        f"data/merged_transactions-{datetime.now().isoformat()}.json",
-        deduped_transactions,
+    new_keyed_transactions = _read_all_keyed_transactions(
+        transaction_file_paths, workers
     )
+    if store_path is not None:
+        LOGGER.info(f"upserting {len(new_keyed_transactions)} into {store_path}")
+        with TransactionStore(store_path) as store:
+            store.upsert_keyed(new_keyed_transactions)
 
+    keyed_transactions = list(key_transactions(transactions))
+    keyed_transactions.extend(new_keyed_transactions)
+    deduped_transactions = dedupe_keyed_transactions(keyed_transactions)
+
+    timestamped_transactions_path = (
+        f"data/merged_transactions-{datetime.now().isoformat()}.json"
+        + compression_suffix
+    )
     write_json(
-        "data/merged_transactions_latest.json",
+        timestamped_transactions_path,
         deduped_transactions,
+        # a new merged file is written on every run
+        compression_profile=CompressionProfile.Working,
+        json_format=JsonFormat.Compact,
+        atomic=True,
     )
+    link_file(timestamped_transactions_path, merged_transactions_path)
+
+    if snapshot_path is not None:
+        snapshot_size = write_snapshot(snapshot_path, deduped_transactions)
+        LOGGER.info(f"snapshot of {snapshot_size} transactions written")
+
+    if incremental:
+        write_json(
+            MANIFEST_PATH,
+            Manifest(
+                mergedTransactionsPath=merged_transactions_path,
+                ingestedFiles=ingested_files,
+            ),
+            json_format=JsonFormat.Compact,
+            atomic=True,
+        )
 
 
 if __name__ == "__main__":
@@ -1,7 +1,9 @@
 from typing import List, Tuple
-from datetime import timedelta
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
 from itertools import chain
 from .definition import SimpleTransaction
+from .filtering import transaction_datetime_filter
 from ..config import get_user_configuration
 import logging
 
@@ -79,3 +81,49 @@ def remove_internal_transfers(
         for transaction in transactions
         if transaction["transactionId"] not in internal_transfer_ids
     ]
+
+
+def get_internal_transfer_window(
+    transactions: List[SimpleTransaction], start: datetime, end: datetime
+) -> Tuple[datetime, datetime]:
+    """
+    Widens [start, end] to every transfer candidate chained to it by less than
+    BankProcessingTimeInDays, no transaction outside of the window can then
+    pair with a transaction inside, so internal transfers within [start, end]
+    are removed exactly as they are when processing every transaction.
+    """
+    processing_time = timedelta(days=get_user_configuration().BankProcessingTimeInDays)
+    candidate_datetimes = sorted(
+        transaction["datetime"]
+        for transaction in transactions
+        if _has_internal_transfer_features(transaction)
+    )
+
+    first_in_range = bisect_left(candidate_datetimes, start)
+    first_after_range = bisect_right(candidate_datetimes, end)
+
+    window_start = start
+    for candidate_datetime in reversed(candidate_datetimes[:first_in_range]):
+        if window_start - candidate_datetime >= processing_time:
+            break
+        window_start = candidate_datetime
+
+    window_end = end
+    for candidate_datetime in candidate_datetimes[first_after_range:]:
+        if candidate_datetime - window_end >= processing_time:
+            break
+        window_end = candidate_datetime
+
+    return window_start, window_end
+
+
+def internal_transfer_window_filter(
+    start: datetime, end: datetime, transactions: List[SimpleTransaction]
+) -> List[SimpleTransaction]:
+    """
+    Keeps only transactions that may affect internal transfer removal
+    within [start, end], see get_internal_transfer_window.
+    """
+    window_start, window_end = get_internal_transfer_window(transactions, start, end)
+    LOGGER.info(f"internal transfer window from {window_start} to {window_end}")
+    return transaction_datetime_filter(window_start, window_end, transactions)
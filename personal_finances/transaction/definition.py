@@ -1,10 +1,159 @@
-from typing import TypedDict
-from datetime import datetime
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Sequence,
+    Tuple,
+    TypedDict,
+    TypeVar,
+    Union,
+    overload,
+)
+from datetime import datetime, timezone
+
+TransactionT = TypeVar("TransactionT")
 
 
 class SimpleTransaction(TypedDict):
     transactionId: str
     datetime: datetime
+    # float in major units, or int in minor units (e.g. cents) when opted in
     amount: float
     referenceText: str
     bankTransactionCode: str
+
+
+class TransactionRecord:
+    """
+    Compact transaction supporting the mapping protocol of SimpleTransaction
+    and the fields added by grouping and categorizing, which are set in place
+    instead of copying the transaction. Unset fields behave like missing keys.
+    """
+
+    __slots__ = (
+        "transactionId",
+        "datetime",
+        "amount",
+        "referenceText",
+        "bankTransactionCode",
+        "groupNumber",
+        "groupName",
+        "customCategory",
+    )
+
+    def __init__(self, **fields: Any) -> None:
+        for key, value in fields.items():
+            self[key] = value
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and key in self.__slots__ and hasattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (TransactionRecord, Mapping)):
+            return NotImplemented
+        return self.as_dict() == dict(other.items())
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return f"TransactionRecord({self.as_dict()!r})"
+
+    def keys(self) -> List[str]:
+        return [key for key in self.__slots__ if hasattr(self, key)]
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(key, getattr(self, key)) for key in self.keys()]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+
+def extend_transaction(transaction: TransactionT, **fields: Any) -> TransactionT:
+    """
+    Adds fields to a transaction, records are extended in place while
+    dict transactions are copied.
+    """
+    if isinstance(transaction, TransactionRecord):
+        for key, value in fields.items():
+            transaction[key] = value
+        return transaction
+
+    return {**transaction, **fields}  # type: ignore
+
+
+class _DatetimeColumn(Sequence[datetime]):
+    """Epoch timestamps read as UTC datetimes, each built on access."""
+
+    def __init__(self, timestamps: Sequence[float]) -> None:
+        self._timestamps = timestamps
+
+    def __len__(self) -> int:
+        return len(self._timestamps)
+
+    @overload
+    def __getitem__(self, index: int) -> datetime: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[datetime]: ...
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[datetime, Sequence[datetime]]:
+        if isinstance(index, slice):
+            return _DatetimeColumn(self._timestamps[index])
+        return datetime.fromtimestamp(self._timestamps[index], timezone.utc)
+
+
+@dataclass
+class TransactionTable:
+    """
+    Transactions as parallel columns, row i of every column belongs to the same
+    transaction. Datetimes are kept as epoch timestamps.
+    """
+
+    transaction_ids: List[str] = field(default_factory=list)
+    timestamps: List[float] = field(default_factory=list)
+    amounts: List[float] = field(default_factory=list)
+    references: List[str] = field(default_factory=list)
+    bank_transaction_codes: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.transaction_ids)
+
+    def as_columns(self) -> Dict[str, Sequence[Any]]:
+        """
+        Columns keyed by SimpleTransaction field names, for predicates such as
+        datetime_between, datetimes are built from the epoch timestamps only
+        when read. The epoch timestamps themselves are keyed as timestamp.
+        """
+        return {
+            "transactionId": self.transaction_ids,
+            "datetime": _DatetimeColumn(self.timestamps),
+            "timestamp": self.timestamps,
+            "amount": self.amounts,
+            "referenceText": self.references,
+            "bankTransactionCode": self.bank_transaction_codes,
+        }
@@ -1,24 +1,264 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
 from datetime import datetime
-from typing import List, Any, Callable, Iterable
+from typing import (
+    List,
+    Any,
+    Callable,
+    Collection,
+    Iterable,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    cast,
+)
 from .definition import SimpleTransaction
 
 
 def _filter_by_property_range(
     start: Any, end: Any, entry_property: Callable, collection: Iterable
 ) -> List:
-    return [
-        item
-        for item in collection
-        if entry_property(item) >= start and entry_property(item) <= end
-    ]
+    return [item for item in collection if start <= entry_property(item) <= end]
+
+
+def _validate_datetime_range(start: datetime, end: datetime) -> None:
+    if start > end:
+        raise ValueError("Start date cannot be greater than end date")
 
 
 def transaction_datetime_filter(
     start: datetime, end: datetime, transactions: List[SimpleTransaction]
 ) -> List[SimpleTransaction]:
-    if start > end:
-        raise ValueError("Start date cannot be greater than end date")
+    _validate_datetime_range(start, end)
 
     return _filter_by_property_range(
         start, end, lambda transaction: transaction["datetime"], transactions
     )
+
+
+class TransactionIndex:
+    """
+    Keeps transactions sorted by datetime, transactions with the same datetime
+    keep their insertion order. Each range query costs O(log n + k), so many
+    ranges (e.g. every month of a year) can be read from the same index.
+    """
+
+    def __init__(self, transactions: Iterable[SimpleTransaction] = ()) -> None:
+        self._transactions = sorted(
+            transactions, key=lambda transaction: transaction["datetime"]
+        )
+        self._datetimes = [
+            transaction["datetime"] for transaction in self._transactions
+        ]
+
+    def __len__(self) -> int:
+        return len(self._transactions)
+
+    def add(self, transaction: SimpleTransaction) -> None:
+        position = bisect_right(self._datetimes, transaction["datetime"])
+        self._datetimes.insert(position, transaction["datetime"])
+        self._transactions.insert(position, transaction)
+
+    def between(self, start: datetime, end: datetime) -> List[SimpleTransaction]:
+        """
+        Returns transactions within start and end (both inclusive),
+        sorted by datetime.
+        """
+        _validate_datetime_range(start, end)
+        first_position = bisect_left(self._datetimes, start)
+        last_position = bisect_right(self._datetimes, end)
+        return self._transactions[first_position:last_position]
+
+    def between_ranges(
+        self, ranges: Iterable[Tuple[datetime, datetime]]
+    ) -> List[List[SimpleTransaction]]:
+        return [self.between(start, end) for start, end in ranges]
+
+
+FieldAccess = Callable[[str], str]
+
+
+class TransactionPredicate(ABC):
+    """
+    Composable transaction condition, combined with `&`, `|` and `~`.
+    An expression is compiled once into a single Python function, so any number
+    of conditions is evaluated in one pass without a function call per condition.
+    """
+
+    def __and__(self, other: TransactionPredicate) -> TransactionPredicate:
+        return AllOf(self, other)
+
+    def __or__(self, other: TransactionPredicate) -> TransactionPredicate:
+        return AnyOf(self, other)
+
+    def __invert__(self) -> TransactionPredicate:
+        return Not(self)
+
+    @abstractmethod
+    def _get_fields(self) -> Set[str]:
+        pass
+
+    @abstractmethod
+    def _render(self, field_access: FieldAccess, constants: List[Any]) -> str:
+        """
+        Renders the condition as a Python expression, values are only ever
+        referenced through the constants list and never written into the source.
+        """
+        pass
+
+    def compile(self) -> Callable[[SimpleTransaction], bool]:
+        constants: List[Any] = []
+        expression = self._render(lambda field: f"transaction[{field!r}]", constants)
+        return cast(
+            Callable[[SimpleTransaction], bool],
+            eval(f"lambda transaction: {expression}", {"_c": constants}),
+        )
+
+    def compile_mask(self) -> Callable[[Mapping[str, Sequence[Any]]], List[bool]]:
+        """
+        Compiles into a function evaluating the condition over columnar data,
+        a mapping of field name to column, returning one boolean per row.
+        """
+        fields = sorted(self._get_fields())
+        variables = {field: f"_v{index}" for index, field in enumerate(fields)}
+        constants: List[Any] = []
+        expression = self._render(lambda field: variables[field], constants)
+        if len(fields) == 0:
+            rows = "_ in range(max(map(len, columns.values()), default=0))"
+        else:
+            row_variables = ", ".join(variables[field] for field in fields)
+            columns = ", ".join(f"columns[{field!r}]" for field in fields)
+            rows = f"({row_variables},) in zip({columns})"
+        return cast(
+            Callable[[Mapping[str, Sequence[Any]]], List[bool]],
+            eval(f"lambda columns: [{expression} for {rows}]", {"_c": constants}),
+        )
+
+
+def _add_constant(constants: List[Any], value: Any) -> str:
+    constants.append(value)
+    return f"_c[{len(constants) - 1}]"
+
+
+class FieldBetween(TransactionPredicate):
+    def __init__(
+        self, field: str, start: Optional[Any] = None, end: Optional[Any] = None
+    ) -> None:
+        if start is not None and end is not None and start > end:
+            raise ValueError("Start cannot be greater than end")
+        self.field = field
+        self.start = start
+        self.end = end
+
+    def _get_fields(self) -> Set[str]:
+        return {self.field}
+
+    def _render(self, field_access: FieldAccess, constants: List[Any]) -> str:
+        comparisons = [field_access(self.field)]
+        if self.start is not None:
+            comparisons.insert(0, _add_constant(constants, self.start))
+        if self.end is not None:
+            comparisons.append(_add_constant(constants, self.end))
+        if len(comparisons) == 1:
+            return "True"
+        return "(" + " <= ".join(comparisons) + ")"
+
+
+class FieldIn(TransactionPredicate):
+    def __init__(self, field: str, values: Collection[Any]) -> None:
+        self.field = field
+        self.values = frozenset(values)
+
+    def _get_fields(self) -> Set[str]:
+        return {self.field}
+
+    def _render(self, field_access: FieldAccess, constants: List[Any]) -> str:
+        values = _add_constant(constants, self.values)
+        return f"({field_access(self.field)} in {values})"
+
+
+class FieldContains(TransactionPredicate):
+    def __init__(self, field: str, substring: str, ignore_case: bool = True) -> None:
+        self.field = field
+        self.substring = substring.lower() if ignore_case else substring
+        self.ignore_case = ignore_case
+
+    def _get_fields(self) -> Set[str]:
+        return {self.field}
+
+    def _render(self, field_access: FieldAccess, constants: List[Any]) -> str:
+        field = field_access(self.field)
+        field_value = f"{field}.lower()" if self.ignore_case else field
+        return f"({_add_constant(constants, self.substring)} in {field_value})"
+
+
+class _Junction(TransactionPredicate):
+    operator: str
+    empty_value: str
+
+    def __init__(self, *predicates: TransactionPredicate) -> None:
+        self.predicates = predicates
+
+    def _get_fields(self) -> Set[str]:
+        return set().union(*(predicate._get_fields() for predicate in self.predicates))
+
+    def _render(self, field_access: FieldAccess, constants: List[Any]) -> str:
+        if len(self.predicates) == 0:
+            return self.empty_value
+        rendered_predicates = [
+            predicate._render(field_access, constants) for predicate in self.predicates
+        ]
+        return "(" + f" {self.operator} ".join(rendered_predicates) + ")"
+
+
+class AllOf(_Junction):
+    operator = "and"
+    empty_value = "True"
+
+
+class AnyOf(_Junction):
+    operator = "or"
+    empty_value = "False"
+
+
+class Not(TransactionPredicate):
+    def __init__(self, predicate: TransactionPredicate) -> None:
+        self.predicate = predicate
+
+    def _get_fields(self) -> Set[str]:
+        return self.predicate._get_fields()
+
+    def _render(self, field_access: FieldAccess, constants: List[Any]) -> str:
+        return f"(not {self.predicate._render(field_access, constants)})"
+
+
+def datetime_between(start: datetime, end: datetime) -> TransactionPredicate:
+    return FieldBetween("datetime", start, end)
+
+
+def amount_between(
+    minimum: Optional[float] = None, maximum: Optional[float] = None
+) -> TransactionPredicate:
+    return FieldBetween("amount", minimum, maximum)
+
+
+def bank_transaction_code_in(codes: Collection[str]) -> TransactionPredicate:
+    return FieldIn("bankTransactionCode", codes)
+
+
+def reference_contains(substring: str) -> TransactionPredicate:
+    return FieldContains("referenceText", substring)
+
+
+def category_in(categories: Collection[str]) -> TransactionPredicate:
+    return FieldIn("customCategory", categories)
+
+
+def filter_transactions(
+    predicate: TransactionPredicate, transactions: Iterable[SimpleTransaction]
+) -> List[SimpleTransaction]:
+    matches = predicate.compile()
+    return [transaction for transaction in transactions if matches(transaction)]
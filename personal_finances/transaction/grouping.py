@@ -1,8 +1,9 @@
 from difflib import SequenceMatcher
-from .definition import SimpleTransaction
+from .definition import SimpleTransaction, extend_transaction
+from .processing import ZERO_AMOUNT
 from functools import reduce
 from enum import Enum
-from typing import Tuple, List, Dict, Set, Iterable, NotRequired, cast
+from typing import Tuple, List, Dict, Set, Iterable, NotRequired, TypedDict, cast
 from itertools import chain
 from ..config import get_user_configuration
 import re
@@ -75,13 +76,56 @@ class GroupedTransaction(SimpleTransaction):
     groupName: NotRequired[str]
 
 
+class GroupMetadata(TypedDict):
+    groupNumber: int
+    groupName: str
+    size: int
+    amount: float
+    references: List[str]
+    representativeReference: str
+
+
+def _get_group_table(
+    grouped_transactions: List[GroupedTransaction],
+    groups: List[Set[str]],
+    representative_references: List[str],
+    zero_amount: float,
+) -> List[GroupMetadata]:
+    group_table: List[GroupMetadata] = [
+        {
+            "groupNumber": group_number,
+            "groupName": _get_group_name(group),
+            "size": 0,
+            "amount": zero_amount,
+            "references": [],
+            "representativeReference": representative_references[group_number],
+        }
+        for group_number, group in enumerate(groups)
+    ]
+    for transaction in grouped_transactions:
+        group_metadata = group_table[transaction["groupNumber"]]
+        group_metadata["size"] += 1
+        group_metadata["amount"] += transaction["amount"]
+        group_metadata["references"].append(transaction["referenceText"])
+
+    return group_table
+
+
 def group_transactions(
-    transactions: List[SimpleTransaction], grouping_type: TransactionGroupingType
-) -> Tuple[List[GroupedTransaction], List[Set[str]]]:
+    transactions: List[SimpleTransaction],
+    grouping_type: TransactionGroupingType,
+    zero_amount: float = ZERO_AMOUNT,
+) -> Tuple[List[GroupedTransaction], List[Set[str]], List[GroupMetadata]]:
+    """
+    Groups transactions by reference similarity, returning the grouped
+    transactions, the references of each group and a metadata table indexed
+    by group number. Transaction records are extended in place.
+    """
     if grouping_type != TransactionGroupingType.ReferenceSimilarity:
         raise NotImplementedError("grouping type not implemented")
 
     groups: List[Set[str]] = []
+    representative_references: List[str] = []
     grouped_transactions: List[GroupedTransaction] = []
     for transaction in transactions:
         added = False
@@ -95,7 +139,8 @@ def group_transactions(
                 group.add(reference)
                 grouped_transactions.append(
                     cast(
-                        GroupedTransaction, {**transaction, "groupNumber": group_number}
+                        GroupedTransaction,
+                        extend_transaction(transaction, groupNumber=group_number),
                     )
                 )
                 added = True
@@ -103,19 +148,25 @@ def group_transactions(
 
         if not added:
             groups.append({reference})
+            representative_references.append(reference)
             grouped_transactions.append(
                 cast(
-                    GroupedTransaction, {**transaction, "groupNumber": len(groups) - 1}
+                    GroupedTransaction,
+                    extend_transaction(transaction, groupNumber=len(groups) - 1),
                 )
             )
 
-    return [
-        cast(
-            GroupedTransaction,
-            {
-                **transaction,
-                "groupName": _get_group_name(groups[transaction["groupNumber"]]),
-            },
-        )
-        for transaction in grouped_transactions
-    ], groups
+    group_table = _get_group_table(
+        grouped_transactions, groups, representative_references, zero_amount
+    )
+    return (
+        [
+            extend_transaction(
+                transaction,
+                groupName=group_table[transaction["groupNumber"]]["groupName"],
+            )
+            for transaction in grouped_transactions
+        ],
+        groups,
+        group_table,
+    )
@@ -1,6 +1,22 @@
-from typing import Dict, List, Callable, Hashable, TypedDict, Any, NotRequired, Iterable
+from typing import (
+    Dict,
+    List,
+    Callable,
+    Hashable,
+    TypedDict,
+    Any,
+    NotRequired,
+    Iterable,
+    Optional,
+    Mapping,
+    Sequence,
+    Tuple,
+    cast,
+)
+from enum import Enum
 from functools import reduce
 from .definition import SimpleTransaction
+from .type import get_transaction_type
 
 
 class ReferencesAmountByKey(TypedDict, total=False):
@@ -9,13 +25,25 @@ class ReferencesAmountByKey(TypedDict, total=False):
     key: NotRequired[Hashable]
 
 
-EMPTY_AMOUNT_OBJECT: ReferencesAmountByKey = {"amount": 0.0, "references": []}
+ZERO_AMOUNT: float = 0.0
+# Integer zero keeps sums of minor unit amounts as exact integers
+ZERO_MINOR_UNITS_AMOUNT: float = 0
+EMPTY_AMOUNT_OBJECT: ReferencesAmountByKey = {"amount": ZERO_AMOUNT, "references": []}
+
+
+def get_zero_amount(minor_units: bool) -> float:
+    return ZERO_MINOR_UNITS_AMOUNT if minor_units else ZERO_AMOUNT
 
 
 def _reduce_amount_and_references_by_key(
     transactions: Iterable[SimpleTransaction],
     key: Callable[[SimpleTransaction], Hashable],
+    zero_amount: float,
 ) -> Dict[Hashable, ReferencesAmountByKey]:
+    empty_amount_object: ReferencesAmountByKey = {
+        **EMPTY_AMOUNT_OBJECT,
+        "amount": zero_amount,
+    }
     return reduce(
         lambda amount_per_key, transaction: {
             **amount_per_key,
@@ -28,7 +56,7 @@ def _reduce_amount_and_references_by_key(
             },
         },
         transactions,
-        {key(transaction): EMPTY_AMOUNT_OBJECT for transaction in transactions},
+        {key(transaction): empty_amount_object for transaction in transactions},
     )
 
 
@@ -37,21 +65,137 @@ def sum_amount_by(
     *,
     key: Callable[[SimpleTransaction], Hashable],
     extra_key_context: Callable[[Hashable], Dict[str, Any]] = lambda _: {},
+    zero_amount: float = ZERO_AMOUNT,
 ) -> List[Dict]:
     return list(
         map(
             lambda entry: {**entry[1], **extra_key_context(entry[0])},
             sorted(
-                _reduce_amount_and_references_by_key(transactions, key).items(),
+                _reduce_amount_and_references_by_key(
+                    transactions, key, zero_amount
+                ).items(),
                 key=lambda entry: entry[1]["amount"],
             ),
         )
     )
 
 
-def sum_amount(transactions: Iterable[SimpleTransaction]) -> float:
+def sum_amount(
+    transactions: Iterable[SimpleTransaction], zero_amount: float = ZERO_AMOUNT
+) -> float:
     return reduce(
         lambda total, transaction: transaction["amount"] + total,
         transactions,
-        0.0,
+        zero_amount,
     )
+
+
+class PivotDimension(Enum):
+    Category = "Category"
+    Group = "Group"
+    Month = "Month"
+    TransactionType = "TransactionType"
+    BankCode = "BankCode"
+
+
+_DIMENSION_KEYS: Dict[PivotDimension, Callable[[SimpleTransaction], Hashable]] = {
+    PivotDimension.Category: lambda transaction: cast(Dict, transaction)[
+        "customCategory"
+    ],
+    PivotDimension.Group: lambda transaction: cast(Dict, transaction)["groupNumber"],
+    PivotDimension.Month: lambda transaction: transaction["datetime"].strftime("%Y-%m"),
+    PivotDimension.TransactionType: lambda transaction: get_transaction_type(
+        transaction
+    ).value,
+    PivotDimension.BankCode: lambda transaction: transaction["bankTransactionCode"],
+}
+
+
+class AmountCube:
+    """
+    Transaction amounts pivoted by any combination of dimensions. Each cell keeps
+    only the summed amount and the references of its transactions, so slices
+    roll up cell sums instead of revisiting transactions. Slices made of one
+    cell per key (any single dimension cube) match `sum_amount_by` exactly;
+    slices spanning several cells may differ from it in float rounding.
+    """
+
+    def __init__(
+        self, dimensions: Sequence[PivotDimension], zero_amount: float = ZERO_AMOUNT
+    ) -> None:
+        self.dimensions = tuple(dimensions)
+        self.zero_amount = zero_amount
+        self._dimension_keys = [_DIMENSION_KEYS[dimension] for dimension in dimensions]
+        self._cells: Dict[Tuple[Hashable, ...], ReferencesAmountByKey] = {}
+        self._total = zero_amount
+
+    def add(self, transaction: SimpleTransaction) -> None:
+        coordinates = tuple(key(transaction) for key in self._dimension_keys)
+        cell = self._cells.setdefault(
+            coordinates, {"amount": self.zero_amount, "references": []}
+        )
+        cell["amount"] = transaction["amount"] + cell["amount"]
+        cell["references"].append(transaction["referenceText"])
+        self._total = transaction["amount"] + self._total
+
+    def _get_cells(
+        self, where: Optional[Mapping[PivotDimension, Hashable]]
+    ) -> Iterable[Tuple[Tuple[Hashable, ...], ReferencesAmountByKey]]:
+        positions = {
+            self.dimensions.index(dimension): value
+            for dimension, value in (where or {}).items()
+        }
+        return (
+            (coordinates, cell)
+            for coordinates, cell in self._cells.items()
+            if all(
+                coordinates[position] == value for position, value in positions.items()
+            )
+        )
+
+    def total(self, where: Optional[Mapping[PivotDimension, Hashable]] = None) -> float:
+        if not where:
+            return self._total
+        return sum(
+            (cell["amount"] for _, cell in self._get_cells(where)), self.zero_amount
+        )
+
+    def amount_by(
+        self,
+        dimension: PivotDimension,
+        *,
+        where: Optional[Mapping[PivotDimension, Hashable]] = None,
+        extra_key_context: Callable[[Hashable], Dict[str, Any]] = lambda _: {},
+    ) -> List[Dict]:
+        """
+        Rolls the cube up into a single dimension, optionally fixing the value of
+        other dimensions, returning the same entries as `sum_amount_by`. Keys
+        keep the order in which they were first added and references are
+        concatenated cell by cell.
+        """
+        position = self.dimensions.index(dimension)
+        amounts_by_key: Dict[Hashable, ReferencesAmountByKey] = {}
+        for coordinates, cell in self._get_cells(where):
+            key = coordinates[position]
+            entry = amounts_by_key.setdefault(
+                key, {"key": key, "amount": self.zero_amount, "references": []}
+            )
+            entry["amount"] = cell["amount"] + entry["amount"]
+            entry["references"] = entry["references"] + cell["references"]
+        return [
+            {**entry, **extra_key_context(entry["key"])}
+            for entry in sorted(
+                amounts_by_key.values(), key=lambda entry: entry["amount"]
+            )
+        ]
+
+
+def pivot_amount(
+    transactions: Iterable[SimpleTransaction],
+    dimensions: Sequence[PivotDimension],
+    zero_amount: float = ZERO_AMOUNT,
+) -> AmountCube:
+    cube = AmountCube(dimensions, zero_amount)
+    for transaction in transactions:
+        cube.add(transaction)
+    return cube
@@ -0,0 +1,203 @@
+from __future__ import annotations
+from bisect import bisect_left, insort
+from datetime import date, datetime, time, timezone
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Tuple, cast
+from .definition import SimpleTransaction
+from .processing import get_zero_amount
+from .type import TransactionType
+
+
+ROLLUP_VERSION = 3
+
+# (transaction type, category, group name)
+RollupKey = Tuple[str, str, str]
+
+
+class RollupVersionMismatch(Exception):
+    pass
+
+
+class RollupRangeUnavailable(Exception):
+    pass
+
+
+class RollupDimension(Enum):
+    TransactionType = 0
+    Category = 1
+    Group = 2
+
+
+def _get_day(moment: datetime) -> date:
+    return moment.astimezone(timezone.utc).date()
+
+
+def get_day_range(start: datetime, end: datetime) -> Tuple[date, date]:
+    """
+    Returns the UTC days of [start, end), rollups only keep daily buckets so
+    both have to be at a UTC midnight.
+    """
+    for moment in [start, end]:
+        if moment.astimezone(timezone.utc).time() != time():
+            raise RollupRangeUnavailable(
+                f"rollups are summed per UTC day, {moment.isoformat()} "
+                + "is not at midnight UTC"
+            )
+    return _get_day(start), _get_day(end)
+
+
+class TransactionRollup:
+    """
+    Amount totals per UTC day, transaction type, category and group name,
+    built from categorized transactions. Each processed transaction keeps the
+    key it was rolled up with, or None when it was left out as an internal
+    transfer, so that later updates can fold new transactions in and only
+    revisit transactions paired differently since.
+    """
+
+    def __init__(self, minor_units: bool = False) -> None:
+        self.minor_units = minor_units
+        self.zero_amount = get_zero_amount(minor_units)
+        self._days: List[date] = []
+        self._buckets: Dict[date, Dict[RollupKey, float]] = {}
+        self._processed: Dict[str, Optional[RollupKey]] = {}
+
+    def get_unprocessed(
+        self, transactions: Iterable[SimpleTransaction]
+    ) -> List[SimpleTransaction]:
+        return [
+            transaction
+            for transaction in transactions
+            if transaction["transactionId"] not in self._processed
+        ]
+
+    def get_not_rolled_up(
+        self, transactions: Iterable[SimpleTransaction]
+    ) -> List[SimpleTransaction]:
+        """
+        Returns unprocessed transactions and transactions previously removed.
+        """
+        return [
+            transaction
+            for transaction in transactions
+            if self._processed.get(transaction["transactionId"]) is None
+        ]
+
+    def _get_bucket(self, day: date) -> Dict[RollupKey, float]:
+        if day not in self._buckets:
+            insort(self._days, day)
+            self._buckets[day] = {}
+        return self._buckets[day]
+
+    def add(
+        self,
+        transactions: Iterable[SimpleTransaction],
+        transaction_type: TransactionType,
+    ) -> None:
+        """
+        Rolls up categorized transactions (with customCategory and groupName),
+        transactions already rolled up are skipped.
+        """
+        for transaction in transactions:
+            if self._processed.get(transaction["transactionId"]) is not None:
+                continue
+
+            categorized_transaction = cast(Dict, transaction)
+            key: RollupKey = (
+                transaction_type.value,
+                categorized_transaction["customCategory"],
+                categorized_transaction["groupName"],
+            )
+            bucket = self._get_bucket(_get_day(transaction["datetime"]))
+            bucket[key] = bucket.get(key, self.zero_amount) + transaction["amount"]
+            self._processed[transaction["transactionId"]] = key
+
+    def remove(self, transactions: Iterable[SimpleTransaction]) -> None:
+        """
+        Takes transactions out of the rollup, e.g. internal transfers, and
+        records them as processed so that updates skip them.
+        """
+        for transaction in transactions:
+            key = self._processed.get(transaction["transactionId"])
+            if key is not None:
+                bucket = self._buckets[_get_day(transaction["datetime"])]
+                bucket[key] = bucket[key] - transaction["amount"]
+            self._processed[transaction["transactionId"]] = None
+
+    def _get_buckets_in_range(
+        self, start: datetime, end: datetime
+    ) -> Iterable[Dict[RollupKey, float]]:
+        start_day, end_day = get_day_range(start, end)
+        first = bisect_left(self._days, start_day)
+        last = bisect_left(self._days, end_day)
+        return (self._buckets[day] for day in self._days[first:last])
+
+    def total(
+        self, start: datetime, end: datetime, transaction_type: TransactionType
+    ) -> float:
+        return sum(
+            (
+                amount
+                for bucket in self._get_buckets_in_range(start, end)
+                for key, amount in bucket.items()
+                if key[RollupDimension.TransactionType.value] == transaction_type.value
+            ),
+            self.zero_amount,
+        )
+
+    def amount_by(
+        self,
+        dimension: RollupDimension,
+        start: datetime,
+        end: datetime,
+        transaction_type: TransactionType,
+    ) -> List[Dict]:
+        amount_by_key: Dict[str, float] = {}
+        for bucket in self._get_buckets_in_range(start, end):
+            for key, amount in bucket.items():
+                if key[RollupDimension.TransactionType.value] != transaction_type.value:
+                    continue
+                amount_by_key[key[dimension.value]] = (
+                    amount_by_key.get(key[dimension.value], self.zero_amount) + amount
+                )
+
+        return sorted(
+            ({"key": key, "amount": amount} for key, amount in amount_by_key.items()),
+            key=lambda entry: entry["amount"],
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "version": ROLLUP_VERSION,
+            "minorUnits": self.minor_units,
+            "processed": {
+                transaction_id: None if key is None else list(key)
+                for transaction_id, key in sorted(self._processed.items())
+            },
+            "buckets": {
+                day.isoformat(): [
+                    [*key, amount] for key, amount in self._buckets[day].items()
+                ]
+                for day in self._days
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, rollup_dict: Dict[str, Any]) -> TransactionRollup:
+        if rollup_dict.get("version") != ROLLUP_VERSION:
+            raise RollupVersionMismatch(
+                f"rollup version {rollup_dict.get('version')} "
+                + f"instead of {ROLLUP_VERSION}"
+            )
+        rollup = cls(minor_units=rollup_dict["minorUnits"])
+        rollup._processed = {
+            transaction_id: None if key is None else cast(RollupKey, tuple(key))
+            for transaction_id, key in rollup_dict["processed"].items()
+        }
+        for day, entries in rollup_dict["buckets"].items():
+            rollup._buckets[date.fromisoformat(day)] = {
+                (transaction_type, category, group_name): amount
+                for transaction_type, category, group_name, amount in entries
+            }
+        rollup._days = sorted(rollup._buckets)
+        return rollup
@@ -1,7 +1,8 @@
 from enum import Enum
-from typing import List
+from typing import Callable, List, Tuple
 from .definition import SimpleTransaction
 from ..config import get_user_configuration
+import re
 
 
 class TransactionType(Enum):
@@ -64,3 +65,41 @@ def get_unknown_type_transactions(
     transactions: List[SimpleTransaction],
 ) -> List[SimpleTransaction]:
     return _filter_by_type(transactions, TransactionType.UNKOWN)
+
+
+def _get_income_reference_matcher() -> Callable[[str], bool]:
+    income_references = [
+        income_reference
+        for income_category in get_user_configuration().IncomeCategoryDefinition
+        for income_reference in income_category.CategoryReferences
+    ]
+    if len(income_references) == 0:
+        return lambda _: False
+
+    income_pattern = re.compile("|".join(map(re.escape, income_references)))
+    return lambda reference: income_pattern.search(reference) is not None
+
+
+def partition_by_type(
+    transactions: List[SimpleTransaction],
+) -> Tuple[List[SimpleTransaction], List[SimpleTransaction], List[SimpleTransaction]]:
+    """
+    Classifies each transaction once, returning income, expense and unknown type
+    transactions, same as get_income/expense/unknown_type_transactions.
+    """
+    matches_income_reference = _get_income_reference_matcher()
+    expense_codes = frozenset(get_user_configuration().ExpenseTransactionCodes)
+
+    income_transactions: List[SimpleTransaction] = []
+    expense_transactions: List[SimpleTransaction] = []
+    unknown_type_transactions: List[SimpleTransaction] = []
+    for transaction in transactions:
+        amount = transaction["amount"]
+        if amount > 0 and matches_income_reference(transaction["referenceText"]):
+            income_transactions.append(transaction)
+        elif amount < 0 and transaction["bankTransactionCode"] in expense_codes:
+            expense_transactions.append(transaction)
+        else:
+            unknown_type_transactions.append(transaction)
+
+    return income_transactions, expense_transactions, unknown_type_transactions
@@ -0,0 +1,294 @@
+from __future__ import annotations
+import json
+import os
+import shutil
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, cast
+from .bank_interface.nordigen_adapter import (
+    NordigenTransaction,
+    get_amount,
+    get_currency,
+    get_datetime,
+    get_proprietary_bank_transaction_code,
+    get_reference,
+    key_transactions,
+    to_minor_units,
+)
+from .file_helper import create_dirs, get_temporary_path
+from .transaction.definition import SimpleTransaction, TransactionRecord
+
+if TYPE_CHECKING:
+    # imported when snapshots are used, merging and reports do not require numpy
+    import numpy as np
+
+SNAPSHOT_VERSION = 3
+# utc offset of datetimes without time zone, read back as naive local datetimes
+NAIVE_UTC_OFFSET = -(2**31)
+METADATA_FILE_NAME = "metadata.json"
+
+
+class SnapshotVersionMismatch(Exception):
+    pass
+
+
+def _get_utc_offset(moment: datetime) -> int:
+    utc_offset = moment.utcoffset()
+    if utc_offset is None:
+        return NAIVE_UTC_OFFSET
+    return int(utc_offset.total_seconds())
+
+
+class _DictionaryEncoder:
+    def __init__(self) -> None:
+        self.codes: List[int] = []
+        self.values: List[str] = []
+        self._value_codes: Dict[str, int] = {}
+
+    def append(self, value: str) -> None:
+        if value not in self._value_codes:
+            self._value_codes[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(self._value_codes[value])
+
+
+def _encode_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    import numpy as np
+
+    encoded_strings = [string.encode("utf-8") for string in strings]
+    offsets = np.zeros(len(encoded_strings) + 1, dtype=np.int64)
+    np.cumsum([len(encoded) for encoded in encoded_strings], out=offsets[1:])
+    data = np.frombuffer(b"".join(encoded_strings), dtype=np.uint8)
+    return offsets, data
+
+
+class _StringTable:
+    """Strings stored as one UTF-8 buffer and the offsets delimiting them."""
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray) -> None:
+        self._offsets = offsets
+        self._data = data
+
+    def __getitem__(self, index: int) -> str:
+        string_start = int(self._offsets[index])
+        string_end = int(self._offsets[index + 1])
+        return bytes(self._data[string_start:string_end]).decode("utf-8")
+
+
+def _save_array(path: str, name: str, array: np.ndarray) -> None:
+    import numpy as np
+
+    np.save(os.path.join(path, f"{name}.npy"), array)
+
+
+def _replace_directory(source_path: str, path: str) -> None:
+    """
+    A directory can only be renamed over an empty one, the previous snapshot
+    is moved aside first and removed once the new one is in place.
+    """
+    previous_path = get_temporary_path(f"{path}.previous")
+    if os.path.exists(path):
+        os.replace(path, previous_path)
+    os.replace(source_path, path)
+    if os.path.exists(previous_path):
+        shutil.rmtree(previous_path)
+
+
+def _write_snapshot_files(
+    path: str, raw_transactions: Iterable[NordigenTransaction]
+) -> int:
+    import numpy as np
+
+    timestamps: List[float] = []
+    utc_offsets: List[int] = []
+    amounts: List[float] = []
+    transaction_ids: List[str] = []
+    currencies = _DictionaryEncoder()
+    bank_transaction_codes = _DictionaryEncoder()
+    references = _DictionaryEncoder()
+    for transaction_id, transaction in key_transactions(raw_transactions):
+        transaction_datetime = get_datetime(transaction)
+        timestamps.append(transaction_datetime.timestamp())
+        utc_offsets.append(_get_utc_offset(transaction_datetime))
+        amounts.append(get_amount(transaction))
+        transaction_ids.append(transaction_id)
+        currencies.append(get_currency(transaction))
+        bank_transaction_codes.append(
+            get_proprietary_bank_transaction_code(transaction)
+        )
+        references.append(get_reference(transaction))
+
+    order = np.argsort(np.array(timestamps, dtype=np.float64), kind="stable")
+    os.makedirs(path)
+    _save_array(path, "timestamps", np.array(timestamps, dtype=np.float64)[order])
+    _save_array(path, "utc_offsets", np.array(utc_offsets, dtype=np.int32)[order])
+    _save_array(path, "amounts", np.array(amounts, dtype=np.float64)[order])
+    # position of each row in raw_transactions
+    _save_array(path, "ordinals", order.astype(np.int64))
+    for name, encoder in [
+        ("currency_codes", currencies),
+        ("bank_transaction_codes", bank_transaction_codes),
+        ("reference_codes", references),
+    ]:
+        _save_array(path, name, np.array(encoder.codes, dtype=np.int32)[order])
+
+    reference_offsets, reference_data = _encode_strings(references.values)
+    _save_array(path, "reference_offsets", reference_offsets)
+    _save_array(path, "reference_data", reference_data)
+    transaction_id_offsets, transaction_id_data = _encode_strings(
+        [transaction_ids[index] for index in order]
+    )
+    _save_array(path, "transaction_id_offsets", transaction_id_offsets)
+    _save_array(path, "transaction_id_data", transaction_id_data)
+
+    with open(os.path.join(path, METADATA_FILE_NAME), "w") as metadata_file:
+        metadata_file.write(
+            json.dumps(
+                {
+                    "version": SNAPSHOT_VERSION,
+                    "size": len(timestamps),
+                    "currencies": currencies.values,
+                    "bankTransactionCodes": bank_transaction_codes.values,
+                }
+            )
+        )
+    return len(timestamps)
+
+
+def write_snapshot(path: str, raw_transactions: Iterable[NordigenTransaction]) -> int:
+    """
+    Writes transactions into the snapshot directory sorted by booking datetime:
+    fixed width columns for timestamps, their UTC offsets in seconds, amounts,
+    positions in raw_transactions
+    and dictionary encoded currencies and bank transaction codes, and string
+    tables for references and transaction ids. The snapshot is written to a
+    temporary directory replacing path once complete, so readers never mix
+    files of two snapshots. Returns the number of transactions written.
+    """
+    path = os.path.normpath(path)
+    create_dirs(path)
+    temporary_path = get_temporary_path(path)
+    if os.path.exists(temporary_path):
+        shutil.rmtree(temporary_path)
+    try:
+        size = _write_snapshot_files(temporary_path, raw_transactions)
+        _replace_directory(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            shutil.rmtree(temporary_path)
+        raise
+    return size
+
+
+class TransactionSnapshot:
+    """
+    Transactions snapshot written by write_snapshot, arrays are memory mapped
+    and transactions are only built for the rows read, in the order of the
+    transactions written.
+    """
+
+    def __init__(self, path: str) -> None:
+        import numpy as np
+
+        with open(os.path.join(path, METADATA_FILE_NAME), "r") as metadata_file:
+            metadata = json.loads(metadata_file.read())
+        if metadata["version"] != SNAPSHOT_VERSION:
+            raise SnapshotVersionMismatch(
+                f"snapshot {path} version is {metadata['version']}"
+            )
+
+        self._size: int = metadata["size"]
+        self._currencies: List[str] = metadata["currencies"]
+        self._bank_transaction_codes: List[str] = metadata["bankTransactionCodes"]
+        self._arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in [
+                "timestamps",
+                "utc_offsets",
+                "amounts",
+                "ordinals",
+                "currency_codes",
+                "bank_transaction_codes",
+                "reference_codes",
+                "reference_offsets",
+                "reference_data",
+                "transaction_id_offsets",
+                "transaction_id_data",
+            ]
+        }
+        self._references = _StringTable(
+            self._arrays["reference_offsets"], self._arrays["reference_data"]
+        )
+        self._transaction_ids = _StringTable(
+            self._arrays["transaction_id_offsets"],
+            self._arrays["transaction_id_data"],
+        )
+        self._decoded_references: Dict[int, str] = {}
+        self._time_zones: Dict[int, Optional[timezone]] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _get_reference(self, reference_code: int) -> str:
+        if reference_code not in self._decoded_references:
+            self._decoded_references[reference_code] = self._references[reference_code]
+        return self._decoded_references[reference_code]
+
+    def _get_datetime(self, index: int) -> datetime:
+        utc_offset = int(self._arrays["utc_offsets"][index])
+        if utc_offset not in self._time_zones:
+            self._time_zones[utc_offset] = (
+                None
+                if utc_offset == NAIVE_UTC_OFFSET
+                else timezone(timedelta(seconds=utc_offset))
+            )
+        return datetime.fromtimestamp(
+            float(self._arrays["timestamps"][index]), self._time_zones[utc_offset]
+        )
+
+    def _get_transaction(self, index: int, minor_units: bool) -> SimpleTransaction:
+        amount: Any = float(self._arrays["amounts"][index])
+        if minor_units:
+            currency_code = int(self._arrays["currency_codes"][index])
+            amount = to_minor_units(amount, self._currencies[currency_code])
+
+        bank_transaction_code = int(self._arrays["bank_transaction_codes"][index])
+        return cast(
+            SimpleTransaction,
+            TransactionRecord(
+                transactionId=self._transaction_ids[index],
+                datetime=self._get_datetime(index),
+                amount=amount,
+                referenceText=self._get_reference(
+                    int(self._arrays["reference_codes"][index])
+                ),
+                bankTransactionCode=self._bank_transaction_codes[bank_transaction_code],
+            ),
+        )
+
+    def between(
+        self, start: datetime, end: datetime, minor_units: bool = False
+    ) -> List[SimpleTransaction]:
+        """
+        Transactions booked within [start, end], the range is found by binary
+        search over the timestamps and only its rows are put back in order.
+        """
+        import numpy as np
+
+        timestamps = self._arrays["timestamps"]
+        first_index = int(np.searchsorted(timestamps, start.timestamp(), "left"))
+        last_index = int(np.searchsorted(timestamps, end.timestamp(), "right"))
+        range_order = np.argsort(
+            self._arrays["ordinals"][first_index:last_index], kind="stable"
+        )
+        return [
+            self._get_transaction(first_index + int(index), minor_units)
+            for index in range_order
+        ]
+
+    def all(self, minor_units: bool = False) -> List[SimpleTransaction]:
+        import numpy as np
+
+        return [
+            self._get_transaction(int(index), minor_units)
+            for index in np.argsort(self._arrays["ordinals"], kind="stable")
+        ]
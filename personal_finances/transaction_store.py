@@ -0,0 +1,137 @@
+from __future__ import annotations
+import json
+import sqlite3
+from datetime import datetime
+from types import TracebackType
+from typing import Iterable, Iterator, Optional, Tuple, Type
+from .bank_interface.nordigen_adapter import (
+    NordigenTransaction,
+    get_datetime,
+    get_dedupe_key,
+    key_transactions,
+)
+from .file_helper import create_dirs
+
+KeyedTransaction = Tuple[str, NordigenTransaction]
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS transactions (
+        id TEXT PRIMARY KEY,
+        ordinal INTEGER NOT NULL,
+        booking_timestamp REAL NOT NULL,
+        dedupe_rank INTEGER NOT NULL,
+        content_hash TEXT NOT NULL,
+        content TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS transactions_booking_timestamp
+    ON transactions (booking_timestamp)
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS transactions_ordinal
+    ON transactions (ordinal)
+    """,
+]
+
+# on id conflicts the row with the smallest dedupe key is kept at the ordinal
+# of the first insert, like merging keeps the position of the first appearance
+_UPSERT = """
+    INSERT INTO transactions
+        (id, ordinal, booking_timestamp, dedupe_rank, content_hash, content)
+    VALUES (
+        ?,
+        (SELECT COALESCE(MAX(ordinal) + 1, 0) FROM transactions),
+        ?, ?, ?, ?
+    )
+    ON CONFLICT (id) DO UPDATE SET
+        booking_timestamp = excluded.booking_timestamp,
+        dedupe_rank = excluded.dedupe_rank,
+        content_hash = excluded.content_hash,
+        content = excluded.content
+    WHERE (excluded.dedupe_rank, excluded.content_hash)
+        < (transactions.dedupe_rank, transactions.content_hash)
+"""
+
+
+class TransactionStore:
+    """
+    Deduplicated raw Nordigen transactions in a SQLite database, keyed by
+    transaction id and indexed by booking datetime. Transactions are read in
+    the order of the merged transactions file when upserted in the same order.
+    """
+
+    def __init__(self, path: str) -> None:
+        create_dirs(path)
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            for statement in _SCHEMA:
+                self._connection.execute(statement)
+
+    def __enter__(self) -> TransactionStore:
+        return self
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __len__(self) -> int:
+        return int(
+            self._connection.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+        )
+
+    def upsert(self, transactions: Iterable[NordigenTransaction]) -> None:
+        self.upsert_keyed(key_transactions(transactions))
+
+    def upsert_keyed(self, keyed_transactions: Iterable[KeyedTransaction]) -> None:
+        with self._connection:
+            self._connection.executemany(
+                _UPSERT,
+                (
+                    (
+                        transaction_id,
+                        get_datetime(transaction).timestamp(),
+                        *get_dedupe_key(transaction),
+                        json.dumps(transaction),
+                    )
+                    for transaction_id, transaction in keyed_transactions
+                ),
+            )
+
+    def get(self, transaction_id: str) -> Optional[NordigenTransaction]:
+        row = self._connection.execute(
+            "SELECT content FROM transactions WHERE id = ?", (transaction_id,)
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def iter_all(self) -> Iterator[NordigenTransaction]:
+        """Yields every transaction in upsert order."""
+        for (content,) in self._connection.execute(
+            "SELECT content FROM transactions ORDER BY ordinal"
+        ):
+            yield json.loads(content)
+
+    def iter_between(
+        self, start: datetime, end: datetime
+    ) -> Iterator[NordigenTransaction]:
+        """
+        Yields transactions booked within [start, end] in upsert order,
+        only index entries in range are read.
+        """
+        for (content,) in self._connection.execute(
+            """
+            SELECT content FROM transactions
+            WHERE booking_timestamp BETWEEN ? AND ?
+            ORDER BY ordinal
+            """,
+            (start.timestamp(), end.timestamp()),
+        ):
+            yield json.loads(content)
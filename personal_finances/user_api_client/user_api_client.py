@@ -5,6 +5,7 @@ import requests
 from typing import Callable, Dict, Any, List, Optional
 
 from schwifty import IBAN
+from ..http_session import get_http_session
 
 LOGGER = logging.getLogger(__name__)
 
@@ -25,16 +26,16 @@ def _make_request(method: Callable, url: str, headers: Dict[str, str]) -> Any:
         raise ApiClientError(f"User API request failed: {exc}") from exc
 
 
-def _post(url: str, headers: Dict[str, str]) -> Any:
-    return _make_request(requests.post, url, headers)
+def _post(session: requests.Session, url: str, headers: Dict[str, str]) -> Any:
+    return _make_request(session.post, url, headers)
 
 
-def _get(url: str, headers: Dict[str, str]) -> Any:
-    return _make_request(requests.get, url, headers)
+def _get(session: requests.Session, url: str, headers: Dict[str, str]) -> Any:
+    return _make_request(session.get, url, headers)
 
 
-def _put(url: str, headers: Dict[str, str]) -> Any:
-    return _make_request(requests.put, url, headers)
+def _put(session: requests.Session, url: str, headers: Dict[str, str]) -> Any:
+    return _make_request(session.put, url, headers)
 
 
 class UserApiClient:
@@ -42,12 +43,16 @@ class UserApiClient:
     A client that wraps the user-related API endpoints.
     """
 
-    def __init__(self, base_url: str) -> None:
+    def __init__(
+        self, base_url: str, session: Optional[requests.Session] = None
+    ) -> None:
         """
-        Initializes the client with a base URL.
+        Initializes the client with a base URL, requests go through
+        the shared HTTP session unless a session is given.
         """
         self.base_url: str = base_url
         self.auth_token: Optional[str] = ""
+        self._session: requests.Session = session or get_http_session()
 
     @decorator
     @staticmethod
@@ -83,7 +88,7 @@ class UserApiClient:
 
         LOGGER.info(f"New login attempt for user: {user_id}")
 
-        response = _post(url, headers=headers)
+        response = _post(self._session, url, headers=headers)
         data: Dict[str, Any] = response.json()
         self.auth_token = data["token"]
 
@@ -105,7 +110,7 @@ class UserApiClient:
 
         LOGGER.info(f"Requesting IBANs of user: {user_id}")
 
-        response = _get(url, headers=headers)
+        response = _get(self._session, url, headers=headers)
         data: Dict[str, Any] = response.json()
         ibans = data.get("ibanList", [])
         LOGGER.info(f"IBANs of {user_id}: {ibans}")
@@ -126,7 +131,7 @@ class UserApiClient:
         url: str = f"{self.base_url}/users/{user_id}/bank-accounts/{iban}"
         headers: Dict[str, str] = {"Authorization": f"Bearer {self.auth_token}"}
 
-        response = _put(url, headers=headers)
+        response = _put(self._session, url, headers=headers)
         response_message: Dict[str, Any] = response.json()
 
         return response_message
@@ -0,0 +1,82 @@
+from datetime import date
+from typing import Any, List, cast
+from personal_finances.bank_interface.account_watermarks import (
+    get_dates_from,
+    get_last_booked_date,
+    load_account_watermarks,
+    save_account_watermarks,
+    update_account_watermarks,
+)
+from personal_finances.bank_interface.bank_client import AccountTransactions
+from personal_finances.bank_interface.nordigen_adapter import NordigenTransactions
+
+
+def new_transactions(booked_dates: List[str]) -> NordigenTransactions:
+    return cast(
+        NordigenTransactions,
+        {
+            "booked": [{"bookingDate": booked_date} for booked_date in booked_dates],
+            "pending": [{"bookingDate": "2024-02-01"}],
+        },
+    )
+
+
+def new_account_transactions(
+    account_id: str, booked_dates: List[str]
+) -> AccountTransactions:
+    return {"accountId": account_id, "transactions": new_transactions(booked_dates)}
+
+
+def test_watermarks_round_trip(tmp_path: Any) -> None:
+    path = f"{tmp_path}/data/account_watermarks.json"
+    watermarks = {"account2": date(2024, 1, 2), "account1": date(2023, 12, 31)}
+
+    save_account_watermarks(watermarks, path)
+
+    assert load_account_watermarks(path) == watermarks
+
+
+def test_missing_watermarks_are_empty(tmp_path: Any) -> None:
+    assert load_account_watermarks(f"{tmp_path}/account_watermarks.json") == {}
+
+
+def test_last_booked_date_ignores_pending() -> None:
+    assert get_last_booked_date(
+        new_transactions(["2024-01-03", "2024-01-05T10:00:00", "2024-01-04"])
+    ) == date(2024, 1, 5)
+    assert get_last_booked_date(new_transactions([])) is None
+
+
+def test_update_watermarks() -> None:
+    watermarks = {
+        "account1": date(2024, 1, 10),
+        "account2": date(2024, 1, 10),
+        "account3": date(2024, 1, 10),
+    }
+
+    updated_watermarks = update_account_watermarks(
+        watermarks,
+        [
+            new_account_transactions("account1", ["2024-01-08", "2024-01-12"]),
+            new_account_transactions("account2", []),
+            new_account_transactions("account3", ["2024-01-08"]),
+            new_account_transactions("account4", ["2024-01-01"]),
+        ],
+    )
+
+    assert updated_watermarks == {
+        "account1": date(2024, 1, 12),
+        "account2": date(2024, 1, 10),
+        "account3": date(2024, 1, 10),
+        "account4": date(2024, 1, 1),
+    }
+    assert watermarks["account1"] == date(2024, 1, 10)
+
+
+def test_dates_from_overlap_watermarks() -> None:
+    assert get_dates_from({"account1": date(2024, 3, 2)}, overlap_days=2) == {
+        "account1": date(2024, 2, 29)
+    }
+    assert get_dates_from({"account1": date(2024, 3, 2)}, overlap_days=0) == {
+        "account1": date(2024, 3, 2)
+    }
@@ -58,7 +58,7 @@ def bank_client_now_mock() -> Generator[Mock, None, None]:
 @fixture(autouse=True)
 def nordigen_client_mock() -> Generator[Mock, None, None]:
     with patch(
-        "personal_finances.bank_interface.bank_auth_handler.NordigenClient"
+        "personal_finances.bank_interface.bank_auth_handler.SessionNordigenClient"
     ) as mock:
         mock.return_value.generate_token.__name__ = "generate_token"
         mock.return_value.institution.get_institution_id_by_name.__name__ = (
@@ -1,7 +1,16 @@
-from typing import cast
+from datetime import date
+from typing import Dict, List, Optional, cast
 from unittest.mock import Mock, call
+import threading
+import time
+import pytest
 
-from personal_finances.bank_interface.bank_client import GocardlessClient
+from nordigen.types.http_enums import HTTPMethod
+from requests.models import HTTPError
+from personal_finances.bank_interface.bank_client import (
+    GocardlessClient,
+    SessionNordigenClient,
+)
 from personal_finances.bank_interface.nordigen_adapter import NordigenTransactions
 
 
@@ -90,3 +99,153 @@ def test_get_transactions() -> None:
             ],
         },
     )
+
+
+ACCOUNT_IDS = {
+    "requisition1": ["account11", "account12"],
+    "requisition2": ["account21"],
+    "requisition3": ["account31", "account32", "account33"],
+}
+
+
+def get_concurrent_nordigen_mock(thread_names: List[str]) -> Mock:
+    nordigen_mock = Mock()
+
+    def get_requisition_by_id(requisition_id: str) -> Dict:
+        return {"accounts": ACCOUNT_IDS[requisition_id]}
+
+    def account_api(id: str) -> Mock:
+        account_mock = Mock()
+
+        def get_transactions(date_from: Optional[str] = None) -> Dict:
+            # the first accounts respond last
+            time.sleep(0.01 * (int(id[-2:]) % 7))
+            thread_names.append(threading.current_thread().name)
+            return {"transactions": {"booked": [f"b_{id}"], "pending": [f"p_{id}"]}}
+
+        account_mock.get_transactions.side_effect = get_transactions
+        account_mock.get_transactions.__name__ = "get_transactions"
+        return account_mock
+
+    nordigen_mock.requisition.get_requisition_by_id.side_effect = get_requisition_by_id
+    nordigen_mock.requisition.get_requisition_by_id.__name__ = "get_requisition_by_id"
+    nordigen_mock.account_api.side_effect = account_api
+    nordigen_mock.account_api.__name__ = "account_api"
+    return nordigen_mock
+
+
+@pytest.mark.parametrize("max_workers", [1, 2, 8])
+def test_get_transactions_concurrently_keeps_order(max_workers: int) -> None:
+    thread_names: List[str] = []
+    test_client = GocardlessClient(
+        get_concurrent_nordigen_mock(thread_names), max_workers=max_workers
+    )
+
+    result_transactions = test_client.get_transactions(list(ACCOUNT_IDS))
+
+    account_ids = [
+        account_id
+        for requisition_account_ids in ACCOUNT_IDS.values()
+        for account_id in requisition_account_ids
+    ]
+    assert result_transactions == cast(
+        NordigenTransactions,
+        {
+            "booked": [f"b_{account_id}" for account_id in account_ids],
+            "pending": [f"p_{account_id}" for account_id in account_ids],
+        },
+    )
+    main_thread_name = threading.current_thread().name
+    assert (main_thread_name in thread_names) == (max_workers == 1)
+    assert len(set(thread_names)) <= max_workers
+
+
+def test_get_transactions_concurrently_raises_account_error() -> None:
+    nordigen_mock = get_concurrent_nordigen_mock([])
+    nordigen_mock.account_api.side_effect = ConnectionError
+    test_client = GocardlessClient(nordigen_mock, max_workers=4)
+
+    with pytest.raises(ConnectionError):
+        test_client.get_transactions(list(ACCOUNT_IDS))
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_get_transactions_per_account_from_date(max_workers: int) -> None:
+    nordigen_mock = get_concurrent_nordigen_mock([])
+    account_mocks: Dict[str, Mock] = {}
+    account_api = nordigen_mock.account_api.side_effect
+
+    def record_account_api(id: str) -> Mock:
+        account_mocks[id] = account_api(id)
+        return account_mocks[id]
+
+    nordigen_mock.account_api.side_effect = record_account_api
+    test_client = GocardlessClient(nordigen_mock, max_workers=max_workers)
+
+    result = test_client.get_transactions_per_account(
+        ["requisition1", "requisition2"], {"account12": date(2024, 1, 2)}
+    )
+
+    assert [account["accountId"] for account in result] == [
+        "account11",
+        "account12",
+        "account21",
+    ]
+    assert result[1]["transactions"] == cast(
+        NordigenTransactions, {"booked": ["b_account12"], "pending": ["p_account12"]}
+    )
+    account_mocks["account11"].get_transactions.assert_called_once_with()
+    account_mocks["account12"].get_transactions.assert_called_once_with(
+        date_from="2024-01-02"
+    )
+
+
+def get_session_client(session_mock: Mock) -> SessionNordigenClient:
+    session_mock.request.return_value.ok = True
+    session_mock.request.return_value.json.return_value = {"access": "token"}
+    return SessionNordigenClient(
+        secret_id="id", secret_key="key", session=session_mock, base_url="https://api"
+    )
+
+
+def test_session_client_sends_requests_through_session() -> None:
+    session_mock = Mock()
+    test_client = get_session_client(session_mock)
+
+    assert test_client.generate_token() == {"access": "token"}
+    session_mock.request.assert_called_once_with(
+        "POST",
+        url="https://api/token/new/",
+        headers={
+            "accept": "application/json",
+            "Content-Type": "application/json",
+            "User-Agent": "Nordigen-Python-v2",
+            "Authorization": "Bearer token",
+        },
+        timeout=10,
+        data='{"secret_key": "key", "secret_id": "id"}',
+    )
+
+    test_client.account_api(id="account1").get_transactions(date_from="2024-01-02")
+
+    assert session_mock.request.call_args.args == ("GET",)
+    assert session_mock.request.call_args.kwargs["url"] == (
+        "https://api/accounts/account1/transactions/"
+    )
+    assert session_mock.request.call_args.kwargs["params"] == {
+        "date_from": "2024-01-02"
+    }
+
+
+def test_session_client_raises_http_error() -> None:
+    session_mock = Mock()
+    test_client = get_session_client(session_mock)
+    session_mock.request.return_value.ok = False
+    session_mock.request.return_value.status_code = 429
+    session_mock.request.return_value.json.return_value = {"detail": "rate limit"}
+
+    with pytest.raises(HTTPError) as error:
+        test_client.request(HTTPMethod.GET, "accounts/account1/details/")
+
+    assert error.value.args[0] == {"response": {"detail": "rate limit"}, "status": 429}
+    assert error.value.response is session_mock.request.return_value
@@ -23,10 +23,8 @@ def subprocess_mock() -> Generator[Mock, None, None]:
 
 
 @fixture(autouse=True)
-def requests_mock() -> Generator[Mock, None, None]:
-    with patch(
-        "personal_finances.bank_interface.bank_validation_provider.requests"
-    ) as mock:
+def session_get_mock() -> Generator[Mock, None, None]:
+    with patch("requests.Session.get") as mock:
         yield mock
 
 
@@ -48,8 +46,8 @@ def test_localhost_validation_provider_scope(
     os_mock.killpg.assert_called_with(os_mock.getpgid.return_value, signal.SIGTERM)
 
 
-def test_localhost_validation_provider_not_validated(requests_mock: Mock) -> None:
-    requests_mock.get.return_value.json.return_value = [
+def test_localhost_validation_provider_not_validated(session_get_mock: Mock) -> None:
+    session_get_mock.return_value.json.return_value = [
         "other-reference",
         "yet-another-one",
     ]
@@ -57,8 +55,8 @@ def test_localhost_validation_provider_not_validated(requests_mock: Mock) -> Non
         assert test_provider.is_reference_validated("mock-reference") is False
 
 
-def test_localhost_validation_provider_validated(requests_mock: Mock) -> None:
-    requests_mock.get.return_value.json.return_value = [
+def test_localhost_validation_provider_validated(session_get_mock: Mock) -> None:
+    session_get_mock.return_value.json.return_value = [
         "other-reference",
         "mock-reference",
     ]
@@ -1,9 +1,37 @@
-from typing import cast
+from datetime import datetime, timezone
+from typing import Any, List, cast
+import json
+from dateutil.tz import tzutc
+import dateutil.parser
+import pytest
 from personal_finances.bank_interface.nordigen_adapter import (
     EMPTY_NORDIGEN_TRANSACTIONS,
+    NordigenTransaction,
     NordigenTransactions,
+    as_simple_transaction,
+    as_transaction_record,
+    as_transaction_table,
+    collect_nordigen_transactions,
     concat_nordigen_transactions,
+    get_amount_in_minor_units,
+    get_datetime,
+    get_dedupe_key,
+    get_id,
+    key_transactions,
 )
+from personal_finances.transaction.filtering import (
+    datetime_between,
+    reference_contains,
+)
+
+
+def new_transaction(amount: Any, currency: str) -> NordigenTransaction:
+    return NordigenTransaction(
+        bookingDate="2024-03-25",
+        transactionAmount={"amount": amount, "currency": currency},
+        transactionId="transaction-id",
+        creditorName="some creditor",
+    )
 
 
 def test_concat_nordigen_transactions_double_empty() -> None:
@@ -41,3 +69,236 @@ def test_concat_nordigen_transactions() -> None:
         cast(NordigenTransactions, another_transactions),
         cast(NordigenTransactions, simple_transactions),
     ) == cast(NordigenTransactions, expected_nordigen_transactions)
+
+
+@pytest.mark.parametrize(
+    "amount,currency,expected_minor_units",
+    [
+        ("-22.99", "EUR", -2299),
+        ("0.1", "EUR", 10),
+        (0.29, "USD", 29),
+        ("1500", "JPY", 1500),
+        ("1.234", "KWD", 1234),
+        ("-3", "eur", -300),
+    ],
+)
+def test_get_amount_in_minor_units(
+    amount: Any, currency: str, expected_minor_units: int
+) -> None:
+    minor_units = get_amount_in_minor_units(new_transaction(amount, currency))
+    assert minor_units == expected_minor_units
+    assert isinstance(minor_units, int)
+
+
+def test_get_amount_in_minor_units_rejects_extra_decimals() -> None:
+    with pytest.raises(Exception):
+        get_amount_in_minor_units(new_transaction("1.5", "JPY"))
+
+
+def test_as_simple_transaction_minor_units() -> None:
+    transaction = new_transaction("-22.99", "EUR")
+    assert as_simple_transaction(transaction)["amount"] == -22.99
+    assert as_simple_transaction(transaction, minor_units=True)["amount"] == -2299
+
+
+@pytest.mark.parametrize(
+    "booking_datetime",
+    [
+        "2024-03-25T10:11:12Z",
+        "2024-03-25T10:11:12.123456+01:00",
+        "2024-03-25T10:11:12+0100",
+        "2021-01-01T10:00:00.00000",
+        "20240325T101112Z",
+        "2024-03-25",
+    ],
+)
+def test_get_datetime_from_booking_datetime(booking_datetime: str) -> None:
+    transaction = new_transaction("1", "EUR")
+    transaction["bookingDatetime"] = booking_datetime
+
+    assert get_datetime(transaction) == dateutil.parser.isoparse(booking_datetime)
+
+
+@pytest.mark.parametrize(
+    "booking_date",
+    ["2024-03-25", "20240325", "2024-03-25T10:00:00.00000", "25 March 2024"],
+)
+def test_get_datetime_from_booking_date(booking_date: str) -> None:
+    transaction = new_transaction("1", "EUR")
+    transaction["bookingDate"] = booking_date
+    expected_datetime = dateutil.parser.parse(booking_date).replace(tzinfo=tzutc())
+
+    parsed_datetime = get_datetime(transaction)
+    assert parsed_datetime == expected_datetime
+    assert parsed_datetime.isoformat() == expected_datetime.isoformat()
+    assert get_datetime(transaction) is parsed_datetime
+
+
+def test_get_datetime_without_booking_date() -> None:
+    transaction = new_transaction("1", "EUR")
+    del transaction["bookingDate"]
+
+    with pytest.raises(Exception):
+        get_datetime(transaction)
+
+
+def load_test_transactions() -> List[NordigenTransaction]:
+    with open("tests/test_data/transactions/test_transaction.json", "r") as file:
+        return cast(List[NordigenTransaction], json.load(file))
+
+
+@pytest.mark.parametrize("minor_units", [False, True])
+def test_transaction_table_matches_simple_transactions(minor_units: bool) -> None:
+    raw_transactions = load_test_transactions()
+    simple_transactions = [
+        as_simple_transaction(transaction, minor_units=minor_units)
+        for transaction in raw_transactions
+    ]
+
+    table = as_transaction_table(raw_transactions, minor_units=minor_units)
+
+    assert len(table) == len(simple_transactions)
+    assert table.transaction_ids == [t["transactionId"] for t in simple_transactions]
+    assert table.timestamps == [t["datetime"].timestamp() for t in simple_transactions]
+    assert table.amounts == [t["amount"] for t in simple_transactions]
+    assert table.references == [t["referenceText"] for t in simple_transactions]
+    assert table.bank_transaction_codes == [
+        t["bankTransactionCode"] for t in simple_transactions
+    ]
+
+
+def test_transaction_table_interns_strings() -> None:
+    raw_transactions = [new_transaction("1", "EUR"), new_transaction("2", "EUR")]
+
+    table = as_transaction_table(raw_transactions)
+
+    assert table.references[0] is table.references[1]
+    assert table.bank_transaction_codes[0] is table.bank_transaction_codes[1]
+    assert set(table.as_columns()["referenceText"]) == {"some creditor"}
+
+
+def test_transaction_table_columns_match_predicates() -> None:
+    raw_transactions = [
+        cast(NordigenTransaction, {**new_transaction("1", "EUR"), "bookingDate": day})
+        for day in ["2024-01-01", "2024-02-01", "2024-03-01"]
+    ]
+    predicate = datetime_between(
+        datetime(2024, 1, 15, tzinfo=timezone.utc),
+        datetime(2024, 3, 1, tzinfo=timezone.utc),
+    ) & reference_contains("creditor")
+
+    columns = as_transaction_table(raw_transactions).as_columns()
+
+    assert predicate.compile_mask()(columns) == [False, True, True]
+    assert list(columns["datetime"]) == [
+        as_simple_transaction(transaction)["datetime"]
+        for transaction in raw_transactions
+    ]
+
+
+def test_empty_transaction_table() -> None:
+    table = as_transaction_table([])
+
+    assert len(table) == 0
+    assert all(len(column) == 0 for column in table.as_columns().values())
+
+
+def new_transaction_without_id(amount: Any, reference: str) -> NordigenTransaction:
+    return NordigenTransaction(
+        bookingDate="2024-03-25",
+        transactionAmount={"amount": amount, "currency": "EUR"},
+        remittanceInformationUnstructured=reference,
+    )
+
+
+def test_id_without_identifiers_is_deterministic() -> None:
+    transaction = new_transaction_without_id("-10.00", "groceries")
+    same_transaction = cast(
+        NordigenTransaction, dict(reversed(list(transaction.items())))
+    )
+
+    assert get_id(transaction) == get_id(
+        new_transaction_without_id("-10.00", "groceries")
+    )
+    assert get_id(transaction) == get_id(same_transaction)
+
+
+def test_id_without_identifiers_depends_on_content() -> None:
+    transaction_id = get_id(new_transaction_without_id("-10.00", "groceries"))
+
+    assert transaction_id != get_id(new_transaction_without_id("-10.00", "bakery"))
+    assert transaction_id != get_id(new_transaction_without_id("-10.01", "groceries"))
+
+
+def test_id_without_identifiers_ignores_volatile_fields() -> None:
+    transaction = new_transaction_without_id("-10.00", "groceries")
+    refetched_transaction = cast(
+        NordigenTransaction,
+        {
+            **transaction,
+            "balanceAfterTransaction": {"balanceAmount": {"amount": "90.00"}},
+            "additionalInformation": "fetched again",
+            "entryReference": "42",
+        },
+    )
+
+    assert get_id(refetched_transaction) == get_id(transaction)
+    assert get_dedupe_key(refetched_transaction) != get_dedupe_key(transaction)
+
+
+def test_key_transactions_numbers_identical_transactions() -> None:
+    transaction = new_transaction_without_id("-10.00", "groceries")
+    other_transaction = new_transaction_without_id("-10.00", "bakery")
+    with_id = new_transaction("10.00", "EUR")
+
+    transaction_ids = [
+        transaction_id
+        for transaction_id, _ in key_transactions(
+            [transaction, with_id, other_transaction, transaction, with_id]
+        )
+    ]
+
+    assert transaction_ids[:3] == [
+        get_id(transaction),
+        get_id(with_id),
+        get_id(other_transaction),
+    ]
+    # identical transactions without identifiers are told apart
+    assert transaction_ids[3] not in transaction_ids[:3]
+    # transactions with identifiers are never renamed
+    assert transaction_ids[4] == get_id(with_id)
+    assert [
+        transaction_id
+        for transaction_id, _ in key_transactions([transaction, transaction])
+    ] == [transaction_ids[0], transaction_ids[3]]
+
+
+@pytest.mark.parametrize("minor_units", [False, True])
+def test_transaction_record_matches_simple_transaction(minor_units: bool) -> None:
+    for transaction in load_test_transactions():
+        record = as_transaction_record(transaction, minor_units=minor_units)
+        assert record == as_simple_transaction(transaction, minor_units=minor_units)
+
+
+def test_collect_nordigen_transactions() -> None:
+    simple_transactions = {"booked": ["tr1"], "pending": ["tr2"]}
+    another_transactions = {"booked": ["tr3", "tr4"], "pending": []}
+
+    collected_transactions = collect_nordigen_transactions(
+        [
+            cast(NordigenTransactions, simple_transactions),
+            EMPTY_NORDIGEN_TRANSACTIONS,
+            cast(NordigenTransactions, another_transactions),
+        ]
+    )
+
+    assert collected_transactions == cast(
+        NordigenTransactions,
+        {"booked": ["tr1", "tr3", "tr4"], "pending": ["tr2"]},
+    )
+    assert EMPTY_NORDIGEN_TRANSACTIONS == {"booked": [], "pending": []}
+    assert simple_transactions == {"booked": ["tr1"], "pending": ["tr2"]}
+
+
+def test_collect_no_nordigen_transactions() -> None:
+    assert collect_nordigen_transactions([]) == EMPTY_NORDIGEN_TRANSACTIONS
@@ -1,7 +1,9 @@
 from unittest.mock import mock_open, patch, Mock, call
 from pytest import fixture
 from click.testing import CliRunner
-from typing import Generator
+import pytest
+from typing import Dict, Generator, List, Optional
+from datetime import date
 from personal_finances.fetch_transactions import fetch_transactions
 
 
@@ -14,13 +16,34 @@ def os_mock() -> Generator[Mock, None, None]:
 @fixture(autouse=True)
 def bank_auth_mock() -> Generator[Mock, None, None]:
     with patch("personal_finances.fetch_transactions.BankAuthorizationHandler") as mock:
+        client_mock = mock.return_value.gocardless_client
+        client_mock.get_transactions_per_account.return_value = []
+        yield mock
+
+
+@fixture(autouse=True)
+def configure_http_session_mock() -> Generator[Mock, None, None]:
+    with patch("personal_finances.fetch_transactions.configure_http_session") as mock:
+        yield mock
+
+
+@fixture(autouse=True)
+def load_watermarks_mock() -> Generator[Mock, None, None]:
+    with patch("personal_finances.fetch_transactions.load_account_watermarks") as mock:
+        mock.return_value = {}
+        yield mock
+
+
+@fixture(autouse=True)
+def save_watermarks_mock() -> Generator[Mock, None, None]:
+    with patch("personal_finances.fetch_transactions.save_account_watermarks") as mock:
         yield mock
 
 
 @fixture(autouse=True)
 def open_mock() -> Generator[Mock, None, None]:
     m = mock_open()
-    with patch("personal_finances.fetch_transactions.open", m):
+    with patch("personal_finances.fetch_transactions.open_text", m):
         yield m
 
 
@@ -94,3 +117,84 @@ def test_nordigen_secrets_not_found_generate_keyerror(os_mock: Mock) -> None:
     assert isinstance(
         result.exception, KeyError
     ), f"Expected an KeyError, but got {type(result.exception).__name__}"
+
+
+def test_workers_are_passed_to_bank_client(
+    os_mock: Mock, bank_auth_mock: Mock, configure_http_session_mock: Mock
+) -> None:
+    runner = CliRunner()
+    result = runner.invoke(fetch_transactions, ["--workers", "4"])
+
+    assert result.exit_code == 0
+    assert bank_auth_mock.call_args.kwargs.get("max_workers") == 4
+    configure_http_session_mock.assert_called_once_with(pool_size=4)
+
+
+def test_invalid_workers_are_rejected(bank_auth_mock: Mock) -> None:
+    runner = CliRunner()
+    result = runner.invoke(fetch_transactions, ["--workers", "0"])
+
+    assert result.exit_code != 0
+    bank_auth_mock.assert_not_called()
+
+
+def account_transactions(account_id: str, *booking_dates: str) -> Dict:
+    return {
+        "accountId": account_id,
+        "transactions": {
+            "booked": [
+                {"bookingDate": booking_date, "transactionId": booking_date}
+                for booking_date in booking_dates
+            ],
+            "pending": [],
+        },
+    }
+
+
+@pytest.mark.parametrize(
+    "params,expected_date_from",
+    [
+        ([], None),
+        (
+            ["--incremental"],
+            {"account1": date(2024, 1, 3), "account2": date(2023, 12, 29)},
+        ),
+        (
+            ["--incremental", "-od", "1"],
+            {"account1": date(2024, 1, 9), "account2": date(2024, 1, 4)},
+        ),
+    ],
+)
+def test_fetch_updates_account_watermarks(
+    params: List[str],
+    expected_date_from: Optional[Dict],
+    os_mock: Mock,
+    bank_auth_mock: Mock,
+    json_mock: Mock,
+    load_watermarks_mock: Mock,
+    save_watermarks_mock: Mock,
+) -> None:
+    client_mock = bank_auth_mock.return_value.gocardless_client
+    client_mock.get_transactions_per_account.return_value = [
+        account_transactions("account1", "2024-01-11", "2024-01-12"),
+        account_transactions("account2"),
+    ]
+    load_watermarks_mock.return_value = {
+        "account1": date(2024, 1, 10),
+        "account2": date(2024, 1, 5),
+    }
+
+    runner = CliRunner()
+    result = runner.invoke(fetch_transactions, params)
+
+    assert result.exit_code == 0
+    assert (
+        client_mock.get_transactions_per_account.call_args.args[1] == expected_date_from
+    )
+    assert [
+        transaction["bookingDate"]
+        for transaction in json_mock.dumps.call_args.args[0]["booked"]
+    ] == ["2024-01-11", "2024-01-12"]
+    save_watermarks_mock.assert_called_once_with(
+        {"account1": date(2024, 1, 12), "account2": date(2024, 1, 5)}
+    )
@@ -1,7 +1,23 @@
 from unittest.mock import mock_open, patch, Mock, call
 from pytest import fixture, raises
-from typing import Generator
-from personal_finances.file_helper import write_string
+from datetime import datetime, timezone
+from typing import Any, Callable, Generator
+from personal_finances.file_helper import (
+    CompressionProfile,
+    JsonFormat,
+    dump_json,
+    iter_json_array,
+    link_file,
+    open_text,
+    write_json,
+    write_string,
+)
+import gzip
+import io
+import json
+import lzma
+import os
+import pytest
 
 
 @fixture(autouse=True)
@@ -53,3 +69,227 @@ def test_write_string_override_existing_file(open_mock: Mock, os_mock: Mock) ->
     file_handle = open_mock()
     file_handle.write.assert_called_once_with("test-content")
     assert open_mock.mock_calls[0] == call("/my/path/file.txt", "w+")
+
+
+NESTED_TRANSACTIONS = [
+    {"transactionId": "1", "amount": {"amount": "-10.5", "currency": "EUR"}},
+    {"transactionId": "2", "reference": ["a, b", "]}, [{"], "empty": {}},
+    123456789,
+    'string with " quote',
+    [],
+    None,
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64 * 1024])
+def test_iter_json_array(chunk_size: int) -> None:
+    file = io.StringIO(json.dumps(NESTED_TRANSACTIONS, indent=4))
+
+    assert list(iter_json_array(file, chunk_size=chunk_size)) == NESTED_TRANSACTIONS
+
+
+@pytest.mark.parametrize("chunk_size", range(1, 8))
+def test_iter_json_array_numbers(chunk_size: int) -> None:
+    content = '[1.5, 1, -0.25,2e3, 1.5E-2,{"amount": 10.75}, [3.125e+1], 12345.6789]'
+
+    assert list(iter_json_array(io.StringIO(content), chunk_size=chunk_size)) == (
+        json.loads(content)
+    )
+    assert list(
+        iter_json_array(
+            io.StringIO(f'{{"ratio": 0.5e1, "booked": {content}}}'),
+            key="booked",
+            chunk_size=chunk_size,
+        )
+    ) == json.loads(content)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64 * 1024])
+def test_iter_json_array_under_key(chunk_size: int) -> None:
+    content = {
+        "pending": [{"transactionId": "pending"}],
+        "booked": NESTED_TRANSACTIONS,
+        "ignored": "after",
+    }
+    file = io.StringIO(json.dumps(content))
+
+    assert (
+        list(iter_json_array(file, key="booked", chunk_size=chunk_size))
+        == NESTED_TRANSACTIONS
+    )
+
+
+@pytest.mark.parametrize("content", ["[]", " [ ] ", '{"booked": []}'])
+def test_iter_empty_json_array(content: str) -> None:
+    key = "booked" if content.startswith("{") else None
+
+    assert list(iter_json_array(io.StringIO(content), key=key)) == []
+
+
+def test_iter_json_array_missing_key() -> None:
+    with raises(KeyError):
+        list(iter_json_array(io.StringIO('{"pending": []}'), key="booked"))
+
+
+@pytest.mark.parametrize(
+    "content,key",
+    [
+        ("{json:invalid{test", "booked"),
+        ('[{"a": 1}', None),
+        ('[{"a": 1} {"b": 2}]', None),
+        ('[{"a": 1},', None),
+        ('{"booked": {}}', "booked"),
+        ("", None),
+    ],
+)
+def test_iter_invalid_json_array(content: str, key: Any) -> None:
+    with raises(json.JSONDecodeError):
+        list(iter_json_array(io.StringIO(content), key=key, chunk_size=2))
+
+
+@pytest.mark.parametrize(
+    "suffix,compressed_open", [(".gz", gzip.open), (".xz", lzma.open)]
+)
+@pytest.mark.parametrize("profile", list(CompressionProfile))
+def test_compressed_json_round_trip(
+    suffix: str, compressed_open: Any, profile: CompressionProfile, tmp_path: Any
+) -> None:
+    path = f"{tmp_path}/transactions.json{suffix}"
+
+    write_json(path, NESTED_TRANSACTIONS, compression_profile=profile)
+
+    with compressed_open(path, "rt") as compressed_file:
+        assert json.loads(compressed_file.read()) == NESTED_TRANSACTIONS
+    with open_text(path, "r") as json_file:
+        assert list(iter_json_array(json_file, chunk_size=5)) == NESTED_TRANSACTIONS
+
+
+def test_uncompressed_json_round_trip(tmp_path: Any) -> None:
+    path = f"{tmp_path}/transactions.json"
+
+    write_json(path, NESTED_TRANSACTIONS)
+
+    with open(path, "r") as json_file:
+        assert json.loads(json_file.read()) == NESTED_TRANSACTIONS
+
+
+@pytest.fixture(params=["orjson", "json"])
+def json_backend(request: Any) -> Generator[str, None, None]:
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+        yield request.param
+    else:
+        with patch("personal_finances.file_helper.orjson", None):
+            yield request.param
+
+
+def test_compact_json_matches_pretty_json(json_backend: str) -> None:
+    content = {"booked": NESTED_TRANSACTIONS, "count": 2, "ratio": 0.5}
+
+    compact = dump_json(content, JsonFormat.Compact)
+
+    assert compact == json.dumps(content, separators=(",", ":"))
+    assert json.loads(compact) == json.loads(dump_json(content, JsonFormat.Pretty))
+
+
+def test_compact_json_converts_datetimes(json_backend: str) -> None:
+    content = [{"datetime": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)}]
+
+    compact = dump_json(
+        content, JsonFormat.Compact, json_converter=lambda value: value.isoformat()
+    )
+
+    assert json.loads(compact) == [{"datetime": "2024-01-02T03:04:05+00:00"}]
+
+
+@pytest.mark.parametrize(
+    "json_converter",
+    [str, lambda value: value.timestamp()],
+)
+def test_compact_json_honours_converter_for_datetimes(
+    json_backend: str, json_converter: Callable
+) -> None:
+    content = [
+        {"datetime": datetime(2024, 1, 2, 3, 4, 5, 678, tzinfo=timezone.utc)},
+        {"datetime": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)},
+    ]
+
+    compact = dump_json(content, JsonFormat.Compact, json_converter=json_converter)
+
+    assert compact == json.dumps(content, separators=(",", ":"), default=json_converter)
+
+
+def test_compact_json_uses_orjson_when_installed() -> None:
+    with patch("personal_finances.file_helper.orjson") as orjson_mock:
+        orjson_mock.dumps.return_value = b"[]"
+
+        assert dump_json([], JsonFormat.Compact) == "[]"
+
+    orjson_mock.dumps.assert_called_once()
+
+
+def test_compact_json_round_trip(json_backend: str, tmp_path: Any) -> None:
+    path = f"{tmp_path}/transactions.json.gz"
+
+    write_json(path, NESTED_TRANSACTIONS, json_format=JsonFormat.Compact)
+
+    with open_text(path, "r") as json_file:
+        assert list(iter_json_array(json_file, chunk_size=5)) == NESTED_TRANSACTIONS
+
+
+@pytest.fixture
+def real_os() -> Generator[None, None, None]:
+    with patch("personal_finances.file_helper.os", os):
+        yield
+
+
+def test_atomic_write_json_replaces_file(real_os: None, tmp_path: Any) -> None:
+    path = f"{tmp_path}/merged.json"
+    write_json(path, ["previous"])
+
+    write_json(path, NESTED_TRANSACTIONS, atomic=True)
+
+    with open(path, "r") as json_file:
+        assert json.loads(json_file.read()) == NESTED_TRANSACTIONS
+    assert os.listdir(tmp_path) == ["merged.json"]
+
+
+def test_failed_atomic_write_json_keeps_file(real_os: None, tmp_path: Any) -> None:
+    path = f"{tmp_path}/merged.json"
+    write_json(path, ["previous"])
+
+    def failing_converter(value: Any) -> Any:
+        raise MockException()
+
+    with raises(MockException):
+        write_json(path, [object()], json_converter=failing_converter, atomic=True)
+
+    with open(path, "r") as json_file:
+        assert json.loads(json_file.read()) == ["previous"]
+    assert os.listdir(tmp_path) == ["merged.json"]
+
+
+def test_link_file_replaces_link(real_os: None, tmp_path: Any) -> None:
+    link_path = f"{tmp_path}/latest.json"
+    write_json(link_path, ["regular file"])
+    for name in ["first", "second"]:
+        write_json(f"{tmp_path}/{name}.json", [name])
+
+        link_file(f"{tmp_path}/{name}.json", link_path)
+
+        assert os.readlink(link_path) == f"{name}.json"
+        with open(link_path, "r") as json_file:
+            assert json.loads(json_file.read()) == [name]
+    assert sorted(os.listdir(tmp_path)) == ["first.json", "latest.json", "second.json"]
+
+
+def test_link_file_falls_back_to_hard_link(real_os: None, tmp_path: Any) -> None:
+    target_path = f"{tmp_path}/target.json"
+    link_path = f"{tmp_path}/latest.json"
+    write_json(target_path, NESTED_TRANSACTIONS)
+
+    with patch("os.symlink", side_effect=OSError):
+        link_file(target_path, link_path)
+
+    assert not os.path.islink(link_path)
+    assert os.path.samefile(target_path, link_path)
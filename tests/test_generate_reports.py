@@ -1,4 +1,8 @@
+import gzip
 import json
+import lzma
+import os
+import shutil
 import dateutil.parser
 from unittest.mock import Mock, patch, mock_open
 import pytest
@@ -8,8 +12,14 @@ from personal_finances.generate_reports import (
     generate_reports,
     InvalidDatetimeRange,
     InvalidDatetime,
+    RollupReportsUnavailable,
 )
-from typing import Generator, Any, List
+from personal_finances.transaction.grouping import group_transactions
+from personal_finances.transaction.processing import ZERO_AMOUNT
+from personal_finances.transaction.rollup import RollupRangeUnavailable
+from personal_finances.transaction_snapshot import write_snapshot
+from personal_finances.transaction_store import TransactionStore
+from typing import Dict, Generator, Any, List, cast
 
 transactions_file = '{"test" : "teste"}'
 
@@ -17,7 +27,7 @@ transactions_file = '{"test" : "teste"}'
 @fixture()
 def open_mock() -> Generator[Mock, None, None]:
     m = mock_open(read_data=transactions_file)()
-    with patch("personal_finances.generate_reports.open", m):
+    with patch("personal_finances.generate_reports.open_text", m):
         yield m
 
 
@@ -28,14 +38,15 @@ def cache_user_configuration_mock() -> Generator[Mock, None, None]:
 
 
 @fixture()
-def json_mock() -> Generator[Mock, None, None]:
-    with patch("personal_finances.generate_reports.json") as m:
+def iter_json_array_mock() -> Generator[Mock, None, None]:
+    with patch("personal_finances.generate_reports.iter_json_array") as m:
+        m.return_value = iter([])
         yield m
 
 
 @fixture()
 def fh_open_mock() -> Generator[Mock, None, None]:
-    with patch("personal_finances.file_helper.open") as m:
+    with patch("personal_finances.file_helper.open_text") as m:
         yield m
 
 
@@ -194,7 +205,7 @@ def test_correct_cli_params(
     expected_et: str,
     cache_user_configuration_mock: Mock,
     open_mock: Mock,
-    json_mock: Mock,
+    iter_json_array_mock: Mock,
 ) -> None:
     with patch(
         "personal_finances.generate_reports._write_reports"
@@ -204,10 +215,15 @@ def test_correct_cli_params(
         assert result.exit_code == 0
         cache_user_configuration_mock.assert_called_once_with(user_file_path)
         open_mock.assert_called_once_with(transactions_file_path, "r")
+        iter_json_array_mock.assert_called_once_with(
+            open_mock.return_value.__enter__.return_value
+        )
         write_reports_mock.assert_called_once_with(
             list(),
             dateutil.parser.isoparse(expected_st),
             dateutil.parser.isoparse(expected_et),
+            ZERO_AMOUNT,
+            False,
         )
 
 
@@ -217,7 +233,9 @@ def assert_file_content_json(file_path: str, result: str) -> None:
         assert json_result == json.loads(result)
 
 
-def _run_generate_reports(transactions_path: str, configuration_path: str) -> int:
+def _run_generate_reports(
+    transactions_path: str, configuration_path: str, *extra_params: str
+) -> int:
     runner = CliRunner()
     return runner.invoke(
         generate_reports,
@@ -226,6 +244,7 @@ def _run_generate_reports(transactions_path: str, configuration_path: str) -> in
             configuration_path,
             "-tfp",
             transactions_path,
+            *extra_params,
         ],
     ).exit_code
 
@@ -273,3 +292,342 @@ def test_generate_reports_output(fh_open_mock: Mock) -> None:
         assert_file_content_json(
             expected_content_path_prefix + expected_file_name, result_file_content
         )
+
+
+def test_generate_reports_minor_units_balance(fh_open_mock: Mock) -> None:
+    exit_code = _run_generate_reports(
+        "tests/test_data/transactions/test_transaction.json",
+        "tests/test_data/config/test_config_file.yaml",
+        "--minor-units",
+    )
+    assert exit_code == 0
+
+    write_content_list = fh_open_mock.return_value.__enter__.return_value.write
+    balance_call_index = next(
+        idx
+        for idx, open_call in enumerate(fh_open_mock.call_args_list)
+        if open_call.args[0].endswith("balance.json")
+    )
+    balance = json.loads(write_content_list.call_args_list[balance_call_index].args[0])
+    assert balance["total_income"] == 400009
+    assert balance["total_expense"] == -11189
+    assert balance["total_balance"] == 388820
+
+
+@pytest.mark.parametrize(
+    "extra_params,expected_type", [([], float), (["--minor-units"], int)]
+)
+def test_generate_reports_empty_range_zero(
+    extra_params: List[str], expected_type: type, fh_open_mock: Mock
+) -> None:
+    exit_code = _run_generate_reports(
+        "tests/test_data/transactions/test_transaction.json",
+        "tests/test_data/config/test_config_file.yaml",
+        "-st",
+        "2000-01-01T00:00:00Z",
+        "-et",
+        "2000-01-02T00:00:00Z",
+        *extra_params,
+    )
+    assert exit_code == 0
+
+    write_content_list = fh_open_mock.return_value.__enter__.return_value.write
+    balance_call_index = next(
+        idx
+        for idx, open_call in enumerate(fh_open_mock.call_args_list)
+        if open_call.args[0].endswith("balance.json")
+    )
+    balance = json.loads(write_content_list.call_args_list[balance_call_index].args[0])
+    for field in ["total_income", "total_expense", "total_balance"]:
+        assert balance[field] == 0
+        assert type(balance[field]) is expected_type
+
+
+def _read_balance(report_directory: str) -> Dict:
+    with open(f"reports/{report_directory}/balance.json") as balance_file:
+        return cast(Dict, json.loads(balance_file.read()))
+
+
+@pytest.mark.parametrize(
+    "time_params,report_directory,exact_time_params,exact_report_directory",
+    [
+        (
+            [],
+            "1970-01-01T00:00:00+00:00_2100-01-01T00:00:00+00:00",
+            [],
+            "1970-01-01T00:00:00+00:00_2100-01-01T00:00:00+00:00",
+        ),
+        # rollups exclude the end day, as the exact report up to the day before
+        (
+            ["-st", "2024-03-20T00:00:00Z", "-et", "2024-03-25T00:00:00Z"],
+            "2024-03-20T00:00:00+00:00_2024-03-25T00:00:00+00:00",
+            ["-st", "2024-03-20T00:00:00Z", "-et", "2024-03-24T23:59:59Z"],
+            "2024-03-20T00:00:00+00:00_2024-03-24T23:59:59+00:00",
+        ),
+        (
+            ["-st", "2024-03-20T01:00:00+0100", "-et", "2024-03-26T01:00:00+0100"],
+            "2024-03-20T01:00:00+01:00_2024-03-26T01:00:00+01:00",
+            ["-st", "2024-03-20T00:00:00Z", "-et", "2024-03-25T23:59:59Z"],
+            "2024-03-20T00:00:00+00:00_2024-03-25T23:59:59+00:00",
+        ),
+    ],
+)
+def test_generate_reports_rollup_matches_exact_reports(
+    tmp_path: Any,
+    monkeypatch: Any,
+    time_params: List[str],
+    report_directory: str,
+    exact_time_params: List[str],
+    exact_report_directory: str,
+) -> None:
+    transactions_path = os.path.abspath(
+        "tests/test_data/transactions/test_transaction.json"
+    )
+    configuration_path = os.path.abspath("tests/test_data/config/test_config_file.yaml")
+    monkeypatch.chdir(tmp_path)
+
+    assert (
+        _run_generate_reports(
+            transactions_path, configuration_path, "-mu", *exact_time_params
+        )
+        == 0
+    )
+    expected_balance = _read_balance(exact_report_directory)
+    expected_categories = [
+        [
+            {"key": entry["key"], "amount": entry["amount"]}
+            for entry in _read_report(
+                exact_report_directory, f"{prefix}_per_category.json"
+            )
+        ]
+        for prefix in ["income", "expense"]
+    ]
+    shutil.rmtree("reports")
+
+    for _ in range(2):
+        exit_code = _run_generate_reports(
+            transactions_path,
+            configuration_path,
+            "-mu",
+            "-rfp",
+            "rollup.json",
+            "-so",
+            *time_params,
+        )
+        assert exit_code == 0
+
+    balance = _read_balance(report_directory)
+    for field in ["total_income", "total_expense", "total_balance"]:
+        assert balance[field] == expected_balance[field]
+    assert sorted(os.listdir(f"reports/{report_directory}")) == [
+        "balance.json",
+        "expense_per_category.json",
+        "income_per_category.json",
+    ]
+    # groups and categories of a single update are assigned over all of them
+    assert [
+        _read_report(report_directory, f"{prefix}_per_category.json")
+        for prefix in ["income", "expense"]
+    ] == expected_categories
+
+
+def test_generate_reports_rollup_pairs_transfers_across_runs(
+    tmp_path: Any, monkeypatch: Any
+) -> None:
+    with open("tests/test_data/transactions/test_transaction.json") as raw_file:
+        raw_transactions = json.loads(raw_file.read())
+    configuration_path = os.path.abspath("tests/test_data/config/test_config_file.yaml")
+    monkeypatch.chdir(tmp_path)
+    with open("first_fetch.json", "w") as first_file:
+        first_file.write(
+            json.dumps(
+                [
+                    raw_transaction
+                    for raw_transaction in raw_transactions
+                    if raw_transaction["transactionAmount"]["amount"] != "-49"
+                ]
+            )
+        )
+    with open("second_fetch.json", "w") as second_file:
+        second_file.write(json.dumps(raw_transactions))
+
+    for transactions_path in ["first_fetch.json", "second_fetch.json"]:
+        exit_code = _run_generate_reports(
+            transactions_path, configuration_path, "-rfp", "rollup.json", "-so"
+        )
+        assert exit_code == 0
+
+    with open("rollup.json", "r") as rollup_file:
+        rollup = json.loads(rollup_file.read())
+    assert len(rollup["processed"]) == len(raw_transactions)
+    # the +49 rolled up by the first run is taken out once its pair arrives
+    assert list(rollup["processed"].values()).count(None) == 2
+    balance = _read_balance("1970-01-01T00:00:00+00:00_2100-01-01T00:00:00+00:00")
+    assert balance["total_income"] == pytest.approx(4000.09)
+    assert balance["total_expense"] == pytest.approx(-111.89)
+
+
+def test_generate_reports_rollup_only_categorizes_new_transactions(
+    tmp_path: Any, monkeypatch: Any
+) -> None:
+    with open("tests/test_data/transactions/test_transaction.json") as raw_file:
+        raw_transactions = json.loads(raw_file.read())
+    configuration_path = os.path.abspath("tests/test_data/config/test_config_file.yaml")
+    monkeypatch.chdir(tmp_path)
+    with open("first_fetch.json", "w") as first_file:
+        first_file.write(json.dumps(raw_transactions[1:]))
+    with open("second_fetch.json", "w") as second_file:
+        second_file.write(json.dumps(raw_transactions))
+
+    with patch(
+        "personal_finances.generate_reports.group_transactions",
+        wraps=group_transactions,
+    ) as group_transactions_mock:
+        for transactions_path in ["first_fetch.json", "second_fetch.json"]:
+            exit_code = _run_generate_reports(
+                transactions_path, configuration_path, "-rfp", "rollup.json", "-so"
+            )
+            assert exit_code == 0
+
+    grouped_sizes = [
+        len(call.args[0]) for call in group_transactions_mock.call_args_list
+    ]
+    # income and expense of the first run, then only the new expense
+    assert grouped_sizes == [2, 3, 0, 1]
+    balance = _read_balance("1970-01-01T00:00:00+00:00_2100-01-01T00:00:00+00:00")
+    assert balance["total_expense"] == pytest.approx(-111.89)
+
+
+def test_generate_reports_rollup_requires_whole_days(
+    tmp_path: Any, monkeypatch: Any
+) -> None:
+    transactions_path = os.path.abspath(
+        "tests/test_data/transactions/test_transaction.json"
+    )
+    configuration_path = os.path.abspath("tests/test_data/config/test_config_file.yaml")
+    monkeypatch.chdir(tmp_path)
+
+    result = CliRunner().invoke(
+        generate_reports,
+        [
+            "-ucfp",
+            configuration_path,
+            "-tfp",
+            transactions_path,
+            "-rfp",
+            "r.json",
+            "-so",
+            "-st",
+            "2024-03-20T00:00:00+0100",
+        ],
+    )
+
+    assert isinstance(result.exception, RollupRangeUnavailable)
+    assert not os.path.exists("r.json")
+    assert not os.path.exists("reports")
+
+
+def test_generate_reports_rollup_requires_summary_only(
+    tmp_path: Any, monkeypatch: Any
+) -> None:
+    transactions_path = os.path.abspath(
+        "tests/test_data/transactions/test_transaction.json"
+    )
+    configuration_path = os.path.abspath("tests/test_data/config/test_config_file.yaml")
+    monkeypatch.chdir(tmp_path)
+
+    result = CliRunner().invoke(
+        generate_reports,
+        ["-ucfp", configuration_path, "-tfp", transactions_path, "-rfp", "r.json"],
+    )
+
+    assert isinstance(result.exception, RollupReportsUnavailable)
+    assert not os.path.exists("r.json")
+    assert not os.path.exists("reports")
+
+
+def _read_report(report_directory: str, file_name: str) -> Any:
+    with open(f"reports/{report_directory}/{file_name}", "r") as report_file:
+        return json.loads(report_file.read())
+
+
+def _read_reports(report_directory: str) -> Dict[str, Any]:
+    return {
+        file_name: _read_report(report_directory, file_name)
+        for file_name in os.listdir(f"reports/{report_directory}")
+    }
+
+
+@pytest.mark.parametrize(
+    "time_params,report_directory",
+    [
+        ([], "1970-01-01T00:00:00+00:00_2100-01-01T00:00:00+00:00"),
+        (
+            ["-st", "2024-02-29T00:00:00Z", "-et", "2024-03-20T23:00:00Z"],
+            "2024-02-29T00:00:00+00:00_2024-03-20T23:00:00+00:00",
+        ),
+    ],
+)
+def test_generate_reports_from_store_and_snapshot(
+    time_params: List[str], report_directory: str, tmp_path: Any, monkeypatch: Any
+) -> None:
+    transactions_path = os.path.abspath(
+        "tests/test_data/transactions/test_transaction.json"
+    )
+    configuration_path = os.path.abspath("tests/test_data/config/test_config_file.yaml")
+    monkeypatch.chdir(tmp_path)
+    with open(transactions_path, "r") as transactions_file:
+        raw_transactions = json.loads(transactions_file.read())
+    # booking datetimes keep their UTC offset in every source
+    raw_transactions[2]["bookingDatetime"] = "2024-03-21T08:33:00+01:00"
+    raw_transactions[3]["bookingDatetime"] = "2024-03-20T18:16:00-04:00"
+    transactions_path = "transactions.json"
+    with open(transactions_path, "w") as transactions_file:
+        transactions_file.write(json.dumps(raw_transactions))
+    with TransactionStore("data/transactions.db") as store:
+        store.upsert(raw_transactions)
+    write_snapshot("data/snapshot", raw_transactions)
+
+    assert (
+        _run_generate_reports(transactions_path, configuration_path, *time_params) == 0
+    )
+    file_reports = _read_reports(report_directory)
+    assert len(file_reports) == 7
+    shutil.rmtree("reports")
+
+    for source_params in [
+        ["-sp", "data/transactions.db"],
+        ["-ssp", "data/snapshot"],
+    ]:
+        assert (
+            _run_generate_reports(
+                transactions_path, configuration_path, *source_params, *time_params
+            )
+            == 0
+        )
+        # same order as the transactions file, float totals included
+        assert _read_reports(report_directory) == file_reports
+        shutil.rmtree("reports")
+
+
+@pytest.mark.parametrize(
+    "suffix,compressed_open", [(".gz", gzip.open), (".xz", lzma.open)]
+)
+def test_generate_reports_from_compressed_file(
+    suffix: str, compressed_open: Any, tmp_path: Any, monkeypatch: Any
+) -> None:
+    transactions_path = os.path.abspath(
+        "tests/test_data/transactions/test_transaction.json"
+    )
+    configuration_path = os.path.abspath("tests/test_data/config/test_config_file.yaml")
+    report_directory = "1970-01-01T00:00:00+00:00_2100-01-01T00:00:00+00:00"
+    monkeypatch.chdir(tmp_path)
+    with open(transactions_path, "r") as transactions_file:
+        with compressed_open(f"transactions.json{suffix}", "wt") as compressed_file:
+            compressed_file.write(transactions_file.read())
+
+    assert _run_generate_reports(transactions_path, configuration_path) == 0
+    expected_balance = _read_report(report_directory, "balance.json")
+    assert _run_generate_reports(f"transactions.json{suffix}", configuration_path) == 0
+
+    assert _read_report(report_directory, "balance.json") == expected_balance
@@ -0,0 +1,49 @@
+from typing import Generator, cast
+from unittest.mock import patch
+from pytest import fixture
+from requests import Session
+from requests.adapters import HTTPAdapter
+from personal_finances import http_session
+from personal_finances.http_session import (
+    DEFAULT_POOL_SIZE,
+    configure_http_session,
+    create_http_session,
+    get_http_session,
+)
+
+
+@fixture(autouse=True)
+def empty_http_session() -> Generator[None, None, None]:
+    with patch.object(http_session, "HTTP_SESSION", None):
+        yield
+
+
+def get_pool_size(session: Session, url: str = "https://example.com") -> int:
+    adapter = cast(HTTPAdapter, session.get_adapter(url))
+    return int(adapter.poolmanager.connection_pool_kw["maxsize"])
+
+
+def test_create_http_session_pool_size() -> None:
+    session = create_http_session(pool_size=3)
+
+    for prefix in ["http://", "https://"]:
+        assert get_pool_size(session, f"{prefix}example.com") == 3
+
+
+def test_get_http_session_is_shared() -> None:
+    session = get_http_session()
+
+    assert get_http_session() is session
+    assert get_pool_size(session) == DEFAULT_POOL_SIZE
+
+
+def test_configure_http_session_replaces_shared_session() -> None:
+    previous_session = get_http_session()
+
+    with patch.object(previous_session, "close") as close_mock:
+        session = configure_http_session(pool_size=4)
+
+    close_mock.assert_called_once_with()
+    assert session is not previous_session
+    assert get_http_session() is session
+    assert get_pool_size(session) == 4
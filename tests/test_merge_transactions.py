@@ -1,6 +1,7 @@
 from pytest import fixture
 from unittest.mock import patch, Mock, mock_open
-from typing import Generator, List
+from typing import Any, Generator, List, cast
+import itertools
 from click.testing import CliRunner
 import pytest
 from personal_finances.bank_interface.nordigen_adapter import (
@@ -8,8 +9,24 @@ from personal_finances.bank_interface.nordigen_adapter import (
     NordigenTransaction,
     NordigenTransactions,
 )
+import gzip
+import io
 import json
-from personal_finances.merge_transactions import merge_transactions
+import lzma
+import os
+from os import listdir  # os.listdir itself is patched by listdir_mock
+from personal_finances.file_helper import (
+    CompressionProfile,
+    link_file,
+    open_text,
+    write_json,
+)
+from personal_finances.merge_transactions import (
+    dedupe_transactions,
+    merge_transactions,
+)
+from personal_finances.transaction_snapshot import TransactionSnapshot
+from personal_finances.transaction_store import TransactionStore
 
 
 @fixture(autouse=True)
@@ -18,6 +35,12 @@ def write_json_mock() -> Generator[Mock, None, None]:
         yield mock
 
 
+@fixture(autouse=True)
+def link_file_mock() -> Generator[Mock, None, None]:
+    with patch("personal_finances.merge_transactions.link_file") as mock:
+        yield mock
+
+
 @fixture(autouse=True)
 def listdir_mock() -> Generator[Mock, None, None]:
     with patch("personal_finances.merge_transactions.os.listdir") as mock:
@@ -27,7 +50,7 @@ def listdir_mock() -> Generator[Mock, None, None]:
 @fixture(autouse=True)
 def open_mock() -> Generator[Mock, None, None]:
     m = mock_open()
-    with patch("personal_finances.merge_transactions.open", m):
+    with patch("personal_finances.merge_transactions.open_text", m):
         yield m
 
 
@@ -139,10 +162,25 @@ WITHOUT_ID_TRANSACTIONS = [
 EXPECTED_WITHOUT_ID_MERGED = [
     new_transaction_without_id(45.0, "USD"),
     new_transaction_without_id(40.0, "USD"),
-    new_transaction_without_id(45.0, "USD"),
     new_transaction_without_id(-40.0, "USD"),
 ]
 
+# two identical payments fetched in one file, then again in later fetches
+REPEATED_WITHOUT_ID_TRANSACTIONS = [
+    [
+        new_transaction_without_id(10.0, "EUR"),
+        new_transaction_without_id(10.0, "EUR"),
+        new_transaction_without_id(20.0, "EUR"),
+    ],
+    [
+        new_transaction_without_id(10.0, "EUR"),
+        new_transaction_without_id(10.0, "EUR"),
+    ],
+    [new_transaction_without_id(10.0, "EUR")],
+]
+
+EXPECTED_REPEATED_WITHOUT_ID_MERGED = REPEATED_WITHOUT_ID_TRANSACTIONS[0]
+
 
 def assert_is_list_equal(
     return_list: List[NordigenTransaction],
@@ -186,6 +224,15 @@ def assert_is_list_equal(
             ],
             EXPECTED_WITHOUT_ID_MERGED,
         ),
+        (
+            ["transactions_a.json", "transactions_b.json", "transactions_c.json"],
+            3,
+            [
+                create_nordigen_tranctions(transactions)
+                for transactions in REPEATED_WITHOUT_ID_TRANSACTIONS
+            ],
+            EXPECTED_REPEATED_WITHOUT_ID_MERGED,
+        ),
     ],
 )
 def test_merge_transaction(
@@ -196,10 +243,11 @@ def test_merge_transaction(
     open_mock: Mock,
     listdir_mock: Mock,
     write_json_mock: Mock,
+    link_file_mock: Mock,
     datetime_mock: Mock,
 ) -> None:
     listdir_mock.return_value = transactions_file_names
-    open_mock.return_value.read.side_effect = transactions_list
+    open_mock.side_effect = [io.StringIO(content) for content in transactions_list]
     mock_dummy_datetime = "2024-01-01T10:00:00.00000"
     datetime_mock.now.return_value.isoformat.return_value = mock_dummy_datetime
 
@@ -207,19 +255,24 @@ def test_merge_transaction(
     result = runner.invoke(merge_transactions, [])
 
     assert result.exit_code == 0
+    write_json_mock.assert_called_once()
     assert (
-        write_json_mock.call_args_list[0].args[0]
+        write_json_mock.call_args.args[0]
         == f"data/merged_transactions-{mock_dummy_datetime}.json"
     )
     assert (
-        write_json_mock.call_args_list[1].args[0]
-        == "data/merged_transactions_latest.json"
+        write_json_mock.call_args.kwargs["compression_profile"]
+        == CompressionProfile.Working
+    )
+    link_file_mock.assert_called_once_with(
+        f"data/merged_transactions-{mock_dummy_datetime}.json",
+        "data/merged_transactions_latest.json",
     )
 
     assert_is_list_equal(
         return_list=write_json_mock.call_args.args[1], expected_list=merged_expected
     )
-    assert open_mock.return_value.read.call_count == valid_files_number
+    assert open_mock.call_count == valid_files_number
 
 
 def test_invalid_transaction_json_input(
@@ -229,7 +282,7 @@ def test_invalid_transaction_json_input(
         "transactions-2024-04-07.json",
     ]
     listdir_mock.return_value = mocked_files_names
-    open_mock.return_value.read.return_value = "{json:invalid{test"
+    open_mock.side_effect = lambda *_: io.StringIO("{json:invalid{test")
 
     runner = CliRunner()
     result = runner.invoke(merge_transactions, [])
@@ -254,6 +307,7 @@ def test_empty_data_folder_should_create_empty_output(
     open_mock: Mock,
     listdir_mock: Mock,
     write_json_mock: Mock,
+    link_file_mock: Mock,
     datetime_mock: Mock,
 ) -> None:
     listdir_mock.return_value = []
@@ -263,15 +317,375 @@ def test_empty_data_folder_should_create_empty_output(
     runner = CliRunner()
     result = runner.invoke(merge_transactions, [])
 
-    open_mock.return_value.read.assert_not_called()
+    open_mock.assert_not_called()
     assert result.exit_code == 0
     assert write_json_mock.call_args.args[1] == []
 
+    write_json_mock.assert_called_once()
     assert (
-        write_json_mock.call_args_list[0].args[0]
+        write_json_mock.call_args.args[0]
         == f"data/merged_transactions-{mock_dummy_datetime}.json"
     )
-    assert (
-        write_json_mock.call_args_list[1].args[0]
-        == "data/merged_transactions_latest.json"
+    link_file_mock.assert_called_once_with(
+        f"data/merged_transactions-{mock_dummy_datetime}.json",
+        "data/merged_transactions_latest.json",
+    )
+
+
+def run_merge_on_disk(
+    open_mock: Mock,
+    listdir_mock: Mock,
+    write_json_mock: Mock,
+    link_file_mock: Mock,
+    *params: str,
+) -> List[str]:
+    open_mock.reset_mock()
+    open_mock.side_effect = open_text
+    listdir_mock.side_effect = listdir
+    write_json_mock.side_effect = write_json
+    link_file_mock.side_effect = link_file
+
+    result = CliRunner().invoke(merge_transactions, list(params))
+
+    assert result.exit_code == 0
+    return [
+        call_args.args[0]
+        for call_args in open_mock.call_args_list
+        if call_args.args[0].startswith("data/transactions")
+        and call_args.args[1] == "r"
+    ]
+
+
+def read_merged_transactions() -> Any:
+    with open("data/merged_transactions_latest.json", "r") as merged_file:
+        return json.loads(merged_file.read())
+
+
+def test_incremental_merge_only_parses_new_files(
+    open_mock: Mock,
+    listdir_mock: Mock,
+    write_json_mock: Mock,
+    link_file_mock: Mock,
+    datetime_mock: Mock,
+    tmp_path: Any,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    os.mkdir("data")
+    datetime_mock.now.return_value.isoformat.return_value = "2024-01-01T10:00:00"
+    with open("data/transactions_a.json", "w") as transactions_file:
+        transactions_file.write(create_nordigen_tranctions(SAME_ID_TRANSACTIONS))
+
+    parsed_files = run_merge_on_disk(
+        open_mock, listdir_mock, write_json_mock, link_file_mock, "--incremental"
     )
+    assert parsed_files == ["data/transactions_a.json"]
+
+    with open("data/transactions_b.json", "w") as transactions_file:
+        transactions_file.write(
+            create_nordigen_tranctions(SAME_INTERNAL_ID_TRANSACTIONS)
+        )
+
+    parsed_files = run_merge_on_disk(
+        open_mock, listdir_mock, write_json_mock, link_file_mock, "--incremental"
+    )
+    assert parsed_files == ["data/transactions_b.json"]
+    assert_is_list_equal(read_merged_transactions(), EXPECTED_SAME_ID_MERGED)
+
+    parsed_files = run_merge_on_disk(
+        open_mock, listdir_mock, write_json_mock, link_file_mock, "--incremental"
+    )
+    assert parsed_files == []
+    assert_is_list_equal(read_merged_transactions(), EXPECTED_SAME_ID_MERGED)
+
+    with open("data/merged_transactions_manifest.json", "r") as manifest_file:
+        manifest = json.loads(manifest_file.read())
+    assert manifest["mergedTransactionsPath"] == "data/merged_transactions_latest.json"
+    assert sorted(
+        ingested_file["path"] for ingested_file in manifest["ingestedFiles"]
+    ) == [
+        "data/transactions_a.json",
+        "data/transactions_b.json",
+    ]
+
+
+def test_incremental_merge_ignores_manifest_of_other_compression(
+    open_mock: Mock,
+    listdir_mock: Mock,
+    write_json_mock: Mock,
+    link_file_mock: Mock,
+    datetime_mock: Mock,
+    tmp_path: Any,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    os.mkdir("data")
+    datetime_mock.now.return_value.isoformat.return_value = "2024-01-01T10:00:00"
+    with open("data/transactions_a.json", "w") as transactions_file:
+        transactions_file.write(create_nordigen_tranctions(SAME_ID_TRANSACTIONS))
+    run_merge_on_disk(
+        open_mock, listdir_mock, write_json_mock, link_file_mock, "-c", "gz"
+    )
+    with open("data/transactions_b.json", "w") as transactions_file:
+        transactions_file.write(
+            create_nordigen_tranctions(SAME_INTERNAL_ID_TRANSACTIONS)
+        )
+    datetime_mock.now.return_value.isoformat.return_value = "2024-01-01T11:00:00"
+    run_merge_on_disk(
+        open_mock, listdir_mock, write_json_mock, link_file_mock, "--incremental"
+    )
+    datetime_mock.now.return_value.isoformat.return_value = "2024-01-01T12:00:00"
+
+    # the gz merged file misses transactions_b, ingested into the uncompressed one
+    parsed_files = run_merge_on_disk(
+        open_mock,
+        listdir_mock,
+        write_json_mock,
+        link_file_mock,
+        "--incremental",
+        "-c",
+        "gz",
+    )
+
+    assert sorted(parsed_files) == [
+        "data/transactions_a.json",
+        "data/transactions_b.json",
+    ]
+    with open_text("data/merged_transactions_latest.json.gz", "r") as merged_file:
+        assert_is_list_equal(json.loads(merged_file.read()), EXPECTED_SAME_ID_MERGED)
+
+
+def test_incremental_merge_keeps_identical_transactions_of_one_file(
+    open_mock: Mock,
+    listdir_mock: Mock,
+    write_json_mock: Mock,
+    link_file_mock: Mock,
+    datetime_mock: Mock,
+    tmp_path: Any,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    os.mkdir("data")
+    datetime_mock.now.return_value.isoformat.return_value = "2024-01-01T10:00:00"
+    for index, transactions in enumerate(REPEATED_WITHOUT_ID_TRANSACTIONS):
+        with open(f"data/transactions_{index}.json", "w") as transactions_file:
+            transactions_file.write(create_nordigen_tranctions(transactions))
+        run_merge_on_disk(
+            open_mock, listdir_mock, write_json_mock, link_file_mock, "--incremental"
+        )
+
+        assert read_merged_transactions() == EXPECTED_REPEATED_WITHOUT_ID_MERGED
+
+
+def test_parallel_merge_matches_sequential_merge(
+    open_mock: Mock,
+    listdir_mock: Mock,
+    write_json_mock: Mock,
+    link_file_mock: Mock,
+    datetime_mock: Mock,
+    tmp_path: Any,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    os.mkdir("data")
+    datetime_mock.now.return_value.isoformat.return_value = "2024-01-01T10:00:00"
+    for index, transactions in enumerate(
+        [
+            SAME_ID_TRANSACTIONS,
+            SAME_INTERNAL_ID_TRANSACTIONS,
+            *WITHOUT_ID_TRANSACTIONS,
+            list(reversed(SAME_ID_TRANSACTIONS)),
+        ]
+    ):
+        with open(f"data/transactions_{index}.json", "w") as transactions_file:
+            transactions_file.write(create_nordigen_tranctions(transactions))
+
+    run_merge_on_disk(open_mock, listdir_mock, write_json_mock, link_file_mock)
+    sequential_merged_transactions = read_merged_transactions()
+
+    parsed_files = run_merge_on_disk(
+        open_mock, listdir_mock, write_json_mock, link_file_mock, "--workers", "3"
+    )
+
+    assert parsed_files == []
+    assert read_merged_transactions() == sequential_merged_transactions
+    assert len(sequential_merged_transactions) == len(EXPECTED_SAME_ID_MERGED) + len(
+        EXPECTED_WITHOUT_ID_MERGED
+    )
+
+
+def test_merge_rejects_invalid_workers(write_json_mock: Mock) -> None:
+    result = CliRunner().invoke(merge_transactions, ["--workers", "0"])
+
+    assert result.exit_code != 0
+    write_json_mock.assert_not_called()
+
+
+def test_merge_upserts_into_store(
+    open_mock: Mock,
+    listdir_mock: Mock,
+    write_json_mock: Mock,
+    link_file_mock: Mock,
+    datetime_mock: Mock,
+    tmp_path: Any,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    os.mkdir("data")
+    datetime_mock.now.return_value.isoformat.return_value = "2024-01-01T10:00:00"
+    for index, transactions in enumerate(
+        [SAME_ID_TRANSACTIONS, SAME_INTERNAL_ID_TRANSACTIONS]
+    ):
+        with open(f"data/transactions_{index}.json", "w") as transactions_file:
+            transactions_file.write(create_nordigen_tranctions(transactions))
+
+    for _ in range(2):
+        run_merge_on_disk(
+            open_mock,
+            listdir_mock,
+            write_json_mock,
+            link_file_mock,
+            "-sp",
+            "data/transactions.db",
+        )
+
+    with TransactionStore("data/transactions.db") as store:
+        assert_is_list_equal(list(store.iter_all()), read_merged_transactions())
+
+
+def test_merge_writes_snapshot(
+    open_mock: Mock,
+    listdir_mock: Mock,
+    write_json_mock: Mock,
+    link_file_mock: Mock,
+    datetime_mock: Mock,
+    tmp_path: Any,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    with open("tests/test_data/transactions/test_transaction.json", "r") as file:
+        test_transactions = json.loads(file.read())
+    monkeypatch.chdir(tmp_path)
+    os.mkdir("data")
+    datetime_mock.now.return_value.isoformat.return_value = "2024-01-01T10:00:00"
+    with open("data/transactions_a.json", "w") as transactions_file:
+        transactions_file.write(create_nordigen_tranctions(test_transactions))
+
+    run_merge_on_disk(
+        open_mock,
+        listdir_mock,
+        write_json_mock,
+        link_file_mock,
+        "-ssp",
+        "data/snapshot",
+    )
+
+    assert len(TransactionSnapshot("data/snapshot")) == len(test_transactions)
+
+
+def reorder_fields(transaction: NordigenTransaction) -> NordigenTransaction:
+    return cast(NordigenTransaction, dict(reversed(list(transaction.items()))))
+
+
+def test_dedupe_winner_does_not_depend_on_order() -> None:
+    transactions = [
+        new_transaction_only_with_id(15.0, "same_id", "EUR"),
+        new_transaction_only_with_id(45.0, "same_id", "EUR"),
+        new_transaction_only_with_id(45.0, "same_id", "USD"),
+    ]
+    expected_winner = dedupe_transactions(transactions)
+
+    for permutation in itertools.permutations(transactions):
+        assert dedupe_transactions(permutation) == expected_winner
+        assert dedupe_transactions(map(reorder_fields, permutation)) == expected_winner
+
+
+def test_dedupe_prefers_more_fields_and_keeps_id_order() -> None:
+    transactions = (
+        transaction
+        for transaction in [
+            new_transaction_only_with_id(15.0, "first_id", "EUR"),
+            new_transaction_only_with_id(45.0, "same_id", "EUR"),
+            new_transaction(45.0, "same_id", "inter_id", "EUR"),
+            new_transaction_only_with_id(10.0, "last_id", "EUR"),
+            new_transaction_only_with_id(45.0, "same_id", "EUR"),
+        ]
+    )
+
+    assert dedupe_transactions(transactions) == [
+        new_transaction_only_with_id(15.0, "first_id", "EUR"),
+        new_transaction(45.0, "same_id", "inter_id", "EUR"),
+        new_transaction_only_with_id(10.0, "last_id", "EUR"),
+    ]
+
+
+def test_merge_compressed_files(
+    open_mock: Mock,
+    listdir_mock: Mock,
+    write_json_mock: Mock,
+    link_file_mock: Mock,
+    datetime_mock: Mock,
+    tmp_path: Any,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    os.mkdir("data")
+    datetime_mock.now.return_value.isoformat.return_value = "2024-01-01T10:00:00"
+    with gzip.open("data/transactions_a.json.gz", "wt") as transactions_file:
+        transactions_file.write(create_nordigen_tranctions(SAME_ID_TRANSACTIONS))
+    with open("data/transactions_b.json", "w") as transactions_file:
+        transactions_file.write(
+            create_nordigen_tranctions(SAME_INTERNAL_ID_TRANSACTIONS)
+        )
+
+    for expected_parsed_files in [
+        ["data/transactions_a.json.gz", "data/transactions_b.json"],
+        [],
+    ]:
+        parsed_files = run_merge_on_disk(
+            open_mock,
+            listdir_mock,
+            write_json_mock,
+            link_file_mock,
+            "--incremental",
+            "--compression",
+            "xz",
+        )
+        assert sorted(parsed_files) == expected_parsed_files
+
+    for merged_path in [
+        "data/merged_transactions_latest.json.xz",
+        "data/merged_transactions-2024-01-01T10:00:00.json.xz",
+    ]:
+        with lzma.open(merged_path, "rt") as merged_file:
+            assert_is_list_equal(
+                json.loads(merged_file.read()), EXPECTED_SAME_ID_MERGED
+            )
+
+
+def test_merge_links_latest_to_single_written_file(
+    open_mock: Mock,
+    listdir_mock: Mock,
+    write_json_mock: Mock,
+    link_file_mock: Mock,
+    datetime_mock: Mock,
+    tmp_path: Any,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    os.mkdir("data")
+    with open("data/transactions_a.json", "w") as transactions_file:
+        transactions_file.write(create_nordigen_tranctions(SAME_ID_TRANSACTIONS))
+
+    for timestamp in ["2024-01-01T10:00:00", "2024-01-02T10:00:00"]:
+        datetime_mock.now.return_value.isoformat.return_value = timestamp
+        run_merge_on_disk(
+            open_mock, listdir_mock, write_json_mock, link_file_mock, "--incremental"
+        )
+
+        assert os.path.samefile(
+            "data/merged_transactions_latest.json",
+            f"data/merged_transactions-{timestamp}.json",
+        )
+
+    assert write_json_mock.call_count == 4
+    assert not any(file_name.startswith(".tmp-") for file_name in listdir("data"))
@@ -0,0 +1,140 @@
+from datetime import datetime, timezone
+from typing import Any, List
+from unittest.mock import patch
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+from personal_finances.bank_interface.nordigen_adapter import (
+    NordigenTransaction,
+    as_simple_transaction,
+)
+from personal_finances.transaction_snapshot import (
+    SnapshotVersionMismatch,
+    TransactionSnapshot,
+    write_snapshot,
+)
+
+
+def load_test_transactions() -> List[NordigenTransaction]:
+    with open("tests/test_data/transactions/test_transaction.json", "r") as file:
+        return list(json.loads(file.read()))
+
+
+@pytest.mark.parametrize("minor_units", [False, True])
+def test_snapshot_round_trip(minor_units: bool, tmp_path: Any) -> None:
+    raw_transactions = load_test_transactions()
+    # read in the order written, not by booking datetime
+    expected_transactions = [
+        as_simple_transaction(transaction, minor_units=minor_units)
+        for transaction in raw_transactions
+    ]
+
+    assert write_snapshot(f"{tmp_path}/snapshot", raw_transactions) == len(
+        raw_transactions
+    )
+    snapshot = TransactionSnapshot(f"{tmp_path}/snapshot")
+
+    assert len(snapshot) == len(raw_transactions)
+    assert snapshot.all(minor_units) == expected_transactions
+
+
+def test_snapshot_between(tmp_path: Any) -> None:
+    raw_transactions = load_test_transactions()
+    write_snapshot(str(tmp_path), raw_transactions)
+    snapshot = TransactionSnapshot(str(tmp_path))
+    start = datetime(2024, 2, 28, tzinfo=timezone.utc)
+    end = datetime(2024, 3, 20, tzinfo=timezone.utc)
+
+    transactions = snapshot.between(start, end)
+
+    assert len(transactions) > 0
+    assert transactions == [
+        transaction
+        for transaction in snapshot.all()
+        if start <= transaction["datetime"] <= end
+    ]
+    assert snapshot.between(end, end.replace(year=2025)) != []
+    assert snapshot.between(end.replace(year=2030), end.replace(year=2031)) == []
+
+
+def test_empty_snapshot(tmp_path: Any) -> None:
+    write_snapshot(str(tmp_path), [])
+    snapshot = TransactionSnapshot(str(tmp_path))
+
+    assert len(snapshot) == 0
+    assert snapshot.all() == []
+
+
+def test_snapshot_version_mismatch(tmp_path: Any) -> None:
+    write_snapshot(str(tmp_path), [])
+    with open(f"{tmp_path}/metadata.json", "r") as metadata_file:
+        metadata = json.loads(metadata_file.read())
+    with open(f"{tmp_path}/metadata.json", "w") as metadata_file:
+        metadata_file.write(json.dumps({**metadata, "version": 0}))
+
+    with pytest.raises(SnapshotVersionMismatch):
+        TransactionSnapshot(str(tmp_path))
+
+
+def test_snapshot_is_replaced(tmp_path: Any) -> None:
+    raw_transactions = load_test_transactions()
+    snapshot_path = f"{tmp_path}/data/snapshot"
+    write_snapshot(snapshot_path, raw_transactions)
+    write_snapshot(snapshot_path, raw_transactions[:2])
+
+    assert len(TransactionSnapshot(snapshot_path)) == 2
+    assert os.listdir(f"{tmp_path}/data") == ["snapshot"]
+
+
+def test_failed_snapshot_keeps_previous(tmp_path: Any) -> None:
+    raw_transactions = load_test_transactions()
+    write_snapshot(str(tmp_path / "snapshot"), raw_transactions)
+
+    with patch(
+        "personal_finances.transaction_snapshot._save_array",
+        side_effect=OSError("disk full"),
+    ):
+        with pytest.raises(OSError):
+            write_snapshot(str(tmp_path / "snapshot"), raw_transactions[:2])
+
+    assert len(TransactionSnapshot(str(tmp_path / "snapshot"))) == len(raw_transactions)
+    assert os.listdir(tmp_path) == ["snapshot"]
+
+
+def test_numpy_is_imported_lazily() -> None:
+    imported_modules = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys\n"
+            + "import personal_finances.generate_reports\n"
+            + "import personal_finances.merge_transactions\n"
+            + "print('numpy' in sys.modules)",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+    assert imported_modules.stdout.strip() == "False"
+
+
+def test_snapshot_keeps_utc_offsets(tmp_path: Any) -> None:
+    raw_transactions = load_test_transactions()[:3]
+    raw_transactions[0]["bookingDatetime"] = "2024-03-08T08:33:00+01:00"
+    raw_transactions[1]["bookingDatetime"] = "2024-03-08T08:33:00.250000"
+    write_snapshot(str(tmp_path), raw_transactions)
+
+    datetimes = [
+        transaction["datetime"]
+        for transaction in TransactionSnapshot(str(tmp_path)).all()
+    ]
+
+    assert [moment.isoformat() for moment in datetimes] == [
+        "2024-03-08T08:33:00+01:00",
+        "2024-03-08T08:33:00.250000",
+        "2024-03-21T00:00:00+00:00",
+    ]
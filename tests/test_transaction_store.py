@@ -0,0 +1,87 @@
+from datetime import datetime, timezone
+from typing import Any, List
+import random
+
+from personal_finances.bank_interface.nordigen_adapter import (
+    NordigenTransaction,
+    get_id,
+)
+from personal_finances.merge_transactions import dedupe_transactions
+from personal_finances.transaction_store import TransactionStore
+
+
+def new_transaction(
+    transaction_id: str, booking_date: str, amount: float
+) -> NordigenTransaction:
+    return NordigenTransaction(
+        bookingDate=booking_date,
+        transactionAmount={"amount": amount, "currency": "EUR"},
+        transactionId=transaction_id,
+    )
+
+
+def create_random_transactions(size: int) -> List[NordigenTransaction]:
+    random.seed(size)
+    transactions = []
+    for _ in range(size):
+        transaction = new_transaction(
+            f"transaction_{random.randint(0, size // 2)}",
+            f"2024-{random.randint(1, 12):02}-{random.randint(1, 28):02}",
+            random.choice([10.0, -20.5]),
+        )
+        if random.random() < 0.5:
+            transaction["creditorName"] = "some creditor"
+        transactions.append(transaction)
+    return transactions
+
+
+def test_upsert_dedupes_like_merge(tmp_path: Any) -> None:
+    transactions = create_random_transactions(200)
+
+    with TransactionStore(f"{tmp_path}/store/transactions.db") as store:
+        store.upsert(transactions[:100])
+        store.upsert(transactions[100:])
+
+        stored_transactions = list(store.iter_all())
+        deduped_transactions = dedupe_transactions(transactions)
+        assert len(store) == len(deduped_transactions)
+        # same transactions in the merged order
+        assert stored_transactions == deduped_transactions
+
+
+def test_store_is_persisted(tmp_path: Any) -> None:
+    store_path = f"{tmp_path}/transactions.db"
+    transaction = new_transaction("id", "2024-01-01", 10.0)
+    with TransactionStore(store_path) as store:
+        store.upsert([transaction])
+
+    with TransactionStore(store_path) as store:
+        assert len(store) == 1
+        assert store.get("id") == transaction
+        assert store.get("unknown") is None
+
+
+def test_iter_between_booking_datetimes(tmp_path: Any) -> None:
+    transactions = [
+        new_transaction("march", "2024-03-01", 1.0),
+        new_transaction("january", "2024-01-01", 1.0),
+        new_transaction("february", "2024-02-01", 1.0),
+        new_transaction("april", "2024-04-01", 1.0),
+    ]
+
+    with TransactionStore(f"{tmp_path}/transactions.db") as store:
+        store.upsert(transactions)
+
+        assert [
+            get_id(transaction)
+            for transaction in store.iter_between(
+                datetime(2024, 2, 1, tzinfo=timezone.utc),
+                datetime(2024, 3, 1, tzinfo=timezone.utc),
+            )
+        ] == ["march", "february"]
+        assert [get_id(transaction) for transaction in store.iter_all()] == [
+            "march",
+            "january",
+            "february",
+            "april",
+        ]
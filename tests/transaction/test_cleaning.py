@@ -1,6 +1,11 @@
 from unittest.mock import Mock, patch
 from typing import List, Generator, Optional
-from personal_finances.transaction.cleaning import remove_internal_transfers
+from personal_finances.transaction.cleaning import (
+    get_internal_transfer_window,
+    internal_transfer_window_filter,
+    remove_internal_transfers,
+)
+from personal_finances.transaction.filtering import transaction_datetime_filter
 from personal_finances.transaction.definition import SimpleTransaction
 from datetime import datetime, timedelta
 import random
@@ -205,3 +210,80 @@ def test_raising_error_at_get_user_config(user_config_mock: Mock) -> None:
     user_config_mock.side_effect = [user_config_mock.return_value, OSError]
     with pytest.raises(OSError):
         assert_transaction_list(one_internal_transaction, REGULAR_TRANSACTIONS_LIST)
+
+
+def create_transfer_candidate(
+    index: int, transfer_datetime: datetime
+) -> SimpleTransaction:
+    return SimpleTransaction(
+        transactionId=f"transfer_{index}",
+        datetime=transfer_datetime,
+        amount=10 if index % 2 == 0 else -10,
+        referenceText=INTERNAL_TRANSFER_REFERENCES[index % 2],
+        bankTransactionCode="dummy_transaction_code",
+    )
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_internal_transfer_window_filter_matches_full_history(seed: int) -> None:
+    """
+    Removing internal transfers after the window pre-filter keeps exactly the
+    same transactions within the range as removing them from the whole history.
+    """
+    random.seed(seed)
+    history_start = datetime(2024, 1, 1)
+    transactions = []
+    for index in range(120):
+        is_transfer = random.random() < 0.6
+        transactions.append(
+            SimpleTransaction(
+                transactionId=f"transaction_{index}",
+                datetime=history_start + timedelta(days=random.uniform(0, 150)),
+                amount=random.choice([-35, -20, 20, 35, 50]),
+                referenceText=(
+                    INTERNAL_TRANSFER_REFERENCES[index % 2]
+                    if is_transfer
+                    else "regular reference"
+                ),
+                bankTransactionCode="dummy_transaction_code",
+            )
+        )
+    start = history_start + timedelta(days=random.uniform(0, 100))
+    end = start + timedelta(days=random.uniform(0, 50))
+
+    assert transaction_datetime_filter(
+        start,
+        end,
+        remove_internal_transfers(
+            internal_transfer_window_filter(start, end, transactions)
+        ),
+    ) == transaction_datetime_filter(
+        start, end, remove_internal_transfers(transactions)
+    )
+
+
+def test_internal_transfer_window_follows_candidate_chain() -> None:
+    history_start = datetime(2024, 1, 1)
+    chained_transfers = [
+        create_transfer_candidate(
+            index,
+            history_start + timedelta(days=index * (BANK_PROCESSING_TIME_IN_DAYS - 1)),
+        )
+        for index in range(5)
+    ]
+    far_transfer = create_transfer_candidate(5, history_start + timedelta(days=100))
+    start = history_start + timedelta(days=8)
+    end = history_start + timedelta(days=9)
+
+    assert get_internal_transfer_window(
+        REGULAR_TRANSACTIONS_LIST + chained_transfers + [far_transfer], start, end
+    ) == (chained_transfers[0]["datetime"], chained_transfers[-1]["datetime"])
+
+
+def test_internal_transfer_window_without_candidates() -> None:
+    start = datetime(2024, 1, 1)
+    end = datetime(2024, 2, 1)
+    assert get_internal_transfer_window(REGULAR_TRANSACTIONS_LIST, start, end) == (
+        start,
+        end,
+    )
@@ -0,0 +1,70 @@
+from datetime import datetime
+from typing import Dict
+import pickle
+import pytest
+
+from personal_finances.transaction.definition import (
+    TransactionRecord,
+    extend_transaction,
+)
+
+
+def create_record() -> TransactionRecord:
+    return TransactionRecord(
+        transactionId="transaction_0",
+        datetime=datetime(2024, 1, 1),
+        amount=-10.5,
+        referenceText="netflix monthly",
+        bankTransactionCode="card",
+    )
+
+
+def test_record_mapping_protocol() -> None:
+    record = create_record()
+
+    assert record["amount"] == -10.5
+    assert "amount" in record
+    assert "groupNumber" not in record
+    assert record.get("groupNumber") is None
+    assert record.get("unknown", "default") == "default"
+    assert list(record) == [
+        "transactionId",
+        "datetime",
+        "amount",
+        "referenceText",
+        "bankTransactionCode",
+    ]
+    assert len(record) == 5
+    assert {**record} == record.as_dict()
+    with pytest.raises(KeyError):
+        record["groupNumber"]
+    with pytest.raises(KeyError):
+        record["unknown"] = 1
+
+
+def test_record_equals_dict_transaction() -> None:
+    record = create_record()
+
+    assert record == record.as_dict()
+    assert record == create_record()
+    assert record != {**record.as_dict(), "amount": 10}
+    assert pickle.loads(pickle.dumps(record)) == record
+
+
+def test_extend_record_in_place() -> None:
+    record = create_record()
+
+    extended_record = extend_transaction(record, groupNumber=1, groupName="netflix")
+
+    assert extended_record is record
+    assert record["groupNumber"] == 1
+    assert list(record)[-2:] == ["groupNumber", "groupName"]
+
+
+def test_extend_dict_transaction_copies() -> None:
+    transaction: Dict = create_record().as_dict()
+
+    extended_transaction = extend_transaction(transaction, groupNumber=1)
+
+    assert extended_transaction == {**transaction, "groupNumber": 1}
+    assert "groupNumber" not in transaction
@@ -1,9 +1,22 @@
 import pytest
 from datetime import datetime, timedelta
-from typing import List
+from typing import Any, Dict, List, cast
 
 from personal_finances.transaction.definition import SimpleTransaction
-from personal_finances.transaction.filtering import transaction_datetime_filter
+from personal_finances.transaction.filtering import (
+    AllOf,
+    AnyOf,
+    FieldBetween,
+    TransactionIndex,
+    TransactionPredicate,
+    amount_between,
+    bank_transaction_code_in,
+    category_in,
+    datetime_between,
+    filter_transactions,
+    reference_contains,
+    transaction_datetime_filter,
+)
 
 TEST_START_DATETIME = datetime(1994, 1, 2, 3, 4, 5)
 TEST_END_DATETIME = datetime(1994, 1, 2, 3, 4, 7)
@@ -71,3 +84,153 @@ def test_invalid_datetime_input_should_raise_exception() -> None:
             end=TEST_START_DATETIME,
             transactions=transaction_list,
         )
+
+
+def test_transaction_index_between_matches_filter() -> None:
+    transactions = [
+        create_transaction(
+            index, TEST_START_DATETIME + timedelta(hours=(index * 7) % 50)
+        )
+        for index in range(50)
+    ]
+    transaction_index = TransactionIndex(transactions)
+
+    for start_hour, end_hour in [(0, 49), (3, 3), (10, 20), (48, 100), (-5, -1)]:
+        start = TEST_START_DATETIME + timedelta(hours=start_hour)
+        end = TEST_START_DATETIME + timedelta(hours=end_hour)
+        assert transaction_index.between(start, end) == sorted(
+            transaction_datetime_filter(start, end, transactions),
+            key=lambda transaction: transaction["datetime"],
+        )
+
+
+def test_transaction_index_keeps_insertion_order_on_ties() -> None:
+    transactions = [
+        create_transaction(1, TEST_END_DATETIME),
+        create_transaction(2, TEST_START_DATETIME),
+        create_transaction(3, TEST_END_DATETIME),
+    ]
+    transaction_index = TransactionIndex(transactions)
+    transaction_index.add(create_transaction(4, TEST_START_DATETIME))
+
+    assert len(transaction_index) == 4
+    assert [
+        transaction["transactionId"]
+        for transaction in transaction_index.between(
+            TEST_START_DATETIME, TEST_END_DATETIME
+        )
+    ] == ["transaction_2", "transaction_4", "transaction_1", "transaction_3"]
+
+
+def test_transaction_index_between_ranges() -> None:
+    transactions = [
+        create_transaction(index, datetime(2024, 1 + index % 12, 15))
+        for index in range(24)
+    ]
+    monthly_ranges = [
+        (datetime(2024, month, 1), datetime(2024, month, 28)) for month in range(1, 13)
+    ]
+
+    monthly_transactions = TransactionIndex(transactions).between_ranges(monthly_ranges)
+
+    assert [len(month) for month in monthly_transactions] == [2] * 12
+    assert monthly_transactions[0] == [transactions[0], transactions[12]]
+
+
+def test_transaction_index_invalid_range_should_raise_exception() -> None:
+    with pytest.raises(ValueError):
+        TransactionIndex([]).between(TEST_END_DATETIME, TEST_START_DATETIME)
+
+
+def create_categorized_transaction(
+    index: int, amount: float, reference: str, code: str, category: str
+) -> SimpleTransaction:
+    return cast(
+        SimpleTransaction,
+        {
+            **create_transaction(index, TEST_START_DATETIME + timedelta(days=index)),
+            "amount": amount,
+            "referenceText": reference,
+            "bankTransactionCode": code,
+            "customCategory": category,
+        },
+    )
+
+
+CATEGORIZED_TRANSACTIONS = [
+    create_categorized_transaction(0, -10, "netflix", "card", "entertainment"),
+    create_categorized_transaction(1, -500, "Rent Apartment", "transfer", "house"),
+    create_categorized_transaction(2, 2000, "salary company", "transfer", "salary"),
+    create_categorized_transaction(3, -25.5, "burger king", "card", "restaurant"),
+    create_categorized_transaction(4, -60, "ikea", "card", "house"),
+]
+
+
+def get_transaction_ids(transactions: List[SimpleTransaction]) -> List[str]:
+    return [transaction["transactionId"] for transaction in transactions]
+
+
+@pytest.mark.parametrize(
+    "predicate,expected_indexes",
+    [
+        (amount_between(-100, 0), [0, 3, 4]),
+        (amount_between(maximum=-100), [1]),
+        (amount_between(minimum=0), [2]),
+        (bank_transaction_code_in(["transfer"]), [1, 2]),
+        (reference_contains("APARTMENT"), [1]),
+        (category_in({"house", "salary"}), [1, 2, 4]),
+        (
+            datetime_between(
+                TEST_START_DATETIME + timedelta(days=1),
+                TEST_START_DATETIME + timedelta(days=3),
+            ),
+            [1, 2, 3],
+        ),
+        (amount_between(maximum=0) & bank_transaction_code_in(["card"]), [0, 3, 4]),
+        (category_in(["house"]) | reference_contains("netflix"), [0, 1, 4]),
+        (~category_in(["house"]) & amount_between(maximum=0), [0, 3]),
+        (
+            AnyOf(
+                AllOf(category_in(["house"]), amount_between(minimum=-100)),
+                reference_contains("burger"),
+            ),
+            [3, 4],
+        ),
+        (AllOf(), [0, 1, 2, 3, 4]),
+        (AnyOf(), []),
+        (FieldBetween("amount"), [0, 1, 2, 3, 4]),
+    ],
+)
+def test_filter_transactions_with_predicates(
+    predicate: TransactionPredicate, expected_indexes: List[int]
+) -> None:
+    expected_ids = [f"transaction_{index}" for index in expected_indexes]
+    assert (
+        get_transaction_ids(filter_transactions(predicate, CATEGORIZED_TRANSACTIONS))
+        == expected_ids
+    )
+
+    columns: Dict[str, List[Any]] = {
+        field: [
+            cast(Dict, transaction)[field] for transaction in CATEGORIZED_TRANSACTIONS
+        ]
+        for field in cast(Dict, CATEGORIZED_TRANSACTIONS[0])
+    }
+    assert predicate.compile_mask()(columns) == [
+        f"transaction_{index}" in expected_ids for index in range(5)
+    ]
+
+
+def test_predicate_values_are_not_evaluated_as_code() -> None:
+    malicious_reference = "') or True or ('"
+    assert (
+        filter_transactions(
+            reference_contains(malicious_reference), CATEGORIZED_TRANSACTIONS
+        )
+        == []
+    )
+
+
+def test_invalid_predicate_range_should_raise_exception() -> None:
+    with pytest.raises(ValueError):
+        amount_between(10, -10)
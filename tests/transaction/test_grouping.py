@@ -0,0 +1,102 @@
+from unittest.mock import Mock, patch
+from datetime import datetime
+from typing import Dict, Generator, List, cast
+import pytest
+
+from personal_finances.transaction.definition import (
+    SimpleTransaction,
+    TransactionRecord,
+)
+from personal_finances.transaction.grouping import (
+    TransactionGroupingType,
+    group_transactions,
+)
+
+
+@pytest.fixture(autouse=True)
+def user_config_mock() -> Generator[Mock, None, None]:
+    with patch(
+        "personal_finances.transaction.grouping.get_user_configuration"
+    ) as u_mock:
+        u_mock.return_value.FilterReferenceWordsForGrouping = ["kartenzahlung"]
+        yield u_mock
+
+
+def create_transaction(index: int, amount: float, reference: str) -> SimpleTransaction:
+    return SimpleTransaction(
+        transactionId=f"transaction_{index}",
+        datetime=datetime(2024, 1, 1),
+        amount=amount,
+        referenceText=reference,
+        bankTransactionCode="dummy_transaction_code",
+    )
+
+
+TRANSACTIONS: List[SimpleTransaction] = [
+    create_transaction(0, -10.5, "netflix monthly kartenzahlung"),
+    create_transaction(1, -300, "rent apartment"),
+    create_transaction(2, -10.5, "netflix monthly"),
+    create_transaction(3, -12, "netflix monthly 12345678"),
+]
+
+
+def test_group_transactions_returns_group_table() -> None:
+    grouped_transactions, groups, group_table = group_transactions(
+        TRANSACTIONS, TransactionGroupingType.ReferenceSimilarity
+    )
+
+    assert [transaction["groupNumber"] for transaction in grouped_transactions] == [
+        0,
+        1,
+        0,
+        0,
+    ]
+    assert len(groups) == len(group_table) == 2
+    assert group_table[0]["groupNumber"] == 0
+    assert group_table[0]["size"] == 3
+    assert group_table[0]["amount"] == -33
+    assert group_table[0]["references"] == [
+        "netflix monthly kartenzahlung",
+        "netflix monthly",
+        "netflix monthly 12345678",
+    ]
+    assert group_table[0]["representativeReference"] == "netflix monthly kartenzahlung"
+    assert group_table[1]["size"] == 1
+    assert group_table[1]["amount"] == -300
+    assert group_table[1]["representativeReference"] == "rent apartment"
+
+
+def test_grouped_transactions_names_match_group_table() -> None:
+    grouped_transactions, _, group_table = group_transactions(
+        TRANSACTIONS, TransactionGroupingType.ReferenceSimilarity
+    )
+
+    for transaction in grouped_transactions:
+        group_name = group_table[transaction["groupNumber"]]["groupName"]
+        assert transaction.get("groupName") == group_name
+
+
+def test_group_transactions_unsupported_grouping_type() -> None:
+    with pytest.raises(NotImplementedError):
+        group_transactions(TRANSACTIONS, TransactionGroupingType.Category)
+
+
+def test_group_transaction_records_in_place() -> None:
+    records = [
+        TransactionRecord(**cast(Dict, transaction)) for transaction in TRANSACTIONS
+    ]
+
+    grouped_transactions, _, _ = group_transactions(
+        cast(List[SimpleTransaction], records),
+        TransactionGroupingType.ReferenceSimilarity,
+    )
+    expected_transactions, _, _ = group_transactions(
+        TRANSACTIONS, TransactionGroupingType.ReferenceSimilarity
+    )
+
+    assert all(
+        cast(object, grouped) is record
+        for grouped, record in zip(grouped_transactions, records)
+    )
+    assert grouped_transactions == expected_transactions
+    assert all("groupNumber" not in transaction for transaction in TRANSACTIONS)
@@ -0,0 +1,178 @@
+from unittest.mock import Mock, patch
+from datetime import datetime
+from typing import Any, Dict, Generator, List, cast
+import random
+import pytest
+
+from personal_finances.transaction.definition import SimpleTransaction
+from personal_finances.transaction.processing import (
+    PivotDimension,
+    get_zero_amount,
+    pivot_amount,
+    sum_amount,
+    sum_amount_by,
+)
+
+
+@pytest.fixture(autouse=True)
+def user_config_mock() -> Generator[Mock, None, None]:
+    with patch("personal_finances.transaction.type.get_user_configuration") as u_mock:
+        income_category = Mock()
+        income_category.CategoryReferences = ["salary"]
+        u_mock.return_value.IncomeCategoryDefinition = [income_category]
+        u_mock.return_value.ExpenseTransactionCodes = ["card"]
+        yield u_mock
+
+
+def create_transaction(
+    index: int,
+    amount: float,
+    category: str,
+    group_number: int,
+    month: int = 1,
+    reference: str = "reference",
+    code: str = "card",
+) -> SimpleTransaction:
+    return cast(
+        SimpleTransaction,
+        {
+            "transactionId": f"transaction_{index}",
+            "datetime": datetime(2024, month, 1 + index % 28),
+            "amount": amount,
+            "referenceText": f"{reference} {index}",
+            "bankTransactionCode": code,
+            "groupNumber": group_number,
+            "customCategory": category,
+        },
+    )
+
+
+def create_random_transactions(size: int) -> List[SimpleTransaction]:
+    random.seed(size)
+    return [
+        create_transaction(
+            index,
+            round(random.uniform(-100, 100), 2),
+            random.choice(["house", "food", "travel"]),
+            random.randint(0, 5),
+            month=random.randint(1, 12),
+        )
+        for index in range(size)
+    ]
+
+
+def get_field(field: str) -> Any:
+    return lambda transaction: cast(Dict, transaction)[field]
+
+
+def by_key(amounts: List[Dict]) -> Dict[Any, Dict]:
+    return {
+        entry["key"]: {
+            "amount": pytest.approx(entry["amount"]),
+            "references": sorted(entry["references"]),
+        }
+        for entry in amounts
+    }
+
+
+@pytest.mark.parametrize("size", [0, 1, 10, 200])
+def test_single_dimension_pivot_matches_sum_amount_by(size: int) -> None:
+    transactions = create_random_transactions(size)
+    cube = pivot_amount(transactions, [PivotDimension.Category])
+
+    assert cube.total() == sum_amount(transactions)
+    assert cube.amount_by(PivotDimension.Category) == sum_amount_by(
+        transactions, key=get_field("customCategory")
+    )
+    assert cube.total(where={PivotDimension.Category: "house"}) == sum_amount(
+        [
+            transaction
+            for transaction in transactions
+            if cast(Dict, transaction)["customCategory"] == "house"
+        ]
+    )
+
+
+@pytest.mark.parametrize("size", [0, 1, 10, 200])
+def test_pivot_slices_match_sum_amount_by(size: int) -> None:
+    transactions = create_random_transactions(size)
+    cube = pivot_amount(
+        transactions,
+        [PivotDimension.Group, PivotDimension.Category, PivotDimension.Month],
+    )
+
+    assert cube.total() == sum_amount(transactions)
+    assert by_key(cube.amount_by(PivotDimension.Group)) == by_key(
+        sum_amount_by(transactions, key=get_field("groupNumber"))
+    )
+    assert by_key(cube.amount_by(PivotDimension.Category)) == by_key(
+        sum_amount_by(transactions, key=get_field("customCategory"))
+    )
+    assert by_key(cube.amount_by(PivotDimension.Month)) == by_key(
+        sum_amount_by(
+            transactions,
+            key=lambda transaction: transaction["datetime"].strftime("%Y-%m"),
+        )
+    )
+
+
+def test_pivot_slice_with_fixed_dimension() -> None:
+    transactions = create_random_transactions(100)
+    cube = pivot_amount(transactions, [PivotDimension.Group, PivotDimension.Category])
+
+    house_transactions = [
+        transaction
+        for transaction in transactions
+        if cast(Dict, transaction)["customCategory"] == "house"
+    ]
+    assert cube.total(where={PivotDimension.Category: "house"}) == pytest.approx(
+        sum_amount(house_transactions)
+    )
+    assert by_key(
+        cube.amount_by(PivotDimension.Group, where={PivotDimension.Category: "house"})
+    ) == by_key(sum_amount_by(house_transactions, key=get_field("groupNumber")))
+
+
+def test_pivot_transaction_type_and_bank_code() -> None:
+    transactions = [
+        create_transaction(0, 1000, "income", 0, reference="salary"),
+        create_transaction(1, -10, "food", 1),
+        create_transaction(2, -20, "food", 1, code="transfer"),
+        create_transaction(3, -30, "house", 2),
+    ]
+    cube = pivot_amount(
+        transactions, [PivotDimension.TransactionType, PivotDimension.BankCode]
+    )
+
+    assert cube.amount_by(PivotDimension.TransactionType) == [
+        {"key": "EXPENSE", "amount": -40, "references": ["reference 1", "reference 3"]},
+        {"key": "UNKNOWN", "amount": -20, "references": ["reference 2"]},
+        {"key": "INCOME", "amount": 1000, "references": ["salary 0"]},
+    ]
+    assert cube.total(where={PivotDimension.BankCode: "card"}) == 960
+
+
+def test_pivot_keeps_integer_minor_units() -> None:
+    transactions = [
+        create_transaction(0, -1099, "food", 0),
+        create_transaction(1, -1, "food", 0),
+    ]
+    cube = pivot_amount(
+        transactions, [PivotDimension.Category], get_zero_amount(minor_units=True)
+    )
+
+    assert cube.total() == -1100
+    assert isinstance(cube.total(), int)
+    assert cube.total(where={PivotDimension.Category: "house"}) == 0
+    assert isinstance(cube.total(where={PivotDimension.Category: "house"}), int)
+    assert isinstance(sum_amount([], get_zero_amount(minor_units=True)), int)
+
+
+def test_empty_float_amounts_stay_float() -> None:
+    cube = pivot_amount(
+        [create_transaction(0, -10.99, "food", 0)], [PivotDimension.Category]
+    )
+
+    assert isinstance(cube.total(where={PivotDimension.Category: "house"}), float)
+    assert isinstance(sum_amount([]), float)
+    assert isinstance(get_zero_amount(minor_units=False), float)
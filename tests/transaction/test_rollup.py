@@ -0,0 +1,202 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, cast
+
+import pytest
+
+from personal_finances.transaction.definition import SimpleTransaction
+from personal_finances.transaction.rollup import (
+    RollupDimension,
+    RollupRangeUnavailable,
+    RollupVersionMismatch,
+    TransactionRollup,
+)
+from personal_finances.transaction.type import TransactionType
+
+TEST_START_DATETIME = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def create_transaction(
+    index: int, day: int, amount: float, category: str, group_name: str = "group"
+) -> SimpleTransaction:
+    return cast(
+        SimpleTransaction,
+        {
+            "transactionId": f"transaction_{index}",
+            "datetime": TEST_START_DATETIME + timedelta(days=day, hours=12),
+            "amount": amount,
+            "referenceText": f"reference {index}",
+            "bankTransactionCode": "dummy_transaction_code",
+            "groupNumber": 0,
+            "groupName": group_name,
+            "customCategory": category,
+        },
+    )
+
+
+EXPENSES: List[SimpleTransaction] = [
+    create_transaction(0, 0, -10, "food"),
+    create_transaction(1, 0, -5, "food"),
+    create_transaction(2, 3, -100, "house", "rent"),
+    create_transaction(3, 10, -7, "food"),
+]
+INCOMES: List[SimpleTransaction] = [create_transaction(4, 1, 1000, "salary")]
+
+
+def create_rollup() -> TransactionRollup:
+    rollup = TransactionRollup()
+    rollup.add(EXPENSES, TransactionType.EXPENSE)
+    rollup.add(INCOMES, TransactionType.INCOME)
+    return rollup
+
+
+def test_rollup_totals_by_day_range() -> None:
+    rollup = create_rollup()
+    end_of_january = datetime(2024, 1, 31, tzinfo=timezone.utc)
+
+    assert rollup.total(
+        TEST_START_DATETIME, end_of_january, TransactionType.EXPENSE
+    ) == (-122)
+    assert (
+        rollup.total(TEST_START_DATETIME, end_of_january, TransactionType.INCOME)
+        == 1000
+    )
+    # ranges select whole UTC days, the end day excluded
+    assert (
+        rollup.total(
+            TEST_START_DATETIME + timedelta(days=1),
+            TEST_START_DATETIME + timedelta(days=4),
+            TransactionType.EXPENSE,
+        )
+        == -100
+    )
+    assert (
+        rollup.total(
+            TEST_START_DATETIME + timedelta(days=1),
+            TEST_START_DATETIME + timedelta(days=3),
+            TransactionType.EXPENSE,
+        )
+        == 0
+    )
+    assert (
+        rollup.total(
+            datetime(2024, 1, 4, 1, tzinfo=timezone(timedelta(hours=1))),
+            datetime(2024, 1, 5, 1, tzinfo=timezone(timedelta(hours=1))),
+            TransactionType.EXPENSE,
+        )
+        == -100
+    )
+    assert (
+        rollup.total(
+            datetime(2023, 1, 1, tzinfo=timezone.utc),
+            datetime(2023, 12, 31, tzinfo=timezone.utc),
+            TransactionType.EXPENSE,
+        )
+        == 0
+    )
+
+
+@pytest.mark.parametrize(
+    "start,end",
+    [
+        (TEST_START_DATETIME + timedelta(hours=12), TEST_START_DATETIME),
+        (
+            TEST_START_DATETIME,
+            datetime(2024, 1, 2, tzinfo=timezone(timedelta(hours=1))),
+        ),
+    ],
+)
+def test_rollup_rejects_partial_days(start: datetime, end: datetime) -> None:
+    with pytest.raises(RollupRangeUnavailable):
+        create_rollup().total(start, end, TransactionType.EXPENSE)
+
+
+def test_rollup_amount_by_dimension() -> None:
+    rollup = create_rollup()
+    end_of_january = datetime(2024, 1, 31, tzinfo=timezone.utc)
+
+    assert rollup.amount_by(
+        RollupDimension.Category,
+        TEST_START_DATETIME,
+        end_of_january,
+        TransactionType.EXPENSE,
+    ) == [{"key": "house", "amount": -100}, {"key": "food", "amount": -22}]
+    assert rollup.amount_by(
+        RollupDimension.Group,
+        TEST_START_DATETIME,
+        TEST_START_DATETIME + timedelta(days=1),
+        TransactionType.EXPENSE,
+    ) == [{"key": "group", "amount": -15}]
+
+
+def test_rollup_incremental_update_skips_processed() -> None:
+    rollup = TransactionRollup()
+    rollup.add(EXPENSES[:2], TransactionType.EXPENSE)
+
+    assert rollup.get_unprocessed(EXPENSES) == EXPENSES[2:]
+
+    rollup.add(EXPENSES, TransactionType.EXPENSE)
+    assert rollup.get_unprocessed(EXPENSES) == []
+    assert (
+        rollup.total(
+            TEST_START_DATETIME,
+            TEST_START_DATETIME + timedelta(days=30),
+            TransactionType.EXPENSE,
+        )
+        == -122
+    )
+
+
+def test_rollup_remove_and_add_back() -> None:
+    rollup = create_rollup()
+    internal_transfer = create_transaction(5, 0, -20, "transfer")
+    rollup.remove([internal_transfer, EXPENSES[0]])
+
+    assert rollup.get_unprocessed([internal_transfer]) == []
+    assert rollup.get_not_rolled_up(EXPENSES + [internal_transfer]) == [
+        EXPENSES[0],
+        internal_transfer,
+    ]
+    assert rollup.amount_by(
+        RollupDimension.Category,
+        TEST_START_DATETIME,
+        TEST_START_DATETIME + timedelta(days=1),
+        TransactionType.EXPENSE,
+    ) == [{"key": "food", "amount": -5}]
+
+    rollup.add([EXPENSES[0]], TransactionType.EXPENSE)
+    assert rollup.get_not_rolled_up(EXPENSES) == []
+    assert (
+        rollup.total(
+            TEST_START_DATETIME,
+            TEST_START_DATETIME + timedelta(days=30),
+            TransactionType.EXPENSE,
+        )
+        == -122
+    )
+
+
+def test_rollup_version_mismatch() -> None:
+    rollup_dict: Dict = {**create_rollup().as_dict(), "version": 1}
+
+    with pytest.raises(RollupVersionMismatch):
+        TransactionRollup.from_dict(rollup_dict)
+
+
+def test_rollup_dict_round_trip() -> None:
+    rollup = create_rollup()
+    rollup.remove([create_transaction(5, 0, -20, "transfer")])
+    rollup_dict: Dict = rollup.as_dict()
+    loaded_rollup = TransactionRollup.from_dict(rollup_dict)
+
+    assert loaded_rollup.as_dict() == rollup_dict
+    assert loaded_rollup.get_unprocessed([create_transaction(99, 0, 1, "food")]) == [
+        create_transaction(99, 0, 1, "food")
+    ]
+    assert (
+        loaded_rollup.total(
+            TEST_START_DATETIME,
+            TEST_START_DATETIME + timedelta(days=30),
+            TransactionType.EXPENSE,
+        )
+        == -122
+    )
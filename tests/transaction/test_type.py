@@ -0,0 +1,95 @@
+from unittest.mock import Mock, patch
+from datetime import datetime
+from typing import Generator, List
+import pytest
+
+from personal_finances.config import CategoryDefinition
+from personal_finances.transaction.definition import SimpleTransaction
+from personal_finances.transaction.type import (
+    get_expense_transactions,
+    get_income_transactions,
+    get_unknown_type_transactions,
+    partition_by_type,
+)
+
+
+@pytest.fixture(autouse=True)
+def user_config_mock() -> Generator[Mock, None, None]:
+    with patch("personal_finances.transaction.type.get_user_configuration") as u_mock:
+        u_mock.return_value.IncomeCategoryDefinition = [
+            CategoryDefinition(
+                CategoryName="salary",
+                CategoryReferences=["company name", "side.job (ltd)"],
+                CategoryTags=[],
+            ),
+            CategoryDefinition(
+                CategoryName="rental",
+                CategoryReferences=["tenant"],
+                CategoryTags=[],
+            ),
+        ]
+        u_mock.return_value.ExpenseTransactionCodes = ["card", "direct_debit"]
+        yield u_mock
+
+
+def create_transaction(
+    index: int, amount: float, reference: str, code: str
+) -> SimpleTransaction:
+    return SimpleTransaction(
+        transactionId=f"transaction_{index}",
+        datetime=datetime(2024, 1, 1),
+        amount=amount,
+        referenceText=reference,
+        bankTransactionCode=code,
+    )
+
+
+TRANSACTIONS: List[SimpleTransaction] = [
+    create_transaction(0, 3000, "company name salary", "transfer"),
+    create_transaction(1, -20, "supermarket", "card"),
+    create_transaction(2, 500, "tenant rent", "transfer"),
+    create_transaction(3, 100, "unknown friend", "transfer"),
+    create_transaction(4, -3000, "company name refund", "transfer"),
+    create_transaction(5, 50, "side.job (ltd) invoice", "transfer"),
+    create_transaction(6, 50, "sidexjob (ltd) invoice", "transfer"),
+    create_transaction(7, -80, "electricity", "direct_debit"),
+    create_transaction(8, 0, "company name", "card"),
+]
+
+
+def get_transaction_ids(transactions: List[SimpleTransaction]) -> List[str]:
+    return [transaction["transactionId"] for transaction in transactions]
+
+
+def test_partition_by_type() -> None:
+    income, expense, unknown = partition_by_type(TRANSACTIONS)
+
+    assert get_transaction_ids(income) == [
+        "transaction_0",
+        "transaction_2",
+        "transaction_5",
+    ]
+    assert get_transaction_ids(expense) == ["transaction_1", "transaction_7"]
+    assert get_transaction_ids(unknown) == [
+        "transaction_3",
+        "transaction_4",
+        "transaction_6",
+        "transaction_8",
+    ]
+
+
+def test_partition_by_type_matches_type_filters() -> None:
+    assert partition_by_type(TRANSACTIONS) == (
+        get_income_transactions(TRANSACTIONS),
+        get_expense_transactions(TRANSACTIONS),
+        get_unknown_type_transactions(TRANSACTIONS),
+    )
+
+
+def test_partition_by_type_without_income_references(user_config_mock: Mock) -> None:
+    user_config_mock.return_value.IncomeCategoryDefinition = []
+    income, expense, unknown = partition_by_type(TRANSACTIONS)
+
+    assert income == []
+    assert get_transaction_ids(expense) == ["transaction_1", "transaction_7"]
+    assert len(unknown) == len(TRANSACTIONS) - 2
@@ -24,7 +24,7 @@ def logged_in_client(client: UserApiClient) -> Generator[UserApiClient, None, No
     """
     Returns a UserApiClient that is already logged.
     """
-    with patch("requests.post") as mock_post:
+    with patch("requests.Session.post") as mock_post:
         mock_response = MagicMock()
         mock_response.json.return_value = {"token": "mocked_token_123"}
         mock_post.return_value = mock_response
@@ -35,25 +35,19 @@ def logged_in_client(client: UserApiClient) -> Generator[UserApiClient, None, No
 
 @pytest.fixture
 def mock_post() -> Generator[Mock, None, None]:
-    with patch(
-        "personal_finances.user_api_client.user_api_client.requests.post"
-    ) as mock_post:
+    with patch("requests.Session.post") as mock_post:
         yield mock_post
 
 
 @pytest.fixture
 def mock_get() -> Generator[Mock, None, None]:
-    with patch(
-        "personal_finances.user_api_client.user_api_client.requests.get"
-    ) as mock_get:
+    with patch("requests.Session.get") as mock_get:
         yield mock_get
 
 
 @pytest.fixture
 def mock_put() -> Generator[Mock, None, None]:
-    with patch(
-        "personal_finances.user_api_client.user_api_client.requests.put"
-    ) as mock_get:
+    with patch("requests.Session.put") as mock_get:
         yield mock_get
 
 
@@ -270,3 +264,18 @@ def test_update_bank_account_invalid_input(
     with pytest.raises(ValueError) as exc_info:
         logged_in_client.update_bank_account(user_id, iban)
     assert expected_error_msg in str(exc_info.value)
+
+
+def test_requests_use_given_session() -> None:
+    session_mock = MagicMock()
+    session_mock.post.return_value.json.return_value = {"token": "session_token"}
+    session_mock.get.return_value.json.return_value = {"ibanList": ["iban"]}
+    client = UserApiClient(base_url="https://api.test", session=session_mock)
+
+    client.login(user_id="user123", password="supersecret")
+
+    assert client.get_bank_accounts(user_id="user123") == ["iban"]
+    session_mock.get.assert_called_once_with(
+        "https://api.test/users/user123/bank-accounts/",
+        headers={"Authorization": "Bearer session_token"},
+    )